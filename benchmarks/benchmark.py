@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+"""
+    Pontus benchmarks
+    ~~~~~~~~~~~~~~~~~
+
+    Measures signing throughput and validation and move latency against an
+    in-process moto Amazon S3, so it runs offline. See README.rst in this
+    directory for usage.
+"""
+import argparse
+import gc
+import hashlib
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+import boto3  # noqa
+from flask import Flask  # noqa
+from moto import mock_s3  # noqa
+
+import pontus  # noqa
+from pontus import (  # noqa
+    AmazonS3FileValidator,
+    AmazonS3PresignedUrlGenerator,
+    AmazonS3SignedRequest,
+    AmazonS3SignedRequestFactory
+)
+from pontus.move_strategies import (  # noqa
+    ManagedCopy,
+    ServerSideCopy,
+    TagInPlace
+)
+from pontus.validators import Checksum, FileSize, MimeType  # noqa
+
+BUCKET_NAME = 'pontus-benchmark'
+UNVALIDATED_PREFIX = 'unvalidated/'
+CONFIG = {'AWS_UNVALIDATED_PREFIX': UNVALIDATED_PREFIX}
+
+SIZE_UNITS = OrderedDict([
+    ('GB', 1024 ** 3),
+    ('MB', 1024 ** 2),
+    ('KB', 1024),
+    ('B', 1),
+])
+
+DEFAULT_SIZES = '1KB,1MB,64MB'
+
+#: Validator combinations `validate()` is measured with, as
+#: ``(name, factory, options)`` tuples. `factory` takes the object body.
+VALIDATOR_SETS = [
+    ('FileSize', lambda body: [FileSize(max=len(body))], {}),
+    ('MimeType', lambda body: [MimeType('image/jpeg')], {}),
+    (
+        'MimeType(sniff_size=2048)',
+        lambda body: [MimeType('image/jpeg', sniff_size=2048)],
+        {}
+    ),
+    (
+        'FileSize+MimeType+Checksum(streaming)',
+        lambda body: [
+            FileSize(max=len(body)),
+            MimeType('image/jpeg', sniff_size=2048),
+            Checksum('sha256', expected=hashlib.sha256(body).hexdigest()),
+        ],
+        {'streaming': True}
+    ),
+]
+
+MOVE_STRATEGIES = [
+    ('ManagedCopy', ManagedCopy),
+    ('ServerSideCopy', ServerSideCopy),
+    ('TagInPlace', TagInPlace),
+]
+
+
+def parse_size(value):
+    value = value.strip().upper()
+    for unit, multiplier in SIZE_UNITS.items():
+        if value.endswith(unit):
+            return int(float(value[:-len(unit)]) * multiplier)
+    return int(value)
+
+
+def format_size(size):
+    for unit, multiplier in SIZE_UNITS.items():
+        if size >= multiplier and size % multiplier == 0:
+            return '{0}{1}'.format(size // multiplier, unit)
+    return '{0}B'.format(size)
+
+
+def make_body(size):
+    # A JPEG signature, so that MIME type validators accept the file.
+    return (b'\xff\xd8\xff\xe0' + b'\0' * size)[:size]
+
+
+def measure(func, setup=None, repeat=5):
+    """
+    Calls `func` `repeat` times, each after calling `setup`, and returns
+    its timings and the memory used by one more, traced call.
+    """
+    timings = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        gc.collect()
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+
+    args = setup() if setup else ()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        func(*args)
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return OrderedDict([
+        ('median', statistics.median(timings)),
+        ('min', min(timings)),
+        ('max', max(timings)),
+        ('peak_memory', peak - before),
+        ('retained_memory', after - before),
+    ])
+
+
+def bench_form_fields(bucket, session, repeat, calls=1000):
+    signed_request = AmazonS3SignedRequest(
+        key_name=u'benchmark/file.jpg',
+        mime_type=u'image/jpeg',
+        bucket=bucket,
+        session=session
+    )
+
+    def sign_many():
+        for _ in range(calls):
+            signed_request.form_fields
+
+    factory = AmazonS3SignedRequestFactory(bucket=bucket, session=session)
+
+    def sign_many_with_factory():
+        for _ in range(calls):
+            factory.form_fields(u'benchmark/file.jpg', u'image/jpeg')
+
+    generator = AmazonS3PresignedUrlGenerator(bucket=bucket, session=session)
+
+    def presign_many():
+        for _ in range(calls):
+            generator.generate_url(u'benchmark/file.jpg')
+
+    results = []
+    for name, func in [
+        ('form_fields', sign_many),
+        ('factory.form_fields', sign_many_with_factory),
+        ('generate_url', presign_many),
+    ]:
+        result = measure(func, repeat=repeat)
+        result['ops_per_sec'] = calls / result['median']
+        results.append((name, result))
+    return results
+
+
+def bench_validate(bucket, sizes, repeat):
+    results = []
+    for size in sizes:
+        body = make_body(size)
+        key_name = 'validated/{0}.jpg'.format(format_size(size))
+        bucket.Object(key_name).put(Body=body)
+        for name, factory, options in VALIDATOR_SETS:
+            validators = factory(body)
+
+            def validate():
+                validator = AmazonS3FileValidator(
+                    key_name=key_name,
+                    bucket=bucket,
+                    validators=validators,
+                    config=CONFIG,
+                    **options
+                )
+                assert validator.validate(), validator.errors
+
+            results.append((
+                'validate[{0}, {1}]'.format(format_size(size), name),
+                measure(validate, repeat=repeat)
+            ))
+    return results
+
+
+def bench_move(bucket, sizes, repeat):
+    results = []
+    for size in sizes:
+        body = make_body(size)
+        key_name = UNVALIDATED_PREFIX + '{0}.jpg'.format(format_size(size))
+
+        def setup():
+            bucket.Object(key_name).put(Body=body)
+            return ()
+
+        for name, strategy_class in MOVE_STRATEGIES:
+            strategy = strategy_class()
+
+            def move():
+                AmazonS3FileValidator(
+                    key_name=key_name,
+                    bucket=bucket,
+                    move_strategy=strategy,
+                    config=CONFIG
+                ).validate()
+
+            results.append((
+                'move[{0}, {1}]'.format(format_size(size), name),
+                measure(move, setup=setup, repeat=repeat)
+            ))
+    return results
+
+
+def run(sizes, repeat):
+    app = Flask('benchmark')
+    app.config.update(CONFIG)
+    with app.app_context(), mock_s3():
+        session = boto3.session.Session()
+        s3 = session.resource('s3')
+        s3.create_bucket(Bucket=BUCKET_NAME)
+        bucket = s3.Bucket(BUCKET_NAME)
+
+        results = OrderedDict()
+        results.update(bench_form_fields(bucket, session, repeat))
+        results.update(bench_validate(bucket, sizes, repeat))
+        results.update(bench_move(bucket, sizes, repeat))
+    return OrderedDict([
+        ('meta', OrderedDict([
+            ('pontus', pontus.__version__),
+            ('python', platform.python_version()),
+            ('platform', platform.platform()),
+            ('sizes', [format_size(size) for size in sizes]),
+            ('repeat', repeat),
+        ])),
+        ('results', results),
+    ])
+
+
+def compare(report, baseline, threshold):
+    """
+    Returns the names of the benchmarks whose median is more than
+    `threshold` slower than in `baseline`, and prints the comparison.
+    """
+    regressions = []
+    print('')
+    print('{0:<58} {1:>10} {2:>10} {3:>8}'.format(
+        'benchmark', 'baseline', 'current', 'change'
+    ))
+    for name, result in report['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        change = result['median'] / previous['median'] - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = ' !'
+        print('{0:<58} {1:>9.2f}ms {2:>9.2f}ms {3:>+7.1%}{4}'.format(
+            name,
+            previous['median'] * 1000,
+            result['median'] * 1000,
+            change,
+            flag
+        ))
+    return regressions
+
+
+def print_report(report):
+    print('{0:<58} {1:>10} {2:>12} {3:>12}'.format(
+        'benchmark', 'median', 'peak mem', 'retained'
+    ))
+    for name, result in report['results'].items():
+        print('{0:<58} {1:>9.2f}ms {2:>11.1f}K {3:>11.1f}K'.format(
+            name,
+            result['median'] * 1000,
+            result['peak_memory'] / 1024.0,
+            result['retained_memory'] / 1024.0
+        ))
+        if 'ops_per_sec' in result:
+            print('{0:<58} {1:>9.0f}/s'.format('', result['ops_per_sec']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument(
+        '--sizes',
+        default=DEFAULT_SIZES,
+        help=(
+            'Comma separated object sizes, e.g. 1KB,1MB,1GB. '
+            'Defaults to {0}.'.format(DEFAULT_SIZES)
+        )
+    )
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=5,
+        help='Number of timed runs of each benchmark.'
+    )
+    parser.add_argument(
+        '--save',
+        metavar='PATH',
+        help='Save the results as a JSON baseline.'
+    )
+    parser.add_argument(
+        '--compare',
+        metavar='PATH',
+        help='Compare the results to a JSON baseline.'
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.1,
+        help=(
+            'Relative slowdown of the median reported as a regression by '
+            '--compare. Defaults to 0.1.'
+        )
+    )
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+    report = run(sizes, args.repeat)
+    print_report(report)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print('')
+            print('{0} regression(s) over {1:.0%}.'.format(
+                len(regressions),
+                args.threshold
+            ))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
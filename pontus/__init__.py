@@ -6,8 +6,66 @@
     :copyright: (c) 2014 by Vesa Uimonen.
     :license: MIT, see LICENSE for more details.
 """
-
-from .amazon_s3_file_validator import AmazonS3FileValidator  # noqa
-from .amazon_s3_signed_request import AmazonS3SignedRequest  # noqa
+import importlib
 
 __version__ = '4.1.0'
+
+# The classes are imported from their modules on first access, so that
+# importing pontus does not load botocore or libmagic until they are needed.
+_exports = {
+    'AmazonS3BatchDeleter': 'amazon_s3_batch_deleter',
+    'AmazonS3BulkFileValidator': 'amazon_s3_bulk_file_validator',
+    'AmazonS3FileValidator': 'amazon_s3_file_validator',
+    'AmazonS3PresignedUrlGenerator': 'amazon_s3_presigned_url_generator',
+    'AmazonS3SignedMultipartUpload': 'amazon_s3_signed_multipart_upload',
+    'AmazonS3SignedRequest': 'amazon_s3_signed_request',
+    'AmazonS3SignedRequestFactory': 'amazon_s3_signed_request_factory',
+    'AsyncAmazonS3FileValidator': 'async_amazon_s3_file_validator',
+    'Pontus': 'extension',
+}
+
+__all__ = sorted(_exports) + ['warm_up']
+
+
+def __getattr__(name):
+    try:
+        module_name = _exports[name]
+    except KeyError:
+        raise AttributeError(
+            'module {0!r} has no attribute {1!r}'.format(__name__, name)
+        )
+    value = getattr(
+        importlib.import_module('.' + module_name, __name__),
+        name
+    )
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_exports))
+
+
+def warm_up(magic_pool_size=None):
+    """
+    Imports all pontus classes and their dependencies, and loads the handles
+    of the shared libmagic pool. Long-running processes can call this at
+    startup, so that the first requests do not pay for the imports and for
+    loading the magic database.
+
+    Example::
+
+        import pontus
+
+        app = create_app()
+        pontus.warm_up()
+
+    :param magic_pool_size:
+        If given, the shared libmagic pool is first replaced with a pool of
+        `magic_pool_size` handles. See :func:`pontus.magic_pool.warm_up`.
+    """
+    from . import magic_pool, validators  # noqa
+
+    for name in _exports:
+        __getattr__(name)
+    magic_pool.warm_up(magic_pool_size)
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+import threading
+from collections import namedtuple
+
+import botocore.exceptions
+
+from . import extension, instrumentation
+
+#: The largest number of keys a single DeleteObjects request can delete.
+MAX_BATCH_SIZE = 1000
+
+DeleteFailure = namedtuple('DeleteFailure', ['key_name', 'code', 'message'])
+
+
+class AmazonS3BatchDeleter(object):
+    """A thread-safe utility for deleting files stored in AmazonS3 in
+    batches.
+
+    Keys are collected with :meth:`add` and deleted with `DeleteObjects`
+    requests of up to `batch_size` keys. A batch is sent when it is full,
+    when `flush_interval` seconds have passed since its first key was added,
+    or when :meth:`flush` is called. It can be passed to
+    :class:`AmazonS3FileValidator` for deleting moved and rejected files.
+
+    Keys that could not be deleted are collected in :attr:`failures`. If a
+    `DeleteObjects` request fails as a whole, e.g. because it is throttled,
+    a :class:`DeleteFailure` is recorded for each of its keys.
+
+    Example::
+
+        from pontus import AmazonS3BatchDeleter, AmazonS3BulkFileValidator
+
+        with AmazonS3BatchDeleter(bucket, flush_interval=5) as deleter:
+            validator = AmazonS3BulkFileValidator(
+                key_names=key_names,
+                bucket=bucket,
+                deleter=deleter,
+                delete_rejected_file=True
+            )
+            results = list(validator.validate())
+
+        for failure in deleter.failures:
+            print failure.key_name, failure.message
+
+    :param bucket:
+        The Boto S3 Bucket instance. Defaults to the bucket of
+        :class:`pontus.Pontus`.
+
+    :param batch_size:
+        The number of keys deleted with one request, at most
+        :data:`MAX_BATCH_SIZE`.
+
+    :param flush_interval:
+        If given, the maximum number of seconds a key waits for its batch
+        to be sent.
+    """
+    def __init__(
+        self,
+        bucket=None,
+        batch_size=MAX_BATCH_SIZE,
+        flush_interval=None
+    ):
+        if not 0 < batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(
+                u'Argument `batch_size` must be between 1 and {max!s}.'
+                .format(max=MAX_BATCH_SIZE)
+            )
+        self.bucket = extension.get_bucket(bucket)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.failures = []
+        self._lock = threading.Lock()
+        self._key_names = []
+        self._timer = None
+
+    def add(self, key_name):
+        """
+        Adds a key to be deleted, sending the batch if it is full.
+
+        :return: a list of :class:`DeleteFailure` tuples of a sent batch.
+        """
+        with self._lock:
+            self._key_names.append(key_name)
+            if len(self._key_names) < self.batch_size:
+                if len(self._key_names) == 1 and self.flush_interval:
+                    self._timer = threading.Timer(
+                        self.flush_interval,
+                        self.flush
+                    )
+                    self._timer.daemon = True
+                    self._timer.start()
+                return []
+            key_names = self._take()
+        return self._delete(key_names)
+
+    def flush(self):
+        """
+        Deletes all collected keys.
+
+        :return: a list of :class:`DeleteFailure` tuples.
+        """
+        with self._lock:
+            key_names = self._take()
+        failures = []
+        for start in range(0, len(key_names), self.batch_size):
+            failures.extend(
+                self._delete(key_names[start:start + self.batch_size])
+            )
+        return failures
+
+    def _take(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        key_names = self._key_names
+        self._key_names = []
+        return key_names
+
+    def _delete(self, key_names):
+        if not key_names:
+            return []
+        client = self.bucket.meta.client
+        try:
+            with instrumentation.measure(
+                instrumentation.DELETE,
+                self.__class__.__name__,
+                client=client
+            ):
+                response = client.delete_objects(
+                    Bucket=self.bucket.name,
+                    Delete={
+                        'Objects': [
+                            {'Key': key_name} for key_name in key_names
+                        ],
+                        'Quiet': True,
+                    }
+                )
+        except Exception as e:
+            # Recorded rather than raised, as an exception raised in the
+            # flush timer thread would be lost.
+            failures = self._get_request_failures(key_names, e)
+        else:
+            failures = [
+                DeleteFailure(error['Key'], error['Code'], error['Message'])
+                for error in response.get('Errors', [])
+            ]
+        with self._lock:
+            self.failures.extend(failures)
+        return failures
+
+    def _get_request_failures(self, key_names, error):
+        if isinstance(error, botocore.exceptions.ClientError):
+            code = error.response['Error'].get('Code')
+        else:
+            code = error.__class__.__name__
+        return [
+            DeleteFailure(key_name, code, str(error))
+            for key_name in key_names
+        ]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.flush()
+
+    def __len__(self):
+        return len(self._key_names)
+
+    def __repr__(self):
+        return '<{cls} bucket={bucket!r} pending={pending!r}>'.format(
+            cls=self.__class__.__name__,
+            bucket=self.bucket.name,
+            pending=len(self)
+        )
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from . import extension
+from .amazon_s3_file_validator import AmazonS3FileValidator
+from .exceptions import FileNotFoundError
+
+BulkValidationResult = namedtuple(
+    'BulkValidationResult',
+    ['key_name', 'is_valid', 'errors', 'new_key_name', 'exception'],
+    defaults=[None]
+)
+
+
+class AmazonS3BulkFileValidator(object):
+    """A Flask utility for validating many files stored in AmazonS3
+    concurrently.
+
+    Each file is validated with :class:`AmazonS3FileValidator` on a bounded
+    thread pool, so the Amazon S3 requests of different files are made in
+    parallel. The Flask config is captured when :meth:`validate` is called,
+    so the worker threads do not need an application context.
+
+    Example::
+
+        from pontus import AmazonS3BulkFileValidator
+        from pontus.validators import FileSize, MimeType
+
+        validator = AmazonS3BulkFileValidator(
+            key_names=['my/file.jpg', 'my/other-file.jpg'],
+            bucket=bucket,
+            validators=[FileSize(max=2097152), MimeType('image/jpeg')]
+        )
+
+        for result in validator.validate():
+            if result.is_valid:
+                # File was moved to result.new_key_name
+                pass
+            else:
+                print result.key_name, result.errors
+
+    :param key_names:
+        The keys of the files stored in Amazon S3.
+
+    :param bucket:
+        The Boto S3 Bucket instance. Defaults to the bucket of
+        :class:`pontus.Pontus`.
+
+    :param validators:
+        List of validators used for every file. See
+        :class:`AmazonS3FileValidator`.
+
+    :param max_workers:
+        The maximum number of files validated at the same time.
+
+    :param config:
+        The configuration passed to :class:`AmazonS3FileValidator`. Defaults
+        to the config of the current Flask application, or to the config
+        read by :class:`pontus.Pontus` if the extension is initialized.
+
+    :param kwargs:
+        Other keyword arguments passed to :class:`AmazonS3FileValidator`.
+    """
+    def __init__(
+        self,
+        key_names,
+        bucket=None,
+        validators=[],
+        max_workers=10,
+        config=None,
+        **kwargs
+    ):
+        self.key_names = list(key_names)
+        self.bucket = extension.get_bucket(bucket)
+        self.validators = validators
+        self.max_workers = max_workers
+        self.config = config
+        self.kwargs = kwargs
+
+    def validate(self):
+        """
+        Validates the files with :attr:`validators`.
+
+        :return:
+            an iterator of :class:`BulkValidationResult` tuples in the order
+            the validations complete. `new_key_name` is the key of the file
+            after validation, or `None` if the file was invalid. A file that
+            does not exist is reported as invalid. If validating a file
+            raises any other exception, e.g. a :class:`ClientError` for
+            denied access, the file is reported as invalid with the
+            exception in `exception`, and the other files are still
+            validated.
+        """
+        config = self.config
+        if config is None:
+            config = extension.get_config()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        futures = [
+            executor.submit(self._validate_key, key_name, config)
+            for key_name in self.key_names
+        ]
+        executor.shutdown(wait=False)
+        return self._iter_results(futures)
+
+    def _iter_results(self, futures):
+        for future in as_completed(futures):
+            yield future.result()
+
+    def _validate_key(self, key_name, config):
+        try:
+            validator = AmazonS3FileValidator(
+                key_name=key_name,
+                bucket=self.bucket,
+                validators=self.validators,
+                config=config,
+                **self.kwargs
+            )
+            is_valid = validator.validate()
+        except FileNotFoundError as e:
+            return BulkValidationResult(key_name, False, [str(e)], None)
+        except Exception as e:
+            return BulkValidationResult(key_name, False, [str(e)], None, e)
+        return BulkValidationResult(
+            key_name,
+            is_valid,
+            validator.errors,
+            validator.obj.key if is_valid else None
+        )
+
+    def __repr__(self):
+        return '<{cls} key_names={key_names!r}>'.format(
+            cls=self.__class__.__name__,
+            key_names=self.key_names
+        )
@@ -1,8 +1,25 @@
 # -*- coding: utf-8 -*-
+import functools
+from contextlib import closing
+from operator import itemgetter
+
 import botocore
-from flask import current_app
 
+from . import extension, instrumentation
 from .exceptions import FileNotFoundError, ValidationError
+from .move_strategies import ManagedCopy
+from .validation_cache import get_cache_key
+from .validation_context import DEFAULT_CHUNK_SIZE, ValidationContext
+from .validators import (
+    COST_FULL_READ,
+    COST_METADATA,
+    StreamingValidator,
+    get_cost
+)
+
+
+def _is_not_found(error):
+    return error.response['Error']['Code'] in ('404', 'NoSuchKey')
 
 
 class AmazonS3FileValidator(object):
@@ -52,6 +69,9 @@ class AmazonS3FileValidator(object):
         List of validators. A validator can either be an instance of a class
         inheriting :class:`BaseValidator` or a callable
         function that takes Boto S3 Object instance as a parameter.
+        Validators with a truthy `uses_context` attribute are also passed a
+        :class:`ValidationContext` shared by all validators, so that the file
+        is downloaded at most once per validation.
 
     :param delete_unvalidated_file:
         Whether to delete the unvalidated file when the new file is copied to new location
@@ -63,30 +83,119 @@ class AmazonS3FileValidator(object):
         Canned ACL set to the new file that is copied during validation.
         Defaults to 'public-read'.
 
+    :param move_strategy:
+        A :class:`pontus.move_strategies.BaseMoveStrategy` instance used for
+        moving valid files. Defaults to
+        :class:`pontus.move_strategies.ManagedCopy`. With
+        :class:`pontus.move_strategies.TagInPlace` valid files are tagged
+        instead of moved.
+
+    :param lazy_load:
+        Whether to defer loading the file metadata until it is needed.
+        By default the metadata is loaded with a HEAD request when the
+        validator is created. With lazy loading it is filled in from the
+        first GET made by a validator, and a HEAD request is made only if no
+        validator needed the file body. Unless `fail_fast` is set, the
+        cheapest validator reading the body is then run before the metadata
+        validators. :class:`FileNotFoundError` is then raised by
+        :meth:`validate` instead.
+
+    :param streaming:
+        Whether to feed all :class:`StreamingValidator` validators from a
+        single pass over the file body, read in chunks of `chunk_size`
+        bytes. Validators rejecting the file in :meth:`begin` are left out
+        of the pass, which stops reading as soon as one of the streaming
+        validators fails. The body is kept for the other validators only if
+        it fits in one chunk.
+
+    :param chunk_size:
+        The size of the chunks in bytes the file body is read in when
+        `streaming` is enabled. It bounds the memory used for the body.
+
+    :param fast_sniff:
+        Whether MIME types of common formats are detected from their
+        signature before falling back to libmagic. See
+        :mod:`pontus.signatures`.
+
+    :param fail_fast:
+        Whether to stop validating after the first error. Validators are
+        always run from the cheapest to the most expensive cost class (see
+        :func:`pontus.validators.get_cost`), so with `fail_fast` a file
+        failing a metadata check is never downloaded. By default all
+        validators are run and all errors are collected.
+
+    :param cache:
+        A :class:`pontus.validation_cache.BaseValidationCache` instance for
+        caching validation results. Results are keyed on the bucket, the
+        key, the ETag of the file and the validators, so validating an
+        unchanged file again only loads the file metadata. Results are not
+        cached if a validator other than those of :mod:`pontus.validators`
+        has no `fingerprint` attribute. See
+        :func:`pontus.validation_cache.get_fingerprint`.
+
+    :param config:
+        The configuration to read `AWS_UNVALIDATED_PREFIX` from. It is read
+        once per validator. Defaults to the config of the current Flask
+        application, or to the config read by :class:`pontus.Pontus` if
+        the extension is initialized. Passing it allows validating outside
+        of an application context, e.g. in worker threads.
+
+    :param delete_rejected_file:
+        Whether to delete the file if it is invalid. Only files whose key
+        has the `AWS_UNVALIDATED_PREFIX` are deleted, so validating an
+        already published file again never deletes it.
+
+    :param deleter:
+        A :class:`AmazonS3BatchDeleter` instance the deleted files are added
+        to, instead of deleting each file with its own request. It must
+        delete from `bucket`.
+
     """
     def __init__(
         self,
         key_name,
-        bucket,
+        bucket=None,
         validators=[],
         delete_unvalidated_file=True,
         new_file_prefix='',
         new_file_acl='public-read',
+        move_strategy=None,
+        lazy_load=False,
+        streaming=False,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        fast_sniff=True,
+        fail_fast=False,
+        cache=None,
+        config=None,
+        delete_rejected_file=False,
+        deleter=None,
     ):
+        bucket = extension.get_bucket(bucket)
+        if deleter is not None and deleter.bucket.name != bucket.name:
+            raise ValueError(
+                u'Argument `deleter` must delete from the bucket {name!r}.'
+                .format(name=bucket.name)
+            )
         self.errors = []
         self.obj = bucket.Object(key_name)
-        try:
-            self.obj.load()
-        except botocore.exceptions.ClientError as e:
-            if e.response['Error']['Code'] == '404':
-                raise FileNotFoundError(key=key_name)
-            else:
-                raise e
+        self.lazy_load = lazy_load
+        if not lazy_load:
+            self._load()
         self.bucket = bucket
         self.validators = validators
         self.delete_unvalidated_file = delete_unvalidated_file
+        self.delete_rejected_file = delete_rejected_file
+        self.deleter = deleter
         self.new_file_prefix = new_file_prefix
         self.new_file_acl = new_file_acl
+        self.move_strategy = move_strategy or ManagedCopy()
+        self.streaming = streaming
+        self.chunk_size = chunk_size
+        self.fast_sniff = fast_sniff
+        self.fail_fast = fail_fast
+        self.cache = cache
+        self.config = config
+        self._unvalidated_prefix = None
 
     def validate(self):
         """
@@ -97,46 +206,214 @@ class AmazonS3FileValidator(object):
 
         :return: a boolean indicating if the file vas valid.
         """
-        for validator in self.validators:
+        try:
+            with self._measure(instrumentation.VALIDATE):
+                self._validate()
+        except botocore.exceptions.ClientError as e:
+            if self.lazy_load and _is_not_found(e):
+                raise FileNotFoundError(key=self.obj.key)
+            raise e
+
+        return not self.errors
+
+    def _validate(self):
+        cache_key = self._get_cache_key()
+        if cache_key is None:
+            self.errors.extend(self._run_validators())
+        else:
+            errors = self.cache.get(cache_key)
+            if errors is None:
+                errors = self._run_validators()
+                self.cache.set(cache_key, errors)
+            self.errors.extend(errors)
+
+        if self.obj.meta.data is None:
+            self._load()
+
+        self._finish()
+
+    def _get_cache_key(self, **options):
+        if self.cache is None:
+            return None
+        options = dict(
+            dict(
+                streaming=self.streaming,
+                fast_sniff=self.fast_sniff,
+                fail_fast=self.fail_fast
+            ),
+            **options
+        )
+        return get_cache_key(self.obj, self.validators, **options)
+
+    def _finish(self):
+        if self._should_move():
+            self._move_to_validated()
+        elif self._should_delete_rejected():
+            self._delete(self.obj)
+
+    def _run_validators(self):
+        context = ValidationContext(self.obj, fast_sniff=self.fast_sniff)
+        steps = []
+        streaming_validators = []
+        for index, validator in enumerate(self.validators):
+            if self.streaming and isinstance(validator, StreamingValidator):
+                streaming_validators.append((index, validator))
+            else:
+                steps.append((get_cost(validator), index, functools.partial(
+                    self._run_validator, index, validator, context
+                )))
+        if streaming_validators:
+            steps.append((
+                COST_FULL_READ,
+                streaming_validators[0][0],
+                functools.partial(
+                    self._validate_stream,
+                    streaming_validators,
+                    context
+                )
+            ))
+        steps.sort(key=itemgetter(0, 1))
+        if (
+            self.lazy_load and
+            not self.fail_fast and
+            self.obj.meta.data is None
+        ):
+            # Run the first step reading the body before the metadata steps,
+            # so that the metadata is filled in from its GET response
+            # instead of a HEAD request.
+            for position, step in enumerate(steps):
+                if step[0] > COST_METADATA:
+                    steps.insert(0, steps.pop(position))
+                    break
+
+        errors = []
+        for _, _, step in steps:
+            if errors and self.fail_fast:
+                break
+            errors.extend(step())
+        # Report errors in the order the validators were given in.
+        errors.sort(key=itemgetter(0))
+        return [error for _, error in errors]
+
+    def _run_validator(self, index, validator, context):
+        try:
+            self._call_validator(validator, context)
+        except ValidationError as e:
+            return [(index, e.error)]
+        return []
+
+    def _validate_stream(self, validators, context):
+        errors = []
+        consumers = []
+        for index, validator in validators:
             try:
-                validator(self.obj)
+                consumer = validator.begin(self.obj)
             except ValidationError as e:
-                self.errors.append(e.error)
+                errors.append((index, e.error))
+                continue
+            if consumer is not None:
+                consumers.append((index, consumer))
+        if not consumers or (errors and self.fail_fast):
+            return errors
 
-        if not self.errors and self._has_unvalidated_prefix():
-            self._move_to_validated()
+        index = None
+        name = '+'.join(
+            instrumentation.get_name(validator) for _, validator in validators
+        )
+        try:
+            with self._measure(instrumentation.VALIDATOR, name):
+                with closing(context.iter_chunks(self.chunk_size)) as chunks:
+                    for chunk in chunks:
+                        for index, consumer in consumers:
+                            consumer.feed(chunk)
+                for index, consumer in consumers:
+                    consumer.finish()
+        except ValidationError as e:
+            errors.append((index, e.error))
+        return errors
 
-        return not self.errors
+    def _load(self):
+        try:
+            with self._measure(instrumentation.LOAD):
+                self.obj.load()
+        except botocore.exceptions.ClientError as e:
+            if _is_not_found(e):
+                raise FileNotFoundError(key=self.obj.key)
+            else:
+                raise e
+
+    def _call_validator(self, validator, context):
+        with self._measure(
+            instrumentation.VALIDATOR,
+            instrumentation.get_name(validator)
+        ):
+            if getattr(validator, 'uses_context', False):
+                validator(self.obj, context=context)
+            else:
+                validator(self.obj)
+
+    def _measure(self, operation, name=None):
+        return instrumentation.measure(
+            operation,
+            name or self.__class__.__name__,
+            client=self.obj.meta.client
+        )
+
+    def _get_unvalidated_prefix(self):
+        if self._unvalidated_prefix is None:
+            config = self.config
+            if config is None:
+                config = extension.get_config()
+            self._unvalidated_prefix = (
+                config.get('AWS_UNVALIDATED_PREFIX') or ''
+            )
+        return self._unvalidated_prefix
+
+    def _should_move(self):
+        return not self.errors and (
+            self.move_strategy.in_place or self._has_unvalidated_prefix()
+        )
+
+    def _should_delete_rejected(self):
+        return bool(
+            self.errors and
+            self.delete_rejected_file and
+            self._has_unvalidated_prefix()
+        )
 
     def _has_unvalidated_prefix(self):
+        unvalidated_prefix = self._get_unvalidated_prefix()
         return (
-            current_app.config.get('AWS_UNVALIDATED_PREFIX') and
-            self.obj.key.startswith(
-                current_app.config.get('AWS_UNVALIDATED_PREFIX')
-            )
+            unvalidated_prefix and
+            self.obj.key.startswith(unvalidated_prefix)
         )
 
+    def _get_validated_key_name(self):
+        unvalidated_prefix = self._get_unvalidated_prefix()
+        return self.new_file_prefix + self.obj.key[len(unvalidated_prefix):]
+
     def _move_to_validated(self):
-        new_name = self.new_file_prefix + self.obj.key[
-            len(current_app.config.get('AWS_UNVALIDATED_PREFIX')):
-        ]
-        ExtraArgs = {
-            'ACL': self.new_file_acl,
-        }
-        if self.obj.content_type:
-            ExtraArgs['ContentType'] = self.obj.content_type
-        new_obj = self.bucket.Object(new_name)
-        new_obj.copy(
-            {
-                'Bucket': self.bucket.name,
-                'Key': self.obj.key,
-            },
-            ExtraArgs=ExtraArgs,
-        )
-        if self.delete_unvalidated_file:
-            self.obj.delete()
+        new_name = self._get_validated_key_name()
+        with self._measure(
+            instrumentation.MOVE,
+            self.move_strategy.__class__.__name__
+        ):
+            new_obj = self.move_strategy.move(
+                self.obj,
+                new_name,
+                self.new_file_acl
+            )
+        if self.delete_unvalidated_file and not self.move_strategy.in_place:
+            self._delete(self.obj)
         self.obj = new_obj
 
+    def _delete(self, obj):
+        if self.deleter is not None:
+            self.deleter.add(obj.key)
+        else:
+            with self._measure(instrumentation.DELETE):
+                obj.delete()
+
     def __repr__(self):
         return '<{cls} key={key!r}>'.format(
             cls=self.__class__.__name__,
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+from hashlib import sha256
+from urllib.parse import quote
+
+from . import extension, instrumentation
+from .amazon_s3_signed_request import BaseAmazonS3Signer
+
+ADDRESSING_STYLES = ('virtual', 'path')
+
+_UNSIGNED_PAYLOAD = 'UNSIGNED-PAYLOAD'
+
+
+def _quote(value):
+    return quote(value, safe='-_.~')
+
+
+class AmazonS3PresignedUrlGenerator(BaseAmazonS3Signer):
+    """Generates `presigned URLs`_ for downloading or uploading files in
+    Amazon S3 without the per-call overhead of botocore's
+    `generate_presigned_url`.
+
+    The URLs are signed with AWS Signature Version 4 like the URLs of
+    botocore, sharing the signing keys cached for
+    :class:`AmazonS3SignedRequest`.
+
+    .. _presigned URLs:
+        https://docs.aws.amazon.com/AmazonS3/latest/API/sigv4-query-string-auth.html
+
+    Example::
+
+        from pontus import AmazonS3PresignedUrlGenerator
+
+        generator = AmazonS3PresignedUrlGenerator(
+            bucket=bucket,
+            session=session,
+            expires_in=300
+        )
+
+        url = generator.generate_url(u'my/file.jpg')
+        urls = generator.generate_urls([u'my/file.jpg', u'my/file.pdf'])
+        upload_url = generator.generate_url(
+            u'my/file.png',
+            method='PUT',
+            headers={'Content-Type': 'image/png'}
+        )
+
+    :param bucket:
+        The Boto Bucket instance to be used. Defaults to the bucket of
+        :class:`pontus.Pontus`.
+
+    :param session:
+        The Boto Session instance whose credentials and region are used.
+        Defaults to the session of :class:`pontus.Pontus`.
+
+    :param expires_in:
+        The expiry time of the URLs in seconds.
+
+    :param addressing_style:
+        Either 'virtual' for URLs of the form
+        ``https://<bucket>.s3.<region>.amazonaws.com/<key>`` or 'path' for
+        ``https://s3.<region>.amazonaws.com/<bucket>/<key>``.
+
+    :param endpoint_url:
+        The URL of an S3 compatible endpoint, e.g.
+        ``https://storage.example.com``. The bucket is added to the host
+        with the 'virtual' addressing style and to the path with 'path'.
+    """
+    def __init__(
+        self,
+        bucket=None,
+        session=None,
+        expires_in=3600,
+        addressing_style='virtual',
+        endpoint_url=None,
+    ):
+        if addressing_style not in ADDRESSING_STYLES:
+            raise ValueError(
+                u'Argument `addressing_style` must be one of {0}.'.format(
+                    ', '.join(ADDRESSING_STYLES)
+                )
+            )
+        self.bucket = extension.get_bucket(bucket)
+        self.session = extension.get_session(session)
+        self.expires_in = expires_in
+        self.addressing_style = addressing_style
+        self.endpoint_url = endpoint_url
+        self._scheme, self._host, self._path_prefix = self._get_endpoint()
+
+    def generate_url(
+        self,
+        key_name,
+        method='GET',
+        expires_in=None,
+        params=None,
+        headers=None
+    ):
+        """
+        Generates a presigned URL for the given file.
+
+        :param key_name: The key of the file.
+        :param method: The HTTP method of the request, e.g. 'GET' or 'PUT'.
+        :param expires_in: Overrides the expiry time of the generator.
+        :param params:
+            A dictionary of additional query parameters to sign, e.g.
+            ``{'response-content-disposition': 'attachment'}``.
+        :param headers:
+            A dictionary of request headers to sign, e.g.
+            ``{'Content-Type': 'image/png'}`` for a PUT. The client must
+            send them with the exact same values.
+
+        :return: the presigned URL
+        """
+        return self.generate_urls(
+            [key_name],
+            method=method,
+            expires_in=expires_in,
+            params=params,
+            headers=headers
+        )[0]
+
+    def generate_urls(
+        self,
+        key_names,
+        method='GET',
+        expires_in=None,
+        params=None,
+        headers=None
+    ):
+        """
+        Generates presigned URLs for many files at once. The timestamp, the
+        credential and the signing key are computed once and shared by all
+        URLs. See :meth:`generate_url` for the parameters.
+
+        :return: a list of presigned URLs in the order of `key_names`
+        """
+        with instrumentation.measure(
+            instrumentation.SIGN,
+            self.__class__.__name__
+        ):
+            date = datetime.utcnow()
+            amz_date = date.strftime('%Y%m%dT%H%M%SZ')
+            credentials = self._get_credentials()
+            credential = self._get_credential(date, credentials)
+            query = dict(params or {})
+            query.update({
+                'X-Amz-Algorithm': self.algorithm,
+                'X-Amz-Credential': credential,
+                'X-Amz-Date': amz_date,
+                'X-Amz-Expires': str(
+                    self.expires_in if expires_in is None else expires_in
+                ),
+            })
+            if credentials.token:
+                query['X-Amz-Security-Token'] = credentials.token
+
+            canonical_headers = dict(
+                (name.lower(), ' '.join(str(value).split()))
+                for name, value in (headers or {}).items()
+            )
+            canonical_headers['host'] = self._host
+            signed_headers = ';'.join(sorted(canonical_headers))
+            query['X-Amz-SignedHeaders'] = signed_headers
+
+            return self._sign_urls(
+                key_names,
+                method.upper(),
+                date,
+                amz_date,
+                credential,
+                self._get_signing_key(date, credentials),
+                '&'.join(
+                    '{0}={1}'.format(_quote(name), _quote(value))
+                    for name, value in sorted(query.items())
+                ),
+                ''.join(
+                    '{0}:{1}\n'.format(name, value)
+                    for name, value in sorted(canonical_headers.items())
+                ),
+                signed_headers
+            )
+
+    def _sign_urls(self, key_names, method, date, amz_date, credential,
+                   signing_key, query, canonical_headers, signed_headers):
+        scope = credential.split('/', 1)[1]
+        # Everything in the canonical request but the path is shared.
+        prefix = method + '\n'
+        suffix = '\n'.join([
+            '',
+            query,
+            canonical_headers,
+            signed_headers,
+            _UNSIGNED_PAYLOAD,
+        ])
+        urls = []
+        for key_name in key_names:
+            path = quote(self._path_prefix + '/' + key_name)
+            canonical_request = prefix + path + suffix
+            string_to_sign = '\n'.join([
+                self.algorithm,
+                amz_date,
+                scope,
+                sha256(canonical_request.encode('utf-8')).hexdigest(),
+            ])
+            signature = self._get_signature(date, string_to_sign, signing_key)
+            urls.append(
+                '{scheme}://{host}{path}?{query}&X-Amz-Signature={signature}'
+                .format(
+                    scheme=self._scheme,
+                    host=self._host,
+                    path=path,
+                    query=query,
+                    signature=signature
+                )
+            )
+        return urls
+
+    def _get_endpoint(self):
+        if self.endpoint_url:
+            scheme, _, host = self.endpoint_url.rstrip('/').partition('://')
+        else:
+            scheme = 'https'
+            region_name = self.session.region_name
+            if region_name in (None, 'us-east-1'):
+                host = 's3.amazonaws.com'
+            else:
+                host = 's3.{0}.amazonaws.com'.format(region_name)
+        if self.addressing_style == 'virtual':
+            return scheme, self.bucket.name + '.' + host, ''
+        return scheme, host, '/' + self.bucket.name
+
+    def __repr__(self):
+        return "<{cls} bucket='{bucket!s}'>".format(
+            cls=self.__class__.__name__,
+            bucket=self.bucket.name
+        )
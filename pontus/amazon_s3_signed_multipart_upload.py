@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+import uuid
+from urllib.parse import urlencode
+
+from . import extension
+from ._compat import unicode_compatible
+from .move_strategies import MAX_PARTS, MIN_PART_SIZE
+
+#: The largest object Amazon S3 can store.
+MAX_OBJECT_SIZE = 5 * 1024 ** 4
+
+#: The part size used for files with at most `MAX_PARTS` parts of this size.
+DEFAULT_PART_SIZE = 8 * 1024 ** 2
+
+_MEGABYTE = 1024 ** 2
+
+
+@unicode_compatible
+class AmazonS3SignedMultipartUpload(object):
+    """A Flask utility for letting clients upload large files to Amazon S3
+    in parts with a `multipart upload`_.
+
+    The upload is initiated on the server, so the key, the MIME type, the
+    ACL and the tags of the file are fixed, and the client is given
+    presigned URLs for uploading each part with a PUT request and for
+    completing or aborting the upload. Parts can be uploaded in parallel and
+    a failed part retried on its own.
+
+    Presigned URLs do not limit the size of the uploaded parts, so validate
+    the size of the completed file, e.g. with
+    :class:`pontus.validators.FileSize`.
+
+    .. _multipart upload:
+        https://docs.aws.amazon.com/AmazonS3/latest/userguide/mpuoverview.html
+
+    If the application has an `AWS_UNVALIDATED_PREFIX` config, its value
+    will be added to the file key.
+
+    Example::
+
+        from pontus import AmazonS3SignedMultipartUpload
+
+        signed_upload = AmazonS3SignedMultipartUpload(
+            key_name=u'my/video.mp4',
+            mime_type=u'video/mp4',
+            content_length=1073741824,
+            bucket=bucket,
+        )
+
+        upload = signed_upload.create()
+        # {
+        #     'key': 'my/video.mp4',
+        #     'upload_id': 'generated-upload-id',
+        #     'part_size': 8388608,
+        #     'parts': [
+        #         {
+        #             'part_number': 1,
+        #             'url': 'presigned-upload-part-url',
+        #             'content_length': 8388608,
+        #         },
+        #         ...
+        #     ],
+        #     'complete_url': 'presigned-complete-url',
+        #     'abort_url': 'presigned-abort-url',
+        # }
+
+    The client PUTs the bytes of each part to its URL, collects the `ETag`
+    response headers, and POSTs a `CompleteMultipartUpload` XML document
+    listing the part numbers and ETags to `complete_url`.
+
+    :param key_name:
+        The key name of the file to be stored in Amazon S3.
+
+    :param mime_type:
+        The MIME type of the file to be stored in Amazon S3.
+
+    :param content_length:
+        The size of the file declared by the client, in bytes.
+
+    :param bucket:
+        The Boto S3 Bucket instance to be used. Defaults to the bucket of
+        :class:`pontus.Pontus`.
+
+    :param acl:
+        The ACL of the uploaded file, for example 'public-read' or 'private'.
+
+    :param expires_in:
+        The expiry time of the presigned URLs in seconds.
+
+    :param part_size:
+        The size of the parts in bytes. Defaults to 8 MB, increased for
+        large files so that the file fits in 10,000 parts.
+
+    :param max_content_length:
+        The maximum length of the file to be stored. Defaults to the
+        `MAX_CONTENT_LENGTH` config.
+
+    :param randomize:
+        Indicates if a randomized UUID prefix should be added to the file key.
+
+    :param tags:
+        A dictionary of object tags set on the uploaded file.
+    """
+    def __init__(
+        self,
+        key_name,
+        mime_type,
+        content_length,
+        bucket=None,
+        acl='public-read',
+        expires_in=3600,
+        part_size=None,
+        max_content_length=None,
+        randomize=False,
+        tags=None,
+    ):
+        config = extension.get_config()
+        max_content_length = (
+            max_content_length or
+            config.get('MAX_CONTENT_LENGTH') or
+            MAX_OBJECT_SIZE
+        )
+        if not 0 < content_length <= max_content_length:
+            raise ValueError(
+                u'Argument `content_length` must be between 1 and {0}.'
+                .format(max_content_length)
+            )
+        if part_size is not None and part_size < MIN_PART_SIZE:
+            raise ValueError(
+                u'Argument `part_size` must be at least {0}.'.format(
+                    MIN_PART_SIZE
+                )
+            )
+
+        if randomize:
+            key_name = u'%s/%s' % (uuid.uuid4(), key_name)
+
+        key_name = u'%s%s' % (
+            config.get('AWS_UNVALIDATED_PREFIX', ''),
+            key_name
+        )
+
+        self.key_name = key_name
+        self.mime_type = mime_type
+        self.content_length = content_length
+        self.bucket = extension.get_bucket(bucket)
+        self.acl = acl
+        self.expires_in = expires_in
+        self.max_content_length = max_content_length
+        self.randomize = randomize
+        self.tags = tags
+        self.part_size = self._get_part_size(part_size or DEFAULT_PART_SIZE)
+
+    @property
+    def part_count(self):
+        """The number of parts the file is uploaded in."""
+        return -(-self.content_length // self.part_size)
+
+    def create(self):
+        """
+        Initiates the multipart upload and signs the requests needed for
+        uploading the parts and completing or aborting the upload.
+
+        :return: a dictionary with the upload ID, the part size and the
+            presigned URLs
+        """
+        upload_id = self._create_multipart_upload()
+        return {
+            'key': self.key_name,
+            'upload_id': upload_id,
+            'part_size': self.part_size,
+            'parts': [
+                {
+                    'part_number': part_number,
+                    'url': self.get_part_url(upload_id, part_number),
+                    'content_length': self._get_part_content_length(
+                        part_number
+                    ),
+                }
+                for part_number in range(1, self.part_count + 1)
+            ],
+            'complete_url': self.get_complete_url(upload_id),
+            'abort_url': self.get_abort_url(upload_id),
+        }
+
+    def get_part_url(self, upload_id, part_number):
+        """
+        Returns a presigned URL for uploading a part with a PUT request,
+        e.g. for retrying a part after its URL has expired.
+        """
+        if not 1 <= part_number <= self.part_count:
+            raise ValueError(
+                u'Argument `part_number` must be between 1 and {0}.'.format(
+                    self.part_count
+                )
+            )
+        return self._generate_presigned_url('upload_part', 'PUT', {
+            'UploadId': upload_id,
+            'PartNumber': part_number,
+        })
+
+    def get_complete_url(self, upload_id):
+        """
+        Returns a presigned URL for completing the upload with a POST
+        request.
+        """
+        return self._generate_presigned_url(
+            'complete_multipart_upload',
+            'POST',
+            {'UploadId': upload_id}
+        )
+
+    def get_abort_url(self, upload_id):
+        """
+        Returns a presigned URL for aborting the upload with a DELETE
+        request.
+        """
+        return self._generate_presigned_url(
+            'abort_multipart_upload',
+            'DELETE',
+            {'UploadId': upload_id}
+        )
+
+    def _create_multipart_upload(self):
+        params = {
+            'Bucket': self.bucket.name,
+            'Key': self.key_name,
+            'ContentType': self.mime_type,
+            'ACL': self.acl,
+        }
+        if self.tags:
+            params['Tagging'] = urlencode(sorted(self.tags.items()))
+        response = self.bucket.meta.client.create_multipart_upload(**params)
+        return response['UploadId']
+
+    def _generate_presigned_url(self, operation_name, http_method, params):
+        params = dict(params, Bucket=self.bucket.name, Key=self.key_name)
+        return self.bucket.meta.client.generate_presigned_url(
+            operation_name,
+            Params=params,
+            ExpiresIn=self.expires_in,
+            HttpMethod=http_method
+        )
+
+    def _get_part_size(self, part_size):
+        min_part_size = -(-self.content_length // MAX_PARTS)
+        if part_size >= min_part_size:
+            return part_size
+        # Round up to whole megabytes.
+        return -(-min_part_size // _MEGABYTE) * _MEGABYTE
+
+    def _get_part_content_length(self, part_number):
+        start = (part_number - 1) * self.part_size
+        return min(self.part_size, self.content_length - start)
+
+    def __repr__(self):
+        return "<{cls} key_name='{key_name!s}'>".format(
+            cls=self.__class__.__name__,
+            key_name=self.key_name
+        )
+
+    def __str__(self):
+        return self.key_name
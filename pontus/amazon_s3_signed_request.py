@@ -3,17 +3,141 @@ import base64
 import binascii
 import hmac
 import json
+import threading
 import uuid
 from datetime import datetime, timedelta
 from hashlib import sha256
+from xml.sax.saxutils import escape
 
-from flask import current_app
-
+from . import extension, instrumentation
 from ._compat import force_bytes, force_text, unicode_compatible
+from .credentials import get_provider
+
+
+class SigningKeyCache(object):
+    """A thread-safe cache of AWS Signature Version 4 signing keys.
+
+    A signing key only depends on the secret access key, the date, the
+    region and the service, so it can be derived once and reused for every
+    signature made with the same values. Entries are keyed on all four, so
+    rotated credentials always get a freshly derived key. Whenever a key for
+    a new date is stored, the keys of earlier dates are evicted, so the
+    cache never holds more than a day's worth of keys.
+
+    :param max_size:
+        The maximum number of signing keys to keep. The oldest key is evicted
+        when the cache is full.
+    """
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._keys = {}
+
+    def get(self, secret_key, date_stamp, region_name, service_name, derive):
+        """
+        Returns the signing key for the given values, calling `derive` to
+        compute it if it is not cached yet.
+        """
+        cache_key = (secret_key, date_stamp, region_name, service_name)
+        signing_key = self._keys.get(cache_key)
+        if signing_key is not None:
+            return signing_key
+
+        signing_key = derive()
+        with self._lock:
+            if any(key[1] != date_stamp for key in self._keys):
+                self._keys = dict(
+                    (key, value) for key, value in self._keys.items()
+                    if key[1] >= date_stamp
+                )
+            while len(self._keys) >= self.max_size:
+                del self._keys[next(iter(self._keys))]
+            self._keys[cache_key] = signing_key
+        return signing_key
+
+    def clear(self):
+        """Removes all cached signing keys."""
+        with self._lock:
+            self._keys = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+
+#: The process-wide signing key cache used by :class:`BaseAmazonS3Signer`.
+signing_key_cache = SigningKeyCache()
+
+
+class BaseAmazonS3Signer(object):
+    """A base class for signing Amazon S3 requests with
+    `AWS Signature Version 4`_ and the credentials of :attr:`session`.
+    Signing keys are cached in :data:`signing_key_cache`, and credentials
+    are read from snapshots of :class:`pontus.credentials.CredentialProvider`.
+
+    .. _AWS Signature Version 4:
+        https://docs.aws.amazon.com/AmazonS3/latest/API/sig-v4-authenticating-requests.html
+    """
+
+    service_name = 's3'
+    salt = 'aws4_request'
+    algorithm = 'AWS4-HMAC-SHA256'
+
+    def _get_credentials(self):
+        return get_provider(self.session).get()
+
+    def _get_credential(self, date, credentials=None):
+        if credentials is None:
+            credentials = self._get_credentials()
+        return '/'.join([
+            credentials.access_key,
+            date.strftime('%Y%m%d'),
+            self.session.region_name,
+            self.service_name,
+            self.salt
+        ])
+
+    def _sign(self, key, msg):
+        return hmac.new(
+            key,
+            msg.encode('utf-8'),
+            sha256
+        ).digest()
+
+    def _get_signing_key(self, date, credentials=None):
+        if credentials is None:
+            credentials = self._get_credentials()
+        key = credentials.secret_key
+        dateStamp = date.strftime('%Y%m%d')
+        regionName = self.session.region_name
+        return signing_key_cache.get(
+            key,
+            dateStamp,
+            regionName,
+            self.service_name,
+            lambda: self._derive_signing_key(key, dateStamp, regionName)
+        )
+
+    def _derive_signing_key(self, key, dateStamp, regionName):
+        # Variable naming from the documentation
+        # https://docs.aws.amazon.com/general/latest/gr/signature-v4-examples.html
+        serviceName = self.service_name
+        salt = self.salt
+
+        kSecret = ('AWS4' + key).encode('utf-8')
+        kDate = self._sign(kSecret, dateStamp)
+        kRegion = self._sign(kDate, regionName)
+        kService = self._sign(kRegion, serviceName)
+        kSigning = self._sign(kService, salt)
+        return kSigning
+
+    def _get_signature(self, date, policy_document, signing_key=None):
+        if signing_key is None:
+            signing_key = self._get_signing_key(date)
+        return force_text(binascii.hexlify(self._sign(signing_key, policy_document)))
 
 
 @unicode_compatible
-class AmazonS3SignedRequest(object):
+class AmazonS3SignedRequest(BaseAmazonS3Signer):
     """A Flask utility for creating signatures for
     `POST requests to Amazon S3`_.
 
@@ -54,7 +178,12 @@ class AmazonS3SignedRequest(object):
         The MIME type of the file to be stored in Amazon S3.
 
     :param bucket:
-        The Boto Bucket instance to be used.
+        The Boto Bucket instance to be used. Defaults to the bucket of
+        :class:`pontus.Pontus`.
+
+    :param session:
+        The Boto Session instance to be used. Defaults to the session of
+        :class:`pontus.Pontus`.
 
     :param acl:
         The ACL of the uploaded file, for example 'public-read' or 'private'.
@@ -73,47 +202,59 @@ class AmazonS3SignedRequest(object):
 
     :param min_content_length:
         The minimum length of the file to be stored.
-    """
 
-    service_name = 's3'
-    salt = 'aws4_request'
-    algorithm = 'AWS4-HMAC-SHA256'
+    :param tags:
+        A dictionary of object tags set on the uploaded file, e.g.
+        ``{'pontus-validated': 'false'}`` for expiring unvalidated files
+        with a lifecycle rule. See
+        :class:`pontus.move_strategies.TagInPlace`.
+
+    :param config:
+        The configuration to read `AWS_UNVALIDATED_PREFIX` and
+        `MAX_CONTENT_LENGTH` from. Defaults to the config of the current
+        Flask application, or to the config read by :class:`pontus.Pontus`
+        if the extension is initialized.
+    """
 
     def __init__(
         self,
         key_name,
         mime_type,
-        bucket,
-        session,
+        bucket=None,
+        session=None,
         acl='public-read',
         expires_in=60,
         success_action_status='201',
         max_content_length=None,
         randomize=False,
         min_content_length=1,
+        tags=None,
+        config=None,
     ):
+        if config is None:
+            config = extension.get_config()
         if randomize:
             key_name = u'%s/%s' % (uuid.uuid4(), key_name)
 
-        key_name = u'%s%s' % (
-            current_app.config.get('AWS_UNVALIDATED_PREFIX', ''),
+        self.expires_in = expires_in
+        self.key_name = u'%s%s' % (
+            config.get('AWS_UNVALIDATED_PREFIX', ''),
             key_name
         )
-
-        self.expires_in = expires_in
-        self.key_name = key_name
         self.acl = acl
         self.max_content_length = (
             max_content_length or
-            current_app.config.get('MAX_CONTENT_LENGTH') or
+            config.get('MAX_CONTENT_LENGTH') or
             20971520
         )
         self.min_content_length = min_content_length
         self.mime_type = mime_type
         self.randomize = randomize
-        self.bucket = bucket
-        self.session = session
+        self.bucket = extension.get_bucket(bucket)
+        self.session = extension.get_session(session)
         self.success_action_status = success_action_status
+        self.tags = tags
+        self.tagging = self._get_tagging(tags) if tags else None
 
     @property
     def form_fields(self):
@@ -123,37 +264,155 @@ class AmazonS3SignedRequest(object):
 
         :return: a dictionary containing the needed field values
         """
-        date = datetime.utcnow()
-        policy = self._get_policy_document(date)
-        return {
+        with instrumentation.measure(
+            instrumentation.SIGN,
+            self.__class__.__name__
+        ):
+            date = datetime.utcnow()
+            credentials = self._get_credentials()
+            return self._get_form_fields(
+                date,
+                self._get_credential(date, credentials),
+                self._get_signing_key(date, credentials),
+                date.strftime('%Y%m%dT%H%M%SZ')
+            )
+
+    @classmethod
+    def form_fields_for_many(cls, uploads, bucket=None, session=None,
+                             config=None, **kwargs):
+        """
+        Generates form fields for signed POST requests of many files at once.
+
+        The timestamp, the credential and the signing key are computed once
+        and shared by all files, so only the policy document and its
+        signature are computed per file.
+
+        Example::
+
+            AmazonS3SignedRequest.form_fields_for_many(
+                [
+                    (u'my/file.jpg', u'image/jpeg'),
+                    (u'my/file.pdf', u'application/pdf', {'acl': 'private'}),
+                ],
+                bucket=bucket,
+                session=session,
+                randomize=True,
+            )
+
+        :param uploads:
+            An iterable of ``(key_name, mime_type)`` or
+            ``(key_name, mime_type, options)`` tuples, where `options` is a
+            dictionary of keyword arguments of :class:`AmazonS3SignedRequest`
+            for that file. The `bucket`, `session` and `config` are shared by
+            all files and cannot be given per file.
+
+        :param bucket:
+            The Boto Bucket instance to be used. Defaults to the bucket of
+            :class:`pontus.Pontus`.
+
+        :param session:
+            The Boto Session instance to be used. Defaults to the session of
+            :class:`pontus.Pontus`.
+
+        :param config:
+            See :class:`AmazonS3SignedRequest`.
+
+        :param kwargs:
+            Keyword arguments of :class:`AmazonS3SignedRequest` shared by
+            all files. They are overridden by the per-file `options`.
+
+        :raises ValueError: if the `options` of a file contain `bucket`,
+            `session` or `config`.
+
+        :return: a list of form field dictionaries in the order of `uploads`
+        """
+        # The config, the bucket and the session are resolved once for all
+        # files.
+        shared = {
+            'bucket': extension.get_bucket(bucket),
+            'session': extension.get_session(session),
+            'config': config if config is not None else extension.get_config(),
+        }
+        signed_requests = []
+        for upload in uploads:
+            key_name, mime_type = upload[:2]
+            options = upload[2] if len(upload) > 2 else {}
+            for name in sorted(shared):
+                if name in options:
+                    raise ValueError(
+                        u'Argument `{name!s}` cannot be given per file in '
+                        u'`uploads`.'.format(name=name)
+                    )
+            signed_requests.append(cls(
+                key_name,
+                mime_type,
+                **dict(kwargs, **dict(options, **shared))
+            ))
+        if not signed_requests:
+            return []
+
+        with instrumentation.measure(instrumentation.SIGN, cls.__name__):
+            date = datetime.utcnow()
+            credentials = signed_requests[0]._get_credentials()
+            credential = signed_requests[0]._get_credential(date, credentials)
+            signing_key = signed_requests[0]._get_signing_key(
+                date,
+                credentials
+            )
+            amz_date = date.strftime('%Y%m%dT%H%M%SZ')
+            return [
+                signed_request._get_form_fields(
+                    date,
+                    credential,
+                    signing_key,
+                    amz_date
+                )
+                for signed_request in signed_requests
+            ]
+
+    def _get_form_fields(self, date, credential, signing_key, amz_date):
+        policy = self._get_policy_document(date, credential, amz_date)
+        form_fields = {
             'acl': self.acl,
             'Content-Type': self.mime_type,
             'key': self.key_name,
             'policy': policy,
             'x-amz-algorithm': self.algorithm,
-            'x-amz-credential': self._get_credential(date),
-            'x-amz-date': date.strftime('%Y%m%dT%H%M%SZ'),
+            'x-amz-credential': credential,
+            'x-amz-date': amz_date,
             'success_action_status': self.success_action_status,
-            'x-amz-signature': self._get_signature(date, policy),
+            'x-amz-signature': self._get_signature(date, policy, signing_key),
         }
+        if self.tagging:
+            form_fields['tagging'] = self.tagging
+        return form_fields
+
+    def _get_tagging(self, tags):
+        return u'<Tagging><TagSet>{tags!s}</TagSet></Tagging>'.format(
+            tags=u''.join(
+                u'<Tag><Key>{key!s}</Key><Value>{value!s}</Value></Tag>'
+                .format(key=escape(key), value=escape(value))
+                for key, value in sorted(tags.items())
+            )
+        )
 
-    def _get_credential(self, date):
-        return '/'.join([
-            self.session.get_credentials().access_key,
-            date.strftime('%Y%m%d'),
-            self.session.region_name,
-            self.service_name,
-            self.salt
-        ])
+    def _get_policy_document(self, date, credential=None, amz_date=None):
+        expiration = date + timedelta(seconds=self.expires_in)
+        data = self._get_policy_data(
+            expiration.isoformat() + 'Z',
+            credential or self._get_credential(date),
+            amz_date or date.strftime('%Y%m%dT%H%M%SZ')
+        )
+        data = json.dumps(data)
+        return force_text(base64.b64encode(force_bytes(data)))
 
-    def _get_policy_document(self, date):
-        expiration = datetime.utcnow() + timedelta(seconds=self.expires_in)
+    def _get_policy_data(self, expiration, credential, amz_date):
         data = {
-            'expiration': expiration.isoformat() + 'Z',
+            'expiration': expiration,
             'conditions': [
                 {'x-amz-algorithm': self.algorithm},
-                {'x-amz-credential': self._get_credential(date)},
-                {'x-amz-date': date.strftime('%Y%m%dT%H%M%SZ')},
+                {'x-amz-credential': credential},
+                {'x-amz-date': amz_date},
                 {'bucket': self.bucket.name},
                 {'key': self.key_name},
                 {'acl': self.acl},
@@ -162,35 +421,9 @@ class AmazonS3SignedRequest(object):
                 {'success_action_status': self.success_action_status}
             ]
         }
-        data = json.dumps(data)
-        return force_text(base64.b64encode(force_bytes(data)))
-
-    def _sign(self, key, msg):
-        return hmac.new(
-            key,
-            msg.encode('utf-8'),
-            sha256
-        ).digest()
-
-    def _get_signing_key(self, date):
-        # Variable naming from the documentation
-        # https://docs.aws.amazon.com/general/latest/gr/signature-v4-examples.html
-        key = self.session.get_credentials().secret_key
-        dateStamp = date.strftime('%Y%m%d')
-        regionName = self.session.region_name
-        serviceName = self.service_name
-        salt = self.salt
-
-        kSecret = ('AWS4' + key).encode('utf-8')
-        kDate = self._sign(kSecret, dateStamp)
-        kRegion = self._sign(kDate, regionName)
-        kService = self._sign(kRegion, serviceName)
-        kSigning = self._sign(kService, salt)
-        return kSigning
-
-    def _get_signature(self, date, policy_document):
-        signing_key = self._get_signing_key(date)
-        return force_text(binascii.hexlify(self._sign(signing_key, policy_document)))
+        if self.tagging:
+            data['conditions'].append({'tagging': self.tagging})
+        return data
 
     def __repr__(self):
         return "<{cls} key_name='{key_name!s}'>".format(
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+import base64
+import json
+import re
+import uuid
+from datetime import datetime, timedelta
+
+from . import extension, instrumentation
+from ._compat import force_bytes, force_text
+from .amazon_s3_signed_request import AmazonS3SignedRequest
+
+_PLACEHOLDER = u'\x00{0}\x00'
+_PLACEHOLDER_RE = re.compile(r'\\u0000(\w+)\\u0000')
+
+
+class AmazonS3SignedRequestFactory(object):
+    """Creates signed POST request form fields for many files sharing the
+    same bucket, session and upload options.
+
+    The policy document is serialized once when the factory is created,
+    with placeholders for the values that differ between requests. Signing
+    a file then only fills in its key, MIME type, date and expiration
+    before encoding and signing the policy. The form fields are identical to
+    those of :class:`AmazonS3SignedRequest` created with the same arguments.
+
+    Example::
+
+        from pontus import AmazonS3SignedRequestFactory
+
+        factory = AmazonS3SignedRequestFactory(
+            bucket=bucket,
+            session=session,
+            acl='private',
+            max_content_length=2097152,
+        )
+
+        form_fields = factory.form_fields(u'my/file.jpg', u'image/jpeg')
+
+    :param bucket:
+        The Boto Bucket instance to be used. Defaults to the bucket of
+        :class:`pontus.Pontus`.
+
+    :param session:
+        The Boto Session instance to be used. Defaults to the session of
+        :class:`pontus.Pontus`.
+
+    :param randomize:
+        Indicates if a randomized UUID prefix should be added to the file
+        keys.
+
+    :param kwargs:
+        Other keyword arguments of :class:`AmazonS3SignedRequest`, e.g.
+        `acl`, `expires_in` or `max_content_length`. The
+        `AWS_UNVALIDATED_PREFIX` and `MAX_CONTENT_LENGTH` configs are read
+        once, when the factory is created.
+    """
+    def __init__(self, bucket=None, session=None, randomize=False, **kwargs):
+        self.bucket = extension.get_bucket(bucket)
+        self.session = extension.get_session(session)
+        self.randomize = randomize
+        self.key_prefix = extension.get_config().get(
+            'AWS_UNVALIDATED_PREFIX',
+            ''
+        )
+        self._signer = AmazonS3SignedRequest(
+            key_name=_PLACEHOLDER.format('key'),
+            mime_type=_PLACEHOLDER.format('mime_type'),
+            bucket=self.bucket,
+            session=self.session,
+            **kwargs
+        )
+        self._segments, self._placeholders = self._compile_policy()
+        self._static_fields = {
+            'acl': self._signer.acl,
+            'x-amz-algorithm': self._signer.algorithm,
+            'success_action_status': self._signer.success_action_status,
+        }
+        if self._signer.tagging:
+            self._static_fields['tagging'] = self._signer.tagging
+
+    def form_fields(self, key_name, mime_type):
+        """
+        Generates form fields needed for creating a signed POST request to
+        Amazon S3.
+
+        :param key_name: The key name of the file to be stored in Amazon S3.
+        :param mime_type: The MIME type of the file to be stored.
+
+        :return: a dictionary containing the needed field values
+        """
+        with instrumentation.measure(
+            instrumentation.SIGN,
+            self.__class__.__name__
+        ):
+            date = datetime.utcnow()
+            credentials = self._signer._get_credentials()
+            return self._get_form_fields(
+                key_name,
+                mime_type,
+                date,
+                self._signer._get_credential(date, credentials),
+                self._signer._get_signing_key(date, credentials)
+            )
+
+    def form_fields_for_many(self, uploads):
+        """
+        Generates form fields for signed POST requests of many files, all
+        signed with the same timestamp.
+
+        :param uploads: An iterable of ``(key_name, mime_type)`` tuples.
+
+        :return: a list of form field dictionaries in the order of `uploads`
+        """
+        with instrumentation.measure(
+            instrumentation.SIGN,
+            self.__class__.__name__
+        ):
+            date = datetime.utcnow()
+            credentials = self._signer._get_credentials()
+            credential = self._signer._get_credential(date, credentials)
+            signing_key = self._signer._get_signing_key(date, credentials)
+            return [
+                self._get_form_fields(
+                    key_name,
+                    mime_type,
+                    date,
+                    credential,
+                    signing_key
+                )
+                for key_name, mime_type in uploads
+            ]
+
+    def _get_form_fields(self, key_name, mime_type, date, credential,
+                         signing_key):
+        if self.randomize:
+            key_name = u'%s/%s' % (uuid.uuid4(), key_name)
+        amz_date = date.strftime('%Y%m%dT%H%M%SZ')
+        expiration = date + timedelta(seconds=self._signer.expires_in)
+        policy = self._get_policy_document({
+            'expiration': expiration.isoformat() + 'Z',
+            'credential': credential,
+            'amz_date': amz_date,
+            'key': key_name,
+            'mime_type': mime_type,
+        })
+        form_fields = dict(self._static_fields)
+        form_fields.update({
+            'Content-Type': mime_type,
+            'key': u'%s%s' % (self.key_prefix, key_name),
+            'policy': policy,
+            'x-amz-credential': credential,
+            'x-amz-date': amz_date,
+            'x-amz-signature': self._signer._get_signature(
+                date,
+                policy,
+                signing_key
+            ),
+        })
+        return form_fields
+
+    def _compile_policy(self):
+        data = self._signer._get_policy_data(
+            _PLACEHOLDER.format('expiration'),
+            _PLACEHOLDER.format('credential'),
+            _PLACEHOLDER.format('amz_date')
+        )
+        # The key placeholder follows the unvalidated prefix in the same
+        # string, so values are inserted as the contents of JSON strings.
+        parts = _PLACEHOLDER_RE.split(json.dumps(data))
+        return parts[0::2], parts[1::2]
+
+    def _get_policy_document(self, values):
+        chunks = [self._segments[0]]
+        for name, segment in zip(self._placeholders, self._segments[1:]):
+            chunks.append(json.dumps(values[name])[1:-1])
+            chunks.append(segment)
+        data = u''.join(chunks)
+        return force_text(base64.b64encode(force_bytes(data)))
+
+    def __repr__(self):
+        return "<{cls} bucket='{bucket!s}'>".format(
+            cls=self.__class__.__name__,
+            bucket=self.bucket.name
+        )
@@ -0,0 +1,464 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import functools
+
+import botocore.exceptions
+
+from . import extension, instrumentation, magic_pool, signatures
+from .amazon_s3_file_validator import AmazonS3FileValidator, _is_not_found
+from .exceptions import FileNotFoundError, ValidationError
+from .validation_context import GENERIC_MIME_TYPES, ValidationContext
+from .validators import COST_METADATA, get_cost
+
+
+def _is_coroutine_validator(validator):
+    return (
+        asyncio.iscoroutinefunction(validator) or
+        asyncio.iscoroutinefunction(getattr(validator, '__call__', None))
+    )
+
+
+class AsyncValidationContext(object):
+    """An awaitable view of a :class:`ValidationContext` passed to coroutine
+    validators that use the context.
+
+    :param context: The wrapped :class:`ValidationContext`.
+
+    :param run: A coroutine function running a blocking call off the event
+        loop.
+    """
+    def __init__(self, context, run):
+        self.context = context
+        self.obj = context.obj
+        self._run = run
+
+    async def read(self, size=None):
+        """See :meth:`ValidationContext.read`."""
+        return await self._run(self.context.read, size)
+
+    async def mime_type(
+        self,
+        sniff_size=None,
+        max_sniff_size=None,
+        fast_sniff=True
+    ):
+        """See :meth:`ValidationContext.mime_type`."""
+        return await self._run(
+            self.context.mime_type,
+            sniff_size,
+            max_sniff_size,
+            fast_sniff
+        )
+
+    def __repr__(self):
+        return '<{cls} key={key!r}>'.format(
+            cls=self.__class__.__name__,
+            key=self.obj.key
+        )
+
+
+class AioValidationContext(object):
+    """The shared state of a validation made with an aiobotocore client,
+    passed to coroutine validators that use the context.
+
+    Like :class:`ValidationContext` the file body, or a prefix of it, is
+    fetched only when a validator first asks for it, but with
+    non-blocking requests made with the aiobotocore client.
+
+    :param obj: Boto S3 Object instance being validated.
+    :param client: The aiobotocore S3 client.
+    :param fast_sniff: See :class:`ValidationContext`.
+    :param executor:
+        The :class:`concurrent.futures.Executor` libmagic is run in.
+    """
+    def __init__(self, obj, client, fast_sniff=True, executor=None):
+        self.obj = obj
+        self.client = client
+        self.fast_sniff = fast_sniff
+        self.executor = executor
+        self._lock = asyncio.Lock()
+        self._data = b''
+        self._complete = False
+        self._mime_types = {}
+
+    async def read(self, size=None):
+        """See :meth:`ValidationContext.read`."""
+        async with self._lock:
+            if self._complete:
+                return self._data if size is None else self._data[:size]
+
+            if size is None:
+                self._data += await self._read_range(len(self._data), '')
+                self._complete = True
+                return self._data
+
+            if len(self._data) < size:
+                self._data += await self._read_range(
+                    len(self._data),
+                    size - 1
+                )
+                if len(self._data) < size:
+                    self._complete = True
+            return self._data[:size]
+
+    async def mime_type(
+        self,
+        sniff_size=None,
+        max_sniff_size=None,
+        fast_sniff=True
+    ):
+        """See :meth:`ValidationContext.mime_type`."""
+        fast_sniff = self.fast_sniff and fast_sniff
+        if not sniff_size:
+            return await self._sniff(await self.read(), fast_sniff)
+
+        size = sniff_size
+        if max_sniff_size:
+            size = min(size, max_sniff_size)
+        while True:
+            buf = await self.read(size)
+            file_mime_type = await self._sniff(buf, fast_sniff)
+            if (
+                file_mime_type not in GENERIC_MIME_TYPES or
+                len(buf) < size or
+                (max_sniff_size and size >= max_sniff_size)
+            ):
+                return file_mime_type
+            size *= 2
+            if max_sniff_size:
+                size = min(size, max_sniff_size)
+
+    async def _sniff(self, buf, fast_sniff):
+        key = (len(buf), fast_sniff)
+        if key not in self._mime_types:
+            mime_type = signatures.sniff(buf) if fast_sniff else None
+            if mime_type is None:
+                loop = asyncio.get_running_loop()
+                mime_type = await loop.run_in_executor(
+                    self.executor,
+                    magic_pool.get_pool().from_buffer,
+                    buf
+                )
+            self._mime_types[key] = mime_type
+        return self._mime_types[key]
+
+    async def _read_range(self, start, end):
+        kwargs = {'Bucket': self.obj.bucket_name, 'Key': self.obj.key}
+        if start or end != '':
+            kwargs['Range'] = 'bytes={start}-{end}'.format(
+                start=start,
+                end=end
+            )
+        try:
+            response = await self.client.get_object(**kwargs)
+        except botocore.exceptions.ClientError as e:
+            if e.response['Error']['Code'] == 'InvalidRange':
+                return b''
+            raise e
+        async with response['Body'] as body:
+            return await body.read()
+
+    def __repr__(self):
+        return '<{cls} key={key!r}>'.format(
+            cls=self.__class__.__name__,
+            key=self.obj.key
+        )
+
+
+class AsyncAmazonS3FileValidator(object):
+    """An asyncio counterpart of :class:`AmazonS3FileValidator`.
+
+    Validators can be plain callables or coroutine functions, which are
+    awaited. All validators run concurrently.
+
+    Given an aiobotocore S3 `client`, the Amazon S3 requests made by the
+    validator itself are non-blocking: the file is loaded, read, moved and
+    deleted with the client, and the MIME type validators, the move
+    strategies of :mod:`pontus.move_strategies` and coroutine validators
+    using the context (which get an :class:`AioValidationContext`) do not
+    block a thread on I/O. Plain validators that only read the file
+    metadata (see :func:`pontus.validators.get_cost`) are called directly,
+    and other plain validators, a `deleter` and custom move strategies
+    without :meth:`move_async` still run with Boto in the executor.
+
+    Without a `client` every Boto request is run in the executor, which
+    keeps the event loop free but holds an executor thread for each
+    request. Plain validators share one :class:`ValidationContext` and
+    coroutine validators using the context get an
+    :class:`AsyncValidationContext`.
+
+    Unlike :class:`AmazonS3FileValidator` the file is not loaded when the
+    validator is created, so :class:`FileNotFoundError` is raised by
+    :meth:`validate` instead.
+
+    Example::
+
+        from pontus import AsyncAmazonS3FileValidator
+        from pontus.exceptions import FileNotFoundError
+        from pontus.validators import MimeType
+
+        async def name_starts_with_images(obj):
+            if not obj.key.startswith('images/'):
+                raise ValidationError(u'Invalid name.')
+
+        validator = AsyncAmazonS3FileValidator(
+            key_name='images/my-image.jpg',
+            bucket=bucket,
+            validators=[name_starts_with_images, MimeType('image/jpeg')]
+        )
+
+        try:
+            if await validator.validate():
+                pass
+            else:
+                print(validator.errors)
+        except FileNotFoundError:
+            pass
+
+    With an aiobotocore client::
+
+        from aiobotocore.session import get_session
+
+        async with get_session().create_client('s3') as client:
+            validator = AsyncAmazonS3FileValidator(
+                key_name='images/my-image.jpg',
+                bucket=bucket,
+                validators=[MimeType('image/jpeg')],
+                client=client
+            )
+            await validator.validate()
+
+    :param client:
+        An aiobotocore S3 client, e.g. created with
+        ``aiobotocore.session.get_session().create_client('s3')``. It must
+        have access to `bucket`. Requires the `async` extra
+        (``pip install pontus[async]``).
+
+    :param executor:
+        The :class:`concurrent.futures.Executor` blocking calls are run in.
+        Defaults to the default executor of the event loop.
+
+    :param kwargs:
+        Other keyword arguments passed to :class:`AmazonS3FileValidator`,
+        e.g. `new_file_prefix`, `move_strategy` or `cache`. Its scheduling
+        options `streaming` and `fail_fast` do not apply, as all validators
+        are run concurrently. A `cache` is read and written in the
+        executor, and its results are shared with
+        :class:`AmazonS3FileValidator` validations that use neither
+        option.
+
+    See :class:`AmazonS3FileValidator` for the other parameters.
+    """
+    def __init__(
+        self,
+        key_name,
+        bucket=None,
+        validators=[],
+        config=None,
+        client=None,
+        executor=None,
+        **kwargs
+    ):
+        self.errors = []
+        self.key_name = key_name
+        self.bucket = extension.get_bucket(bucket)
+        self.validators = validators
+        self.config = config
+        self.client = client
+        self.executor = executor
+        self.kwargs = kwargs
+        self.validator = None
+
+    @property
+    def obj(self):
+        """The Boto S3 Object, available after :meth:`validate` is called."""
+        return self.validator.obj if self.validator else None
+
+    async def validate(self):
+        """
+        Validates the given Amazon S3 file with :attr:`validators`. See
+        :meth:`AmazonS3FileValidator.validate`.
+
+        :raises FileNotFoundError: if the file does not exist.
+
+        :return: a boolean indicating if the file vas valid.
+        """
+        try:
+            with self._measure(instrumentation.VALIDATE):
+                await self._validate()
+        except botocore.exceptions.ClientError as e:
+            if (
+                self.validator is not None and
+                self.validator.lazy_load and
+                _is_not_found(e)
+            ):
+                raise FileNotFoundError(key=self.validator.obj.key)
+            raise e
+        return not self.errors
+
+    async def _validate(self):
+        config = self.config
+        if config is None:
+            config = extension.get_config()
+        if self.client is None:
+            self.validator = await self._run(
+                AmazonS3FileValidator,
+                key_name=self.key_name,
+                bucket=self.bucket,
+                config=config,
+                **self.kwargs
+            )
+        else:
+            self.validator = AmazonS3FileValidator(
+                key_name=self.key_name,
+                bucket=self.bucket,
+                config=config,
+                **dict(self.kwargs, lazy_load=True)
+            )
+            await self._load()
+
+        cache_key = await self._run(
+            self.validator._get_cache_key,
+            streaming=False,
+            fail_fast=False
+        )
+        if cache_key is None:
+            self.errors.extend(await self._run_validators())
+        else:
+            cache = self.validator.cache
+            errors = await self._run(cache.get, cache_key)
+            if errors is None:
+                errors = await self._run_validators()
+                await self._run(cache.set, cache_key, errors)
+            self.errors.extend(errors)
+
+        self.validator.errors = self.errors
+        if self.client is None:
+            if self.validator.obj.meta.data is None:
+                await self._run(self.validator._load)
+            await self._run(self.validator._finish)
+        else:
+            await self._finish()
+
+    async def _run_validators(self):
+        context = ValidationContext(
+            self.validator.obj,
+            fast_sniff=self.validator.fast_sniff
+        )
+        if self.client is None:
+            async_context = AsyncValidationContext(context, self._run)
+        else:
+            async_context = AioValidationContext(
+                self.validator.obj,
+                self.client,
+                fast_sniff=self.validator.fast_sniff,
+                executor=self.executor
+            )
+        results = await asyncio.gather(*[
+            self._call_validator(validator, context, async_context)
+            for validator in self.validators
+        ], return_exceptions=True)
+        errors = []
+        for result in results:
+            if isinstance(result, ValidationError):
+                errors.append(result.error)
+            elif isinstance(result, BaseException):
+                raise result
+        return errors
+
+    async def _call_validator(self, validator, context, async_context):
+        uses_context = getattr(validator, 'uses_context', False)
+        if _is_coroutine_validator(validator):
+            with self._measure(
+                instrumentation.VALIDATOR,
+                instrumentation.get_name(validator)
+            ):
+                if uses_context:
+                    await validator(context.obj, context=async_context)
+                else:
+                    await validator(context.obj)
+        elif self.client is not None and hasattr(validator, 'validate_async'):
+            with self._measure(
+                instrumentation.VALIDATOR,
+                instrumentation.get_name(validator)
+            ):
+                await validator.validate_async(context.obj, async_context)
+        elif self.client is not None and get_cost(validator) == COST_METADATA:
+            # The metadata is already loaded, so no requests are made.
+            self.validator._call_validator(validator, context)
+        else:
+            await self._run(
+                self.validator._call_validator,
+                validator,
+                context
+            )
+
+    async def _load(self):
+        obj = self.validator.obj
+        try:
+            with self._measure(instrumentation.LOAD):
+                obj.meta.data = await self.client.head_object(
+                    Bucket=obj.bucket_name,
+                    Key=obj.key
+                )
+        except botocore.exceptions.ClientError as e:
+            if _is_not_found(e):
+                raise FileNotFoundError(key=obj.key)
+            raise e
+
+    async def _finish(self):
+        validator = self.validator
+        if validator._should_move():
+            await self._move_to_validated()
+        elif validator._should_delete_rejected():
+            await self._delete(validator.obj)
+
+    async def _move_to_validated(self):
+        validator = self.validator
+        strategy = validator.move_strategy
+        with self._measure(
+            instrumentation.MOVE,
+            strategy.__class__.__name__
+        ):
+            new_obj = await strategy.move_async(
+                validator.obj,
+                validator._get_validated_key_name(),
+                validator.new_file_acl,
+                self.client
+            )
+        if validator.delete_unvalidated_file and not strategy.in_place:
+            await self._delete(validator.obj)
+        validator.obj = new_obj
+
+    async def _delete(self, obj):
+        if self.validator.deleter is not None:
+            # Adding a key may send a full batch with Boto.
+            await self._run(self.validator.deleter.add, obj.key)
+        else:
+            with self._measure(instrumentation.DELETE):
+                await self.client.delete_object(
+                    Bucket=obj.bucket_name,
+                    Key=obj.key
+                )
+
+    def _measure(self, operation, name=None):
+        return instrumentation.measure(
+            operation,
+            name or self.__class__.__name__,
+            client=self.client or self.bucket.meta.client
+        )
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # The executor threads do not inherit the context of the task, so
+        # the active measurements are passed on explicitly.
+        return await loop.run_in_executor(
+            self.executor,
+            instrumentation.propagate(functools.partial(func, *args, **kwargs))
+        )
+
+    def __repr__(self):
+        return '<{cls} key={key!r}>'.format(
+            cls=self.__class__.__name__,
+            key=self.obj.key if self.obj else self.key_name
+        )
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+    pontus.credentials
+    ~~~~~~~~~~~~~~~~~~
+
+    Frozen snapshots of the credentials of Boto sessions for signing.
+"""
+import threading
+import time
+import weakref
+
+#: Seconds before expiry at which a snapshot is refreshed in the
+#: background. Matches the advisory refresh timeout of botocore, so the
+#: background refresh is the one that makes botocore fetch new credentials.
+DEFAULT_REFRESH_MARGIN = 15 * 60
+
+#: Seconds before expiry after which a snapshot is no longer used and
+#: signing waits for new credentials.
+DEFAULT_EXPIRY_MARGIN = 60
+
+#: Seconds between background refreshes of a snapshot that is still close
+#: to expiry, e.g. because the credential source has not rotated yet.
+RETRY_INTERVAL = 30
+
+
+class CredentialProvider(object):
+    """A thread-safe cache of frozen snapshots of the credentials of a Boto
+    session.
+
+    Reading the access key, the secret key and the token of refreshable
+    credentials (e.g. instance profiles or assumed roles) one at a time may
+    return values of different credentials if they are rotated in between,
+    and each read checks whether a refresh is needed. A snapshot holds all
+    three from a single read and is reused until shortly before the
+    credentials expire. Within `refresh_margin` seconds of the expiry the
+    snapshot is refreshed in a background thread while the old one is still
+    returned, so signing only waits for a refresh if the credentials are
+    within `expiry_margin` seconds of expiring or have never been read.
+
+    :param session:
+        The Boto Session instance whose credentials are cached.
+
+    :param refresh_margin:
+        Seconds before expiry at which the snapshot is refreshed in the
+        background.
+
+    :param expiry_margin:
+        Seconds before expiry at which the snapshot is refreshed before
+        returning.
+    """
+    def __init__(
+        self,
+        session,
+        refresh_margin=DEFAULT_REFRESH_MARGIN,
+        expiry_margin=DEFAULT_EXPIRY_MARGIN,
+    ):
+        if expiry_margin > refresh_margin:
+            raise ValueError(
+                u'Argument `expiry_margin` must not be greater than '
+                u'`refresh_margin`.'
+            )
+        self.session = session
+        self.refresh_margin = refresh_margin
+        self.expiry_margin = expiry_margin
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._expires_at = None
+        self._next_refresh_at = None
+
+    def get(self):
+        """
+        Returns a snapshot of the credentials, with `access_key`,
+        `secret_key` and `token` attributes.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            expires_at = self._expires_at
+            if expires_at is None:
+                return snapshot
+            now = time.time()
+            if now < expires_at - self.expiry_margin:
+                if now >= self._next_refresh_at:
+                    self._refresh_in_background()
+                return snapshot
+        with self._lock:
+            if self._snapshot is snapshot:
+                self._refresh()
+            return self._snapshot
+
+    def clear(self):
+        """Discards the snapshot, so the next one is read from the session."""
+        with self._lock:
+            self._snapshot = None
+
+    def _refresh(self):
+        credentials = self.session.get_credentials()
+        snapshot = credentials.get_frozen_credentials()
+        # Only refreshable credentials expire. botocore has no public API
+        # for the expiry time.
+        expiry_time = getattr(credentials, '_expiry_time', None)
+        expires_at = expiry_time.timestamp() if expiry_time else None
+        self._expires_at = expires_at
+        if expires_at is not None:
+            self._next_refresh_at = max(
+                expires_at - self.refresh_margin,
+                time.time() + RETRY_INTERVAL
+            )
+        self._snapshot = snapshot
+
+    def _refresh_in_background(self):
+        # A refresh already in progress will do.
+        if not self._lock.acquire(False):
+            return
+        self._next_refresh_at = time.time() + RETRY_INTERVAL
+
+        def refresh():
+            try:
+                self._refresh()
+            finally:
+                self._lock.release()
+
+        thread = threading.Thread(target=refresh)
+        thread.daemon = True
+        try:
+            thread.start()
+        except Exception:
+            self._lock.release()
+            raise
+
+    def __repr__(self):
+        return '<{cls} session={session!r}>'.format(
+            cls=self.__class__.__name__,
+            session=self.session
+        )
+
+
+_providers = weakref.WeakKeyDictionary()
+_providers_lock = threading.Lock()
+
+
+def get_provider(session):
+    """
+    Returns the :class:`CredentialProvider` shared by everything signing
+    with `session`.
+    """
+    provider = _providers.get(session)
+    if provider is None:
+        with _providers_lock:
+            provider = _providers.get(session)
+            if provider is None:
+                provider = _providers[session] = CredentialProvider(session)
+    return provider
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+from flask import current_app, has_app_context
+
+#: The configs read by :class:`Pontus` when it is initialized.
+CONFIG_KEYS = ('AWS_UNVALIDATED_PREFIX', 'MAX_CONTENT_LENGTH')
+
+
+class Pontus(object):
+    """A Flask extension holding an application's Amazon S3 client and
+    pontus configuration.
+
+    The configuration is read once, when the extension is initialized, and
+    a single thread-safe low-level S3 client with its own connection pool
+    is shared by the whole application. :class:`AmazonS3SignedRequest`,
+    :class:`AmazonS3FileValidator` and the other pontus classes use them
+    when their `bucket`, `session` or `config` arguments are omitted within
+    the application context.
+
+    The following configs are read:
+
+    - `PONTUS_BUCKET`: The name of the default bucket.
+    - `PONTUS_MAX_POOL_CONNECTIONS`: The size of the connection pool of the
+      client. Defaults to 50.
+    - `PONTUS_TCP_KEEPALIVE`: Whether to enable TCP keep-alive on the
+      connections. Defaults to `True`.
+    - `AWS_ACCESS_KEY_ID`, `AWS_SECRET_ACCESS_KEY` and `AWS_REGION`: The
+      credentials and region of the session, if no `session` is given.
+      Defaults to the credential chain of boto3.
+    - `AWS_UNVALIDATED_PREFIX` and `MAX_CONTENT_LENGTH`, as used by the
+      pontus classes.
+
+    Example::
+
+        from flask import Flask
+        from pontus import AmazonS3FileValidator, Pontus
+        from pontus.validators import MimeType
+
+        app = Flask(__name__)
+        app.config['PONTUS_BUCKET'] = 'testbucket'
+        pontus = Pontus(app)
+
+        with app.app_context():
+            validator = AmazonS3FileValidator(
+                key_name='images/my-image.jpg',
+                validators=[MimeType('image/jpeg')]
+            )
+
+    :param app:
+        The Flask application. Use :meth:`init_app` to initialize the
+        extension later.
+
+    :param session:
+        The Boto Session instance the client is created with.
+    """
+    def __init__(self, app=None, session=None):
+        self.session = session
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Initializes the extension for the given application."""
+        app.extensions['pontus'] = PontusState(app.config, self.session)
+
+
+class PontusState(object):
+    """The per-application state of :class:`Pontus`.
+
+    :param config: The configuration of the application.
+    :param session: The Boto Session instance, or `None` to create one.
+    """
+    def __init__(self, config, session=None):
+        import boto3
+        from botocore.config import Config
+
+        if session is None:
+            session = boto3.session.Session(
+                aws_access_key_id=config.get('AWS_ACCESS_KEY_ID'),
+                aws_secret_access_key=config.get('AWS_SECRET_ACCESS_KEY'),
+                region_name=config.get('AWS_REGION'),
+            )
+        #: The Boto Session instance.
+        self.session = session
+        #: A snapshot of the configs pontus uses.
+        self.config = dict(
+            (key, config[key]) for key in CONFIG_KEYS if key in config
+        )
+        #: The name of the default bucket.
+        self.bucket_name = config.get('PONTUS_BUCKET')
+        #: The S3 resource, sharing its client with all buckets.
+        self.resource = session.resource('s3', config=Config(
+            max_pool_connections=config.get('PONTUS_MAX_POOL_CONNECTIONS', 50),
+            tcp_keepalive=config.get('PONTUS_TCP_KEEPALIVE', True),
+        ))
+        #: The thread-safe low-level S3 client.
+        self.client = self.resource.meta.client
+
+    @property
+    def bucket(self):
+        """A new Boto Bucket instance of the default bucket."""
+        if self.bucket_name is None:
+            return None
+        return self.resource.Bucket(self.bucket_name)
+
+    def __repr__(self):
+        return '<{cls} bucket={bucket!r}>'.format(
+            cls=self.__class__.__name__,
+            bucket=self.bucket_name
+        )
+
+
+def get_state():
+    """
+    Returns the :class:`PontusState` of the current application, or `None`
+    outside of an application context or if the extension is not
+    initialized.
+    """
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('pontus')
+
+
+def get_config():
+    """
+    Returns the configuration snapshot of the extension, or the config of
+    the current application if the extension is not initialized.
+    """
+    state = get_state()
+    if state is not None:
+        return state.config
+    return current_app.config
+
+
+def get_bucket(bucket=None):
+    """
+    Returns `bucket`, or the default bucket of the extension if it is
+    `None`.
+    """
+    if bucket is not None:
+        return bucket
+    state = get_state()
+    if state is None or state.bucket_name is None:
+        raise ValueError(
+            u'Argument `bucket` must be given unless the Pontus extension '
+            u'is initialized with a `PONTUS_BUCKET` config.'
+        )
+    return state.bucket
+
+
+def get_session(session=None):
+    """
+    Returns `session`, or the session of the extension if it is `None`.
+    """
+    if session is not None:
+        return session
+    state = get_state()
+    if state is None:
+        raise ValueError(
+            u'Argument `session` must be given unless the Pontus extension '
+            u'is initialized.'
+        )
+    return state.session
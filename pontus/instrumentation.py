@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+    pontus.instrumentation
+    ~~~~~~~~~~~~~~~~~~~~~~
+
+    Timings, Amazon S3 request counts and bytes transferred of the
+    operations pontus performs, reported to pluggable observers.
+
+    Example::
+
+        from pontus import instrumentation
+
+        class LoggingObserver(instrumentation.BaseObserver):
+            def on_measurement(self, measurement):
+                logger.info(
+                    '%s %s took %.3fs, %d requests, %d bytes',
+                    measurement.operation,
+                    measurement.name,
+                    measurement.duration,
+                    measurement.requests,
+                    measurement.bytes_transferred
+                )
+
+        instrumentation.add_observer(LoggingObserver())
+
+    Nothing is measured while no observers are registered.
+"""
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+#: The operation of a whole :meth:`AmazonS3FileValidator.validate` call.
+VALIDATE = 'validate'
+#: The operation of loading the file metadata with a HEAD request.
+LOAD = 'load'
+#: The operation of running a single validator.
+VALIDATOR = 'validator'
+#: The operation of moving a valid file.
+MOVE = 'move'
+#: The operation of deleting a file.
+DELETE = 'delete'
+#: The operation of signing an upload.
+SIGN = 'sign'
+
+_observers = []
+#: The measurements active in the current thread or asyncio task, from the
+#: outermost to the innermost.
+_stack = contextvars.ContextVar('pontus.instrumentation.stack', default=())
+_lock = threading.Lock()
+
+
+class Measurement(object):
+    """The measured cost of a single operation.
+
+    :param operation:
+        The kind of the operation, e.g. :data:`VALIDATOR`.
+
+    :param name:
+        The name of what performed the operation, e.g. the name of the
+        validator.
+    """
+    def __init__(self, operation, name):
+        self.operation = operation
+        self.name = name
+        #: The wall clock duration of the operation in seconds.
+        self.duration = None
+        #: The number of Amazon S3 requests made during the operation.
+        self.requests = 0
+        #: The number of response body bytes downloaded from Amazon S3.
+        self.bytes_transferred = 0
+        #: Whether the operation raised an exception.
+        self.failed = False
+
+    def __repr__(self):
+        return (
+            '<{cls} operation={operation!r} name={name!r} '
+            'duration={duration!r} requests={requests!r} '
+            'bytes_transferred={bytes_transferred!r}>'
+        ).format(
+            cls=self.__class__.__name__,
+            operation=self.operation,
+            name=self.name,
+            duration=self.duration,
+            requests=self.requests,
+            bytes_transferred=self.bytes_transferred
+        )
+
+
+class BaseObserver(object):
+    """Base class for observers of measurements."""
+
+    def on_measurement(self, measurement):
+        """
+        Called with each finished :class:`Measurement`, in the thread the
+        operation ran in.
+        """
+        raise NotImplementedError
+
+
+class PrometheusObserver(BaseObserver):
+    """Records measurements as Prometheus metrics. Requires the
+    `prometheus_client` package.
+
+    The following metrics are labeled with the operation and the name of
+    the measurement:
+
+    - ``<namespace>_operation_duration_seconds`` histogram
+    - ``<namespace>_operations_failed_total`` counter
+    - ``<namespace>_s3_requests_total`` counter
+    - ``<namespace>_s3_bytes_transferred_total`` counter
+
+    Example::
+
+        from pontus import instrumentation
+
+        instrumentation.add_observer(instrumentation.PrometheusObserver())
+
+    :param registry:
+        The `CollectorRegistry` to register the metrics in. Defaults to the
+        default registry of `prometheus_client`.
+
+    :param namespace:
+        The prefix of the metric names.
+    """
+    def __init__(self, registry=None, namespace='pontus'):
+        import prometheus_client
+
+        if registry is None:
+            registry = prometheus_client.REGISTRY
+        labels = ['operation', 'name']
+        self.duration = prometheus_client.Histogram(
+            'operation_duration_seconds',
+            'Duration of pontus operations.',
+            labels,
+            namespace=namespace,
+            registry=registry
+        )
+        self.failures = prometheus_client.Counter(
+            'operations_failed',
+            'Number of pontus operations that raised an exception.',
+            labels,
+            namespace=namespace,
+            registry=registry
+        )
+        self.requests = prometheus_client.Counter(
+            's3_requests',
+            'Number of Amazon S3 requests made by pontus operations.',
+            labels,
+            namespace=namespace,
+            registry=registry
+        )
+        self.bytes_transferred = prometheus_client.Counter(
+            's3_bytes_transferred',
+            'Number of bytes downloaded from Amazon S3 by pontus operations.',
+            labels,
+            namespace=namespace,
+            registry=registry
+        )
+
+    def on_measurement(self, measurement):
+        labels = (measurement.operation, measurement.name)
+        self.duration.labels(*labels).observe(measurement.duration)
+        if measurement.failed:
+            self.failures.labels(*labels).inc()
+        if measurement.requests:
+            self.requests.labels(*labels).inc(measurement.requests)
+        if measurement.bytes_transferred:
+            self.bytes_transferred.labels(*labels).inc(
+                measurement.bytes_transferred
+            )
+
+
+def add_observer(observer):
+    """Registers an observer for all measurements."""
+    _observers.append(observer)
+
+
+def remove_observer(observer):
+    """Unregisters an observer added with :func:`add_observer`."""
+    _observers.remove(observer)
+
+
+def get_name(callable_):
+    """Returns the name measurements of a validator are reported under."""
+    return getattr(callable_, '__name__', None) or type(callable_).__name__
+
+
+@contextmanager
+def measure(operation, name, client=None):
+    """
+    Measures the operation run in the block and reports it to the
+    registered observers. The Amazon S3 requests made with `client` in the
+    same thread or asyncio task are counted for it and for all measurements
+    it is nested in, so measurements of concurrently run coroutines are
+    kept apart. Requests made in other threads are counted only if the
+    functions run there are wrapped with :func:`propagate`, so the requests
+    of the worker threads of boto3's managed transfers are not counted.
+
+    :param operation: The kind of the operation, e.g. :data:`VALIDATOR`.
+    :param name: The name of what performed the operation.
+    :param client: The Boto S3 client used by the operation.
+    """
+    if not _observers:
+        yield
+        return
+
+    if client is not None:
+        client.meta.events.register(
+            'after-call.s3',
+            _count_request,
+            unique_id='pontus.instrumentation'
+        )
+    measurement = Measurement(operation, name)
+    token = _stack.set(_stack.get() + (measurement,))
+    start = time.monotonic()
+    try:
+        yield
+    except BaseException:
+        measurement.failed = True
+        raise
+    finally:
+        measurement.duration = time.monotonic() - start
+        _stack.reset(token)
+        for observer in list(_observers):
+            observer.on_measurement(measurement)
+
+
+def propagate(func):
+    """
+    Wraps `func` so that the Amazon S3 requests it makes are counted for
+    the measurements active in the calling thread or task, even if it is
+    run in another thread.
+    """
+    stack = _stack.get()
+    if not stack:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _stack.set(stack)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _stack.reset(token)
+
+    return wrapper
+
+
+def _count_request(http_response=None, model=None, **kwargs):
+    stack = _stack.get()
+    if not stack:
+        return
+    bytes_transferred = 0
+    if model is not None and model.name == 'GetObject':
+        bytes_transferred = int(
+            http_response.headers.get('content-length') or 0
+        )
+    with _lock:
+        for measurement in stack:
+            measurement.requests += 1
+            measurement.bytes_transferred += bytes_transferred
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import queue
+import threading
+
+from ._compat import force_text
+
+#: The default number of libmagic handles in the shared pool.
+DEFAULT_POOL_SIZE = 4
+
+
+class MagicPool(object):
+    """A thread-safe pool of libmagic handles detecting MIME types.
+
+    `magic.from_buffer` of python-magic uses a single module-level handle,
+    so all threads sniffing files queue up behind its lock. A pool lets up
+    to `size` threads sniff at the same time. Handles are created, and the
+    magic database loaded, when first needed or when :meth:`warm_up` is
+    called.
+
+    :param size:
+        The maximum number of libmagic handles.
+    """
+    def __init__(self, size=DEFAULT_POOL_SIZE):
+        if size < 1:
+            raise ValueError(u'Argument `size` must be at least 1.')
+        self.size = size
+        self._handles = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+
+    def warm_up(self):
+        """Creates all the handles of the pool ahead of time."""
+        handles = []
+        while True:
+            handle = self._create()
+            if handle is None:
+                break
+            handles.append(handle)
+        for handle in handles:
+            self._handles.put(handle)
+
+    def from_buffer(self, buf):
+        """
+        Returns the MIME type of the given bytes.
+
+        :param buf: The beginning or the whole content of a file.
+        """
+        handle = self._acquire()
+        try:
+            return force_text(handle.from_buffer(buf))
+        finally:
+            self._handles.put(handle)
+
+    def _acquire(self):
+        try:
+            return self._handles.get_nowait()
+        except queue.Empty:
+            pass
+        handle = self._create()
+        if handle is None:
+            handle = self._handles.get()
+        return handle
+
+    def _create(self):
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+        # Imported here, as importing python-magic loads libmagic.
+        import magic
+        return magic.Magic(mime=True)
+
+    def __len__(self):
+        return self._created
+
+    def __repr__(self):
+        return '<{cls} size={size!r}>'.format(
+            cls=self.__class__.__name__,
+            size=self.size
+        )
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Returns the shared :class:`MagicPool` used by the validators."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = MagicPool()
+    return _pool
+
+
+def configure(size=DEFAULT_POOL_SIZE):
+    """
+    Replaces the shared :class:`MagicPool` with a pool of `size` handles.
+    """
+    global _pool
+    with _pool_lock:
+        _pool = MagicPool(size)
+    return _pool
+
+
+def warm_up(size=None):
+    """
+    Loads the handles of the shared :class:`MagicPool` ahead of time. This
+    should be called at application startup, so that the first requests do
+    not pay for loading the magic database.
+
+    :param size:
+        If given, the shared pool is first replaced with a pool of `size`
+        handles.
+    """
+    pool = configure(size) if size else get_pool()
+    pool.warm_up()
+    return pool
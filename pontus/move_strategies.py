@@ -0,0 +1,406 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from . import instrumentation
+
+#: The largest object Amazon S3 can copy with a single CopyObject request.
+MAX_COPY_OBJECT_SIZE = 5 * 1024 ** 3
+
+#: The smallest part size allowed in a multipart upload.
+MIN_PART_SIZE = 5 * 1024 ** 2
+
+#: The largest number of parts allowed in a multipart upload.
+MAX_PARTS = 10000
+
+# Headers that a multipart copy does not copy from the source object.
+_COPIED_ATTRIBUTES = (
+    'CacheControl',
+    'ContentDisposition',
+    'ContentEncoding',
+    'ContentLanguage',
+    'ContentType',
+    'Metadata',
+)
+
+
+class BaseMoveStrategy(object):
+    """A base class for strategies :class:`AmazonS3FileValidator` uses for
+    moving valid files out of `AWS_UNVALIDATED_PREFIX`.
+
+    Strategies that set :attr:`in_place` to `True` mark valid files without
+    changing their key. They are applied to every valid file, whether it has
+    the unvalidated prefix or not, and the file is never deleted.
+    """
+    in_place = False
+
+    def move(self, obj, new_key_name, acl):
+        """
+        Copies an Amazon S3 file to a new key. The source file is deleted by
+        :class:`AmazonS3FileValidator` afterwards if needed.
+
+        :param obj: Boto S3 Object instance of the file to be moved.
+
+        :param new_key_name: The key to move the file to.
+
+        :param acl: Canned ACL set to the new file.
+
+        :return: Boto S3 Object instance of the new file.
+        """
+        raise NotImplementedError
+
+    async def move_async(self, obj, new_key_name, acl, client):
+        """
+        Asynchronous counterpart of :meth:`move`, used by
+        :class:`AsyncAmazonS3FileValidator` with an aiobotocore client.
+
+        By default :meth:`move` is run in the default executor of the event
+        loop. Strategies override this to make their requests with `client`
+        without blocking a thread.
+
+        :param client: The aiobotocore S3 client.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, instrumentation.propagate(
+            functools.partial(self.move, obj, new_key_name, acl)
+        ))
+
+
+def _get_copied_object(obj, new_key_name, e_tag):
+    new_obj = obj.Bucket().Object(new_key_name)
+    new_obj.meta.data = dict(obj.meta.data, ETag=e_tag)
+    return new_obj
+
+
+class ManagedCopy(BaseMoveStrategy):
+    """Moves files with the managed transfer of Boto, :meth:`Object.copy`.
+
+    This is the default strategy.
+    """
+    def move(self, obj, new_key_name, acl):
+        ExtraArgs = {
+            'ACL': acl,
+        }
+        if obj.content_type:
+            ExtraArgs['ContentType'] = obj.content_type
+        new_obj = obj.Bucket().Object(new_key_name)
+        new_obj.copy(
+            {
+                'Bucket': obj.bucket_name,
+                'Key': obj.key,
+            },
+            ExtraArgs=ExtraArgs,
+        )
+        return new_obj
+
+    async def move_async(self, obj, new_key_name, acl, client):
+        # The managed transfer has no asynchronous counterpart. Files that
+        # fit a single CopyObject request are copied with one.
+        if obj.content_length > MAX_COPY_OBJECT_SIZE:
+            return await super().move_async(obj, new_key_name, acl, client)
+        response = await client.copy_object(
+            Bucket=obj.bucket_name,
+            Key=new_key_name,
+            CopySource={'Bucket': obj.bucket_name, 'Key': obj.key},
+            ACL=acl,
+        )
+        return _get_copied_object(
+            obj,
+            new_key_name,
+            response['CopyObjectResult']['ETag']
+        )
+
+    def __repr__(self):
+        return '<{cls}>'.format(cls=self.__class__.__name__)
+
+
+class ServerSideCopy(BaseMoveStrategy):
+    """Moves files with as few Amazon S3 requests as possible.
+
+    Files up to `multipart_threshold` bytes are copied with a single
+    `CopyObject` request. Larger files are copied with a multipart upload
+    whose parts are copied with `UploadPartCopy` requests in parallel.
+
+    Every copy request is conditional on the ETag of the validated file, so
+    a file replaced during validation is never moved. As the new file is
+    known to have the same content, its metadata is filled in without
+    loading it.
+
+    Example::
+
+        from pontus import AmazonS3FileValidator
+        from pontus.move_strategies import ServerSideCopy
+
+        AmazonS3FileValidator(
+            key_name='my/video.mp4',
+            bucket=bucket,
+            move_strategy=ServerSideCopy(
+                part_size=512 * 1024 * 1024,
+                max_concurrency=20
+            )
+        )
+
+    :param multipart_threshold:
+        The size in bytes above which files are copied in parts. It cannot
+        be more than :data:`MAX_COPY_OBJECT_SIZE`, which is also the default.
+
+    :param part_size:
+        The size of the parts in bytes. It is increased if the file would
+        otherwise have more than :data:`MAX_PARTS` parts.
+
+    :param max_concurrency:
+        The maximum number of parts copied at the same time.
+    """
+    def __init__(
+        self,
+        multipart_threshold=MAX_COPY_OBJECT_SIZE,
+        part_size=256 * 1024 ** 2,
+        max_concurrency=10,
+    ):
+        if multipart_threshold > MAX_COPY_OBJECT_SIZE:
+            raise ValueError(
+                u'Argument `multipart_threshold` cannot be more than '
+                u'{max!s} bytes.'.format(max=MAX_COPY_OBJECT_SIZE)
+            )
+        if not (MIN_PART_SIZE <= part_size <= MAX_COPY_OBJECT_SIZE):
+            raise ValueError(
+                u'Argument `part_size` must be between {min!s} and {max!s} '
+                u'bytes.'.format(min=MIN_PART_SIZE, max=MAX_COPY_OBJECT_SIZE)
+            )
+        self.multipart_threshold = multipart_threshold
+        self.part_size = part_size
+        self.max_concurrency = max_concurrency
+
+    def move(self, obj, new_key_name, acl):
+        if obj.content_length > self.multipart_threshold:
+            e_tag = self._copy_in_parts(obj, new_key_name, acl)
+        else:
+            e_tag = self._copy(obj, new_key_name, acl)
+        return _get_copied_object(obj, new_key_name, e_tag)
+
+    async def move_async(self, obj, new_key_name, acl, client):
+        if obj.content_length > self.multipart_threshold:
+            e_tag = await self._copy_in_parts_async(
+                obj,
+                new_key_name,
+                acl,
+                client
+            )
+        else:
+            response = await client.copy_object(
+                **self._get_copy_args(obj, new_key_name, acl)
+            )
+            e_tag = response['CopyObjectResult']['ETag']
+        return _get_copied_object(obj, new_key_name, e_tag)
+
+    def _get_copy_args(self, obj, new_key_name, acl):
+        return {
+            'Bucket': obj.bucket_name,
+            'Key': new_key_name,
+            'CopySource': {'Bucket': obj.bucket_name, 'Key': obj.key},
+            'CopySourceIfMatch': obj.e_tag,
+            'ACL': acl,
+        }
+
+    def _copy(self, obj, new_key_name, acl):
+        response = obj.meta.client.copy_object(
+            **self._get_copy_args(obj, new_key_name, acl)
+        )
+        return response['CopyObjectResult']['ETag']
+
+    def _get_part_size(self, content_length):
+        part_size = self.part_size
+        while part_size * MAX_PARTS < content_length:
+            part_size *= 2
+        return part_size
+
+    def _get_create_args(self, obj, new_key_name, acl):
+        args = dict(
+            (name, obj.meta.data[name]) for name in _COPIED_ATTRIBUTES
+            if obj.meta.data.get(name)
+        )
+        args.update(Bucket=obj.bucket_name, Key=new_key_name, ACL=acl)
+        return args
+
+    def _get_part_copy_args(self, obj, new_key_name, upload_id):
+        part_size = self._get_part_size(obj.content_length)
+        return [
+            {
+                'Bucket': obj.bucket_name,
+                'Key': new_key_name,
+                'UploadId': upload_id,
+                'PartNumber': part_number,
+                'CopySource': {'Bucket': obj.bucket_name, 'Key': obj.key},
+                'CopySourceIfMatch': obj.e_tag,
+                'CopySourceRange': 'bytes={start}-{end}'.format(
+                    start=start,
+                    end=min(start + part_size, obj.content_length) - 1
+                ),
+            }
+            for part_number, start in enumerate(
+                range(0, obj.content_length, part_size),
+                start=1
+            )
+        ]
+
+    def _copy_in_parts(self, obj, new_key_name, acl):
+        client = obj.meta.client
+        upload_id = client.create_multipart_upload(
+            **self._get_create_args(obj, new_key_name, acl)
+        )['UploadId']
+
+        def copy_part(args):
+            response = client.upload_part_copy(**args)
+            return {
+                'PartNumber': args['PartNumber'],
+                'ETag': response['CopyPartResult']['ETag'],
+            }
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+                parts = list(pool.map(
+                    instrumentation.propagate(copy_part),
+                    self._get_part_copy_args(obj, new_key_name, upload_id)
+                ))
+            response = client.complete_multipart_upload(
+                Bucket=obj.bucket_name,
+                Key=new_key_name,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts},
+            )
+        except Exception:
+            client.abort_multipart_upload(
+                Bucket=obj.bucket_name,
+                Key=new_key_name,
+                UploadId=upload_id,
+            )
+            raise
+        return response['ETag']
+
+    async def _copy_in_parts_async(self, obj, new_key_name, acl, client):
+        upload_id = (await client.create_multipart_upload(
+            **self._get_create_args(obj, new_key_name, acl)
+        ))['UploadId']
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def copy_part(args):
+            async with semaphore:
+                response = await client.upload_part_copy(**args)
+            return {
+                'PartNumber': args['PartNumber'],
+                'ETag': response['CopyPartResult']['ETag'],
+            }
+
+        try:
+            parts = await asyncio.gather(*[
+                copy_part(args) for args in
+                self._get_part_copy_args(obj, new_key_name, upload_id)
+            ])
+            response = await client.complete_multipart_upload(
+                Bucket=obj.bucket_name,
+                Key=new_key_name,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts},
+            )
+        except Exception:
+            await client.abort_multipart_upload(
+                Bucket=obj.bucket_name,
+                Key=new_key_name,
+                UploadId=upload_id,
+            )
+            raise
+        return response['ETag']
+
+    def __repr__(self):
+        return (
+            '<{cls} multipart_threshold={multipart_threshold!r}, '
+            'part_size={part_size!r}, max_concurrency={max_concurrency!r}>'
+        ).format(
+            cls=self.__class__.__name__,
+            multipart_threshold=self.multipart_threshold,
+            part_size=self.part_size,
+            max_concurrency=self.max_concurrency
+        )
+
+
+class TagInPlace(BaseMoveStrategy):
+    """Marks valid files with an object tag instead of moving them.
+
+    The file keeps its key, so marking it costs the same regardless of its
+    size. Other tags of the file are preserved. The ACL of the file is not
+    changed, so `new_file_acl` does not apply.
+
+    Unvalidated files can then be expired with a lifecycle rule filtered on
+    the tag, e.g. `pontus-validated=false`, set on upload with the `tags`
+    argument of :class:`AmazonS3SignedRequest`.
+
+    Example::
+
+        from pontus import AmazonS3FileValidator, AmazonS3SignedRequest
+        from pontus.move_strategies import TagInPlace
+
+        AmazonS3SignedRequest(
+            key_name=u'my/file.jpg',
+            mime_type=u'image/jpeg',
+            bucket=bucket,
+            session=session,
+            tags={'pontus-validated': 'false'}
+        )
+
+        AmazonS3FileValidator(
+            key_name='my/file.jpg',
+            bucket=bucket,
+            move_strategy=TagInPlace()
+        )
+
+    :param tag_key:
+        The key of the tag.
+
+    :param tag_value:
+        The value of the tag set on valid files.
+    """
+    in_place = True
+
+    def __init__(self, tag_key='pontus-validated', tag_value='true'):
+        self.tag_key = tag_key
+        self.tag_value = tag_value
+
+    def move(self, obj, new_key_name, acl):
+        client = obj.meta.client
+        response = client.get_object_tagging(
+            Bucket=obj.bucket_name,
+            Key=obj.key,
+        )
+        client.put_object_tagging(
+            Bucket=obj.bucket_name,
+            Key=obj.key,
+            Tagging={'TagSet': self._get_tag_set(response)},
+        )
+        return obj
+
+    async def move_async(self, obj, new_key_name, acl, client):
+        response = await client.get_object_tagging(
+            Bucket=obj.bucket_name,
+            Key=obj.key,
+        )
+        await client.put_object_tagging(
+            Bucket=obj.bucket_name,
+            Key=obj.key,
+            Tagging={'TagSet': self._get_tag_set(response)},
+        )
+        return obj
+
+    def _get_tag_set(self, response):
+        tag_set = [
+            tag for tag in response['TagSet'] if tag['Key'] != self.tag_key
+        ]
+        tag_set.append({'Key': self.tag_key, 'Value': self.tag_value})
+        return tag_set
+
+    def __repr__(self):
+        return '<{cls} tag_key={tag_key!r}, tag_value={tag_value!r}>'.format(
+            cls=self.__class__.__name__,
+            tag_key=self.tag_key,
+            tag_value=self.tag_value
+        )
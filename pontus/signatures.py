@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+    pontus.signatures
+    ~~~~~~~~~~~~~~~~~
+
+    A fast path for detecting the MIME types of the most common upload
+    formats from their first bytes, without going through the libmagic
+    database. Every result is the MIME type libmagic reports for the same
+    bytes; anything not recognized here is left to libmagic.
+"""
+import struct
+
+#: ``(offset, signature, mime type)`` tuples matched against the beginning
+#: of a file.
+SIGNATURES = [
+    (0, b'\xff\xd8\xff', 'image/jpeg'),
+    (0, b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (0, b'GIF87a', 'image/gif'),
+    (0, b'GIF89a', 'image/gif'),
+    (0, b'%PDF-', 'application/pdf'),
+]
+
+#: MIME types of ISO base media files by the major brand of their ``ftyp``
+#: box.
+FTYP_BRANDS = {
+    b'avc1': 'video/mp4',
+    b'dash': 'video/mp4',
+    b'iso2': 'video/mp4',
+    b'isom': 'video/mp4',
+    b'mp41': 'video/mp4',
+    b'mp42': 'video/mp4',
+    b'qt  ': 'video/quicktime',
+    b'M4A ': 'audio/x-m4a',
+    b'M4V ': 'video/x-m4v',
+}
+
+#: MIME types of Office Open XML documents by the directory of their main
+#: part.
+OFFICE_DIRECTORIES = [
+    (b'word/', 'application/vnd.openxmlformats-officedocument.'
+               'wordprocessingml.document'),
+    (b'xl/', 'application/vnd.openxmlformats-officedocument.'
+             'spreadsheetml.sheet'),
+    (b'ppt/', 'application/vnd.openxmlformats-officedocument.'
+              'presentationml.presentation'),
+]
+
+_ZIP_LOCAL_FILE_HEADER = b'PK\x03\x04'
+
+
+def sniff(buf):
+    """
+    Returns the MIME type of a file from its first bytes, or `None` if the
+    format is not recognized.
+
+    :param buf: The beginning or the whole content of a file.
+    """
+    for offset, signature, mime_type in SIGNATURES:
+        if buf.startswith(signature, offset):
+            return mime_type
+    if buf.startswith(b'RIFF') and buf.startswith(b'WEBP', 8):
+        return 'image/webp'
+    if buf.startswith(b'ftyp', 4):
+        return FTYP_BRANDS.get(buf[8:12])
+    if buf.startswith(_ZIP_LOCAL_FILE_HEADER):
+        return _sniff_office(buf)
+    return None
+
+
+def _iter_zip_entry_names(buf):
+    offset = 0
+    while buf.startswith(_ZIP_LOCAL_FILE_HEADER, offset):
+        if len(buf) < offset + 30:
+            return
+        flags, = struct.unpack_from('<H', buf, offset + 6)
+        compressed_size, = struct.unpack_from('<I', buf, offset + 18)
+        name_length, extra_length = struct.unpack_from('<HH', buf, offset + 26)
+        name = buf[offset + 30:offset + 30 + name_length]
+        if len(name) < name_length:
+            return
+        yield name
+        if flags & 0x08:
+            # The size is only known from a data descriptor after the data.
+            return
+        offset += 30 + name_length + extra_length + compressed_size
+
+
+def _sniff_office(buf):
+    names = _iter_zip_entry_names(buf)
+    if next(names, None) not in (b'[Content_Types].xml', b'_rels/.rels'):
+        return None
+    for name in names:
+        for directory, mime_type in OFFICE_DIRECTORIES:
+            if name.startswith(directory):
+                return mime_type
+    return None
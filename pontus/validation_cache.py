@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from ._compat import force_bytes, force_text
+
+
+def get_fingerprint(validator):
+    """
+    Returns a string identifying a validator and its configuration.
+
+    A validator can define its own fingerprint with a `fingerprint`
+    attribute. Otherwise only the validators of :mod:`pontus.validators`
+    have a fingerprint, their class name with their `repr`, which shows
+    their whole configuration.
+
+    Other validators without a `fingerprint` attribute have no
+    fingerprint, as neither their name nor their `repr` is known to
+    identify their configuration, e.g. the variables of a closure or the
+    attributes of an object. `None` is returned for them.
+    """
+    fingerprint = getattr(validator, 'fingerprint', None)
+    if fingerprint is not None:
+        return fingerprint
+    cls = type(validator)
+    if cls.__module__ != 'pontus.validators':
+        return None
+    return '{module}.{name}:{description}'.format(
+        module=cls.__module__,
+        name=cls.__qualname__,
+        description=repr(validator)
+    )
+
+
+def get_cache_key(obj, validators, **options):
+    """
+    Returns the validation cache key of an Amazon S3 file.
+
+    The key changes whenever the file content (its ETag), the validators or
+    the given validation options change. If any of the validators has no
+    fingerprint (see :func:`get_fingerprint`), the result cannot be cached
+    safely and `None` is returned.
+
+    :param obj: Boto S3 Object instance being validated.
+
+    :param validators: The validators the file is validated with.
+
+    :param options: Other options affecting the validation result.
+    """
+    fingerprints = [get_fingerprint(validator) for validator in validators]
+    if None in fingerprints:
+        return None
+    parts = [obj.bucket_name, obj.key, obj.e_tag]
+    parts.extend(fingerprints)
+    parts.extend(
+        '{0}={1!r}'.format(name, value)
+        for name, value in sorted(options.items())
+    )
+    return hashlib.sha1(force_bytes('\n'.join(parts))).hexdigest()
+
+
+class BaseValidationCache(object):
+    """A base class for caches of validation results used with
+    :class:`AmazonS3FileValidator`.
+
+    A validation result is the list of errors of the validation; an empty
+    list means the file was valid.
+    """
+    def get(self, key):
+        """
+        Returns the cached validation errors for `key`, or `None` if there
+        is no result cached.
+        """
+        raise NotImplementedError
+
+    def set(self, key, errors):
+        """Caches the validation errors for `key`."""
+        raise NotImplementedError
+
+
+class LRUValidationCache(BaseValidationCache):
+    """An in-process, thread-safe validation cache.
+
+    :param max_size:
+        The maximum number of results to keep. The least recently used
+        result is evicted when the cache is full.
+
+    :param ttl:
+        The number of seconds a result is kept.
+    """
+    def __init__(self, max_size=1024, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._results = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                expires_at, errors = self._results[key]
+            except KeyError:
+                return None
+            if expires_at <= time.monotonic():
+                del self._results[key]
+                return None
+            self._results.move_to_end(key)
+            return list(errors)
+
+    def set(self, key, errors):
+        with self._lock:
+            self._results.pop(key, None)
+            while len(self._results) >= self.max_size:
+                self._results.popitem(last=False)
+            self._results[key] = (time.monotonic() + self.ttl, list(errors))
+
+    def clear(self):
+        """Removes all cached results."""
+        with self._lock:
+            self._results.clear()
+
+    def __len__(self):
+        return len(self._results)
+
+
+class RedisValidationCache(BaseValidationCache):
+    """A validation cache shared between processes through Redis.
+
+    The validation errors must be JSON serializable.
+
+    :param redis:
+        A Redis client, e.g. a :class:`redis.Redis` instance. Only its `get`
+        and `setex` methods are used.
+
+    :param ttl:
+        The number of seconds a result is kept.
+
+    :param prefix:
+        A prefix added to the Redis keys.
+    """
+    def __init__(self, redis, ttl=300, prefix='pontus:validation:'):
+        self.redis = redis
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.redis.get(self.prefix + key)
+        if value is None:
+            return None
+        return json.loads(force_text(value))
+
+    def set(self, key, errors):
+        self.redis.setex(self.prefix + key, self.ttl, json.dumps(errors))
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import botocore
+
+from . import magic_pool, signatures
+
+#: MIME types libmagic falls back to when it cannot identify the file from the
+#: bytes it was given. A ranged sniff that yields one of these is widened.
+GENERIC_MIME_TYPES = frozenset(['application/octet-stream'])
+
+#: The default size of the chunks the file body is streamed in.
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class ValidationContext(object):
+    """Shared state of a single :meth:`AmazonS3FileValidator.validate` call.
+
+    The file body, or a prefix of it, is fetched from Amazon S3 only when a
+    validator first asks for it, and libmagic results are memoized, so that
+    several validators reading the same file cause at most one download.
+
+    Validators opt in to receiving the context by having a truthy
+    ``uses_context`` attribute. They are then called as
+    ``validator(obj, context=context)``. Other validators are called with
+    the Boto S3 Object only.
+
+    Example::
+
+        from pontus.exceptions import ValidationError
+
+        def not_empty_text(obj, context):
+            if not context.read(1024).strip():
+                raise ValidationError(u'File is empty.')
+
+        not_empty_text.uses_context = True
+
+    The first GET response also fills in the metadata of the Boto S3 Object
+    if it has not been loaded yet.
+
+    The context is thread-safe, so validators run concurrently can share it.
+
+    :param obj: Boto S3 Object instance being validated.
+
+    :param fast_sniff:
+        Whether to detect common formats from their signature before
+        falling back to libmagic. See :mod:`pontus.signatures`. Disable it
+        to always use libmagic.
+    """
+    def __init__(self, obj, fast_sniff=True):
+        self.obj = obj
+        self.fast_sniff = fast_sniff
+        self._lock = threading.RLock()
+        self._data = b''
+        self._complete = False
+        self._mime_types = {}
+
+    def read(self, size=None):
+        """
+        Returns the file body, fetching only the missing bytes from Amazon S3.
+
+        :param size:
+            If given, only the first `size` bytes are returned and at most
+            that many bytes are fetched.
+        """
+        with self._lock:
+            if self._complete:
+                return self._data if size is None else self._data[:size]
+
+            if size is None:
+                if self._data:
+                    self._data += self._read_range(len(self._data), '')
+                else:
+                    response = self.obj.get()
+                    self._remember_metadata(response)
+                    self._data = response['Body'].read()
+                self._complete = True
+                return self._data
+
+            if len(self._data) < size:
+                self._data += self._read_range(len(self._data), size - 1)
+                if len(self._data) < size:
+                    self._complete = True
+            return self._data[:size]
+
+    def iter_chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Iterates over the file body in chunks of `chunk_size` bytes, fetching
+        it with a single GET without keeping the whole body in memory.
+
+        An already fetched prefix of the body is not fetched again.
+        Otherwise the first chunk is remembered as a prefix of the body for
+        :meth:`read` and :meth:`mime_type`, and a body fitting in one chunk
+        is remembered as a whole. The response is closed when the iteration
+        stops, so bailing out early stops the download.
+
+        :param chunk_size: The maximum size of a chunk in bytes.
+        """
+        with self._lock:
+            complete = self._complete
+            data = self._data
+        for start in range(0, len(data), chunk_size):
+            yield data[start:start + chunk_size]
+        if complete:
+            return
+
+        if data:
+            response = self._get_range(len(data), '')
+            if response is None:
+                self._remember_body(data)
+                return
+        else:
+            response = self.obj.get()
+        self._remember_metadata(response)
+        body = response['Body']
+        # The body read so far, while it fits in one chunk.
+        buffered = data if len(data) <= chunk_size else None
+        try:
+            first_chunk = not data
+            for chunk in body.iter_chunks(chunk_size):
+                if first_chunk:
+                    with self._lock:
+                        if len(chunk) > len(self._data):
+                            self._data = chunk
+                    first_chunk = False
+                if buffered is not None:
+                    buffered += chunk
+                    if len(buffered) > chunk_size:
+                        buffered = None
+                yield chunk
+        finally:
+            body.close()
+        if buffered is not None:
+            self._remember_body(buffered)
+
+    def _remember_body(self, data):
+        with self._lock:
+            if not self._complete:
+                self._data = data
+                self._complete = True
+
+    def mime_type(self, sniff_size=None, max_sniff_size=None, fast_sniff=True):
+        """
+        Determines the MIME type of the file with libmagic.
+
+        By default the whole file is used. If `sniff_size` is given only the
+        first `sniff_size` bytes are fetched with a ranged GET. When libmagic
+        gives only a generic answer (see :data:`GENERIC_MIME_TYPES`) the range
+        is doubled until the type is recognized, the whole file has been read
+        or `max_sniff_size` bytes have been read.
+
+        :param sniff_size: The number of bytes to fetch first.
+
+        :param max_sniff_size: The maximum number of bytes to fetch in total.
+
+        :param fast_sniff:
+            Whether common formats may be detected from their signature.
+            Signatures are only used if the context has `fast_sniff`
+            enabled too.
+        """
+        with self._lock:
+            return self._mime_type(
+                sniff_size,
+                max_sniff_size,
+                self.fast_sniff and fast_sniff
+            )
+
+    def _mime_type(self, sniff_size, max_sniff_size, fast_sniff):
+        if not sniff_size:
+            return self._sniff(self.read(), fast_sniff)
+
+        size = sniff_size
+        if max_sniff_size:
+            size = min(size, max_sniff_size)
+        while True:
+            buf = self.read(size)
+            file_mime_type = self._sniff(buf, fast_sniff)
+            if (
+                file_mime_type not in GENERIC_MIME_TYPES or
+                len(buf) < size or
+                (max_sniff_size and size >= max_sniff_size)
+            ):
+                return file_mime_type
+            size *= 2
+            if max_sniff_size:
+                size = min(size, max_sniff_size)
+
+    def _sniff(self, buf, fast_sniff):
+        # A prefix of a given length is always the same bytes, so its length
+        # is enough to identify it.
+        key = (len(buf), fast_sniff)
+        if key not in self._mime_types:
+            mime_type = signatures.sniff(buf) if fast_sniff else None
+            if mime_type is None:
+                mime_type = magic_pool.get_pool().from_buffer(buf)
+            self._mime_types[key] = mime_type
+        return self._mime_types[key]
+
+    def _read_range(self, start, end):
+        response = self._get_range(start, end)
+        if response is None:
+            return b''
+        self._remember_metadata(response)
+        return response['Body'].read()
+
+    def _get_range(self, start, end):
+        try:
+            return self.obj.get(Range='bytes={start}-{end}'.format(
+                start=start,
+                end=end
+            ))
+        except botocore.exceptions.ClientError as e:
+            if e.response['Error']['Code'] == 'InvalidRange':
+                return None
+            raise e
+
+    def _remember_metadata(self, response):
+        # Fill in the object metadata from the first GET response, so that
+        # reading e.g. `obj.content_length` does not need a HEAD request.
+        if self.obj.meta.data is not None:
+            return
+        data = dict(
+            (key, value) for key, value in response.items()
+            if key not in ('Body', 'ContentRange')
+        )
+        if 'ContentRange' in response:
+            data['ContentLength'] = int(
+                response['ContentRange'].rsplit('/', 1)[1]
+            )
+        self.obj.meta.data = data
+
+    def __repr__(self):
+        return '<{cls} key={key!r}>'.format(
+            cls=self.__class__.__name__,
+            key=self.obj.key
+        )
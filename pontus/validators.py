@@ -1,13 +1,65 @@
 # -*- coding: utf-8 -*-
-import magic
+import base64
+import binascii
+import hashlib
 import re
 
 from ._compat import force_text
 from .exceptions import ValidationError
+from .validation_context import (  # noqa
+    DEFAULT_CHUNK_SIZE,
+    GENERIC_MIME_TYPES,
+    ValidationContext
+)
+
+#: Cost class of validators that only use the already loaded file metadata.
+COST_METADATA = 0
+
+#: Cost class of validators that read a range of the file body.
+COST_RANGED_READ = 1
+
+#: Cost class of validators that read the whole file body.
+COST_FULL_READ = 2
+
+
+def get_cost(validator):
+    """
+    Returns the cost class of a validator. Validators without a `cost`
+    attribute are assumed to read the whole file.
+    """
+    return getattr(validator, 'cost', COST_FULL_READ)
+
+
+def sniff_mime_type(obj, sniff_size=None, max_sniff_size=None,
+                    fast_sniff=True):
+    """
+    Determines the MIME type of an Amazon S3 file with libmagic.
+
+    See :class:`ValidationContext` and :meth:`ValidationContext.mime_type`
+    for the meaning of the arguments.
+
+    :param obj: Boto S3 Object instance to be sniffed.
+    """
+    return ValidationContext(obj, fast_sniff=fast_sniff).mime_type(
+        sniff_size=sniff_size,
+        max_sniff_size=max_sniff_size
+    )
 
 
 class BaseValidator(object):
-    """A base class for validators used with :class:`AmazonS3FileValidator`."""
+    """A base class for validators used with :class:`AmazonS3FileValidator`.
+
+    Subclasses that set :attr:`uses_context` to `True` are also passed the
+    :class:`ValidationContext` of the validation as a `context` keyword
+    argument.
+
+    Subclasses should set :attr:`cost` to one of :data:`COST_METADATA`,
+    :data:`COST_RANGED_READ` and :data:`COST_FULL_READ`, so that
+    :class:`AmazonS3FileValidator` can run cheap validators first.
+    """
+    uses_context = False
+    cost = COST_FULL_READ
+
     def __call__(self, obj):
         """
         Validates an Amazon S3 file.
@@ -17,7 +69,134 @@ class BaseValidator(object):
         raise NotImplementedError
 
 
-class MimeType(BaseValidator):
+class StreamingValidator(BaseValidator):
+    """A base class for validators that check the file body incrementally.
+
+    Subclasses implement :meth:`begin`, which returns a consumer with two
+    methods: ``feed(chunk)``, called with each chunk of the body in order,
+    and ``finish()``, called after the last chunk. Either may raise
+    :class:`ValidationError`. Keeping the state in the consumer lets the
+    same validator instance validate several files at the same time.
+
+    When :class:`AmazonS3FileValidator` is used with ``streaming=True``, all
+    streaming validators are fed from a single pass over the body. Used on
+    its own, a streaming validator reads the body by itself.
+
+    Example::
+
+        from pontus.exceptions import ValidationError
+        from pontus.validators import StreamingValidator
+
+        class NoNullBytes(StreamingValidator):
+            def begin(self, obj):
+                return self
+
+            def feed(self, chunk):
+                if b'\\x00' in chunk:
+                    raise ValidationError(u'File contains null bytes.')
+
+            def finish(self):
+                pass
+    """
+    uses_context = True
+
+    #: The size of the chunks the body is read in when the validator is
+    #: called on its own.
+    chunk_size = DEFAULT_CHUNK_SIZE
+
+    def begin(self, obj):
+        """
+        Starts validating an Amazon S3 file.
+
+        :param obj: Boto S3 Object instance to be validated.
+
+        :raises ValidationError: if the file is invalid without reading it.
+
+        :return: a consumer with ``feed(chunk)`` and ``finish()`` methods, or
+            `None` if the file body is not needed.
+        """
+        raise NotImplementedError
+
+    def __call__(self, obj, context=None):
+        """
+        Validates an Amazon S3 file by streaming its body to the consumer
+        returned by :meth:`begin`.
+
+        :raises ValidationError: if the file is invalid.
+        """
+        consumer = self.begin(obj)
+        if consumer is None:
+            return
+        if context is None:
+            context = ValidationContext(obj)
+        for chunk in context.iter_chunks(self.chunk_size):
+            consumer.feed(chunk)
+        consumer.finish()
+
+
+class BaseMimeTypeValidator(BaseValidator):
+    """A base class for validators checking the MIME type of a file.
+
+    The MIME type is sniffed with the :class:`ValidationContext` shared with
+    the other validators, so the file is sniffed only once for all of them.
+    Subclasses set :attr:`sniff_size`, :attr:`max_sniff_size` and
+    :attr:`fast_sniff` (see :meth:`ValidationContext.mime_type`) and
+    implement :meth:`_check`.
+    """
+    uses_context = True
+    sniff_size = None
+    max_sniff_size = None
+    fast_sniff = True
+
+    @property
+    def cost(self):
+        return COST_RANGED_READ if self.sniff_size else COST_FULL_READ
+
+    def __call__(self, obj, context=None):
+        """
+        Validates the MIME type of an Amazon S3 file.
+
+        :param obj: Boto S3 Object instance to be validated.
+
+        :param context:
+            Optional :class:`ValidationContext` sharing the file body with
+            other validators.
+
+        :raises ValidationError: if the file MIME type is invalid.
+        """
+        if context is None:
+            context = ValidationContext(obj, fast_sniff=self.fast_sniff)
+        self._check(context.mime_type(
+            sniff_size=self.sniff_size,
+            max_sniff_size=self.max_sniff_size,
+            fast_sniff=self.fast_sniff
+        ))
+
+    async def validate_async(self, obj, context):
+        """
+        Asynchronous counterpart of :meth:`__call__`, used by
+        :class:`AsyncAmazonS3FileValidator` with an aiobotocore client.
+
+        :param context: An :class:`AioValidationContext`.
+
+        :raises ValidationError: if the file MIME type is invalid.
+        """
+        self._check(await context.mime_type(
+            sniff_size=self.sniff_size,
+            max_sniff_size=self.max_sniff_size,
+            fast_sniff=self.fast_sniff
+        ))
+
+    def _check(self, file_mime_type):
+        """
+        Validates a sniffed MIME type.
+
+        :raises ValidationError: if the MIME type is invalid.
+        """
+        raise NotImplementedError
+
+
+class MimeType(BaseMimeTypeValidator):
     """Validator for allowing file MIME type(s).
 
     Uses python-magic to determine MIME type. python-magic depends on
@@ -32,6 +211,8 @@ class MimeType(BaseValidator):
         MimeType(regex=r"...")
         # OR
         MimeType(mime_types=['image/jpeg', 'image/png'])
+        # OR, fetching only the first 8 KB of the file
+        MimeType('image/jpeg', sniff_size=8192)
 
 
     :param mime_type:
@@ -43,24 +224,42 @@ class MimeType(BaseValidator):
     :param mime_types:
         A list of expected MIME types. This will override :attr:`mime_type`
         if passed.
+
+    :param sniff_size:
+        If given, only the first `sniff_size` bytes of the file are fetched
+        for determining the MIME type instead of the whole file. The range
+        is widened if libmagic cannot recognize the type from it.
+
+    :param max_sniff_size:
+        The maximum number of bytes fetched when widening the range.
+
+    :param fast_sniff:
+        Whether MIME types of common formats are detected from their
+        signature before falling back to libmagic. See
+        :mod:`pontus.signatures`. With a shared context, signatures are
+        used only if they are enabled for :class:`AmazonS3FileValidator`
+        too.
     """
-    def __init__(self, mime_type=None, regex=None, mime_types=[]):
+    def __init__(
+        self,
+        mime_type=None,
+        regex=None,
+        mime_types=[],
+        sniff_size=None,
+        max_sniff_size=None,
+        fast_sniff=True,
+    ):
         if not (mime_type or regex or mime_types):
             raise ValueError(u'No argument for validation provided.')
         self.mime_types = mime_type or mime_types
         self.regex = regex
+        self._compiled_regex = re.compile(regex) if regex else None
+        self.sniff_size = sniff_size
+        self.max_sniff_size = max_sniff_size
+        self.fast_sniff = fast_sniff
 
-    def __call__(self, obj):
-        """
-        Check file MIME type is in :attr:`mime_types` or matches :attr:`regex`.
-
-        :raises ValidationError: if the file MIME type is invalid.
-        """
-        file_mime_type = force_text(magic.from_buffer(
-            obj.get()['Body'].read(), mime=True
-        ))
-
-        if self.regex and not re.search(self.regex, file_mime_type):
+    def _check(self, file_mime_type):
+        if self.regex and not self._compiled_regex.search(file_mime_type):
             raise ValidationError(
                 u"File MIME type {mime!s} does not match r'{regex!s}'.".format(
                     mime=file_mime_type,
@@ -84,12 +283,25 @@ class MimeType(BaseValidator):
         regex = (
             ' regex={regex!r}'.format(regex=self.regex) if self.regex else ''
         )
-        return '<{cls}{mime_types}{regex}>'.format(
-            cls=self.__class__.__name__, mime_types=mime_types, regex=regex
+        sniff_size = (
+            ' sniff_size={sniff_size!r}, max_sniff_size={max_sniff_size!r}'
+            .format(
+                sniff_size=self.sniff_size,
+                max_sniff_size=self.max_sniff_size
+            )
+            if self.sniff_size else ''
+        )
+        fast_sniff = '' if self.fast_sniff else ' fast_sniff=False'
+        return '<{cls}{mime_types}{regex}{sniff_size}{fast_sniff}>'.format(
+            cls=self.__class__.__name__,
+            mime_types=mime_types,
+            regex=regex,
+            sniff_size=sniff_size,
+            fast_sniff=fast_sniff
         )
 
 
-class DenyMimeType(BaseValidator):
+class DenyMimeType(BaseMimeTypeValidator):
     """Validator for denying file MIME type(s).
 
     Uses python-magic to determine MIME type. python-magic depends on
@@ -104,6 +316,8 @@ class DenyMimeType(BaseValidator):
         DenyMimeType(regex=r"...")
         # OR
         DenyMimeType(mime_types=['image/jpeg', 'image/png'])
+        # OR, fetching only the first 8 KB of the file
+        DenyMimeType('image/jpeg', sniff_size=8192)
 
 
     :param mime_type:
@@ -115,24 +329,42 @@ class DenyMimeType(BaseValidator):
     :param mime_types:
         A list of MIME types to deny. This will override :attr:`mime_type`
         if passed.
+
+    :param sniff_size:
+        If given, only the first `sniff_size` bytes of the file are fetched
+        for determining the MIME type instead of the whole file. The range
+        is widened if libmagic cannot recognize the type from it.
+
+    :param max_sniff_size:
+        The maximum number of bytes fetched when widening the range.
+
+    :param fast_sniff:
+        Whether MIME types of common formats are detected from their
+        signature before falling back to libmagic. See
+        :mod:`pontus.signatures`. With a shared context, signatures are
+        used only if they are enabled for :class:`AmazonS3FileValidator`
+        too.
     """
-    def __init__(self, mime_type=None, regex=None, mime_types=[]):
+    def __init__(
+        self,
+        mime_type=None,
+        regex=None,
+        mime_types=[],
+        sniff_size=None,
+        max_sniff_size=None,
+        fast_sniff=True,
+    ):
         if not (mime_type or regex or mime_types):
             raise ValueError(u'No argument for validation provided.')
         self.mime_types = mime_type or mime_types
         self.regex = regex
+        self._compiled_regex = re.compile(regex) if regex else None
+        self.sniff_size = sniff_size
+        self.max_sniff_size = max_sniff_size
+        self.fast_sniff = fast_sniff
 
-    def __call__(self, obj):
-        """
-        Check MIME type is not in :attr:`mime_types` or matches :attr:`regex`.
-
-        :raises ValidationError: if the file MIME type is invalid.
-        """
-        file_mime_type = force_text(magic.from_buffer(
-            obj.get()['Body'].read(), mime=True
-        ))
-
-        if self.regex and re.search(self.regex, file_mime_type):
+    def _check(self, file_mime_type):
+        if self.regex and self._compiled_regex.search(file_mime_type):
             raise ValidationError(
                 u"File MIME type {mime!s} matches denied regex r'{regex!s}'."
                 .format(
@@ -158,8 +390,189 @@ class DenyMimeType(BaseValidator):
         regex = (
             ' regex={regex!r}'.format(regex=self.regex) if self.regex else ''
         )
-        return '<{cls}{mime_types}{regex}>'.format(
-            cls=self.__class__.__name__, mime_types=mime_types, regex=regex
+        sniff_size = (
+            ' sniff_size={sniff_size!r}, max_sniff_size={max_sniff_size!r}'
+            .format(
+                sniff_size=self.sniff_size,
+                max_sniff_size=self.max_sniff_size
+            )
+            if self.sniff_size else ''
+        )
+        fast_sniff = '' if self.fast_sniff else ' fast_sniff=False'
+        return '<{cls}{mime_types}{regex}{sniff_size}{fast_sniff}>'.format(
+            cls=self.__class__.__name__,
+            mime_types=mime_types,
+            regex=regex,
+            sniff_size=sniff_size,
+            fast_sniff=fast_sniff
+        )
+
+
+def _to_list(values):
+    if not values:
+        return []
+    if isinstance(values, str):
+        return [values]
+    return list(values)
+
+
+def _compile_regex(patterns):
+    # Each pattern is compiled on its own, as joining them into one
+    # alternation would break patterns with inline flags such as `(?i)`.
+    return tuple(re.compile(pattern) for pattern in _to_list(patterns))
+
+
+class MimeTypePolicy(BaseMimeTypeValidator):
+    """Validator for allowing and denying file MIME types with any number of
+    rules at once.
+
+    The rules are compiled once into sets of MIME types and major types and
+    compiled regular expressions, and the decision is memoized per MIME
+    type, so checking a file again takes constant time regardless of the
+    number of rules. The file is sniffed only once for all rules.
+
+    A denying rule always wins. If there are allowing rules, the MIME type
+    has to match one of them.
+
+    Example::
+
+        from pontus.validators import MimeTypePolicy
+
+        MimeTypePolicy(
+            allow=['image/*', 'application/pdf'],
+            deny=['image/svg+xml'],
+            deny_regex=[r'^application/x-ms', r'script'],
+            sniff_size=8192
+        )
+
+
+    :param allow:
+        A MIME type or a list of allowed MIME types. A MIME type ending with
+        ``/*``, such as ``image/*``, allows all MIME types of the major type,
+        and ``*/*`` allows all MIME types.
+
+    :param deny:
+        A MIME type or a list of denied MIME types, with wildcards as in
+        `allow`.
+
+    :param allow_regex:
+        A regular expression or a list of them matching allowed MIME types.
+
+    :param deny_regex:
+        A regular expression or a list of them matching denied MIME types.
+
+    :param sniff_size:
+        See :class:`MimeType`.
+
+    :param max_sniff_size:
+        See :class:`MimeType`.
+
+    :param fast_sniff:
+        See :class:`MimeType`.
+    """
+    #: The maximum number of memoized decisions.
+    max_decisions = 1024
+
+    def __init__(
+        self,
+        allow=None,
+        deny=None,
+        allow_regex=None,
+        deny_regex=None,
+        sniff_size=None,
+        max_sniff_size=None,
+        fast_sniff=True,
+    ):
+        if not (allow or deny or allow_regex or deny_regex):
+            raise ValueError(u'No argument for validation provided.')
+        self.allow = _to_list(allow)
+        self.deny = _to_list(deny)
+        self.allow_regex = allow_regex
+        self.deny_regex = deny_regex
+        self.sniff_size = sniff_size
+        self.max_sniff_size = max_sniff_size
+        self.fast_sniff = fast_sniff
+        self._allowed, self._allowed_major_types, self._allow_all = (
+            self._compile_list(self.allow)
+        )
+        self._denied, self._denied_major_types, self._deny_all = (
+            self._compile_list(self.deny)
+        )
+        self._allowed_regex = _compile_regex(allow_regex)
+        self._denied_regex = _compile_regex(deny_regex)
+        self._has_allow_rules = bool(self.allow or allow_regex)
+        self._decisions = {}
+
+    def _check(self, file_mime_type):
+        error = self.evaluate(file_mime_type)
+        if error:
+            raise ValidationError(error)
+
+    def evaluate(self, mime_type):
+        """
+        Evaluates the policy for a MIME type.
+
+        :return: an error message if the MIME type is invalid, else `None`.
+        """
+        try:
+            return self._decisions[mime_type]
+        except KeyError:
+            pass
+        error = self._decide(mime_type)
+        if len(self._decisions) >= self.max_decisions:
+            self._decisions = {}
+        self._decisions[mime_type] = error
+        return error
+
+    def _decide(self, mime_type):
+        major_type = mime_type.split('/', 1)[0]
+        if (
+            self._deny_all or
+            mime_type in self._denied or
+            major_type in self._denied_major_types or
+            any(regex.search(mime_type) for regex in self._denied_regex)
+        ):
+            return u'File MIME type {mime!s} is denied.'.format(mime=mime_type)
+        if self._has_allow_rules and not (
+            self._allow_all or
+            mime_type in self._allowed or
+            major_type in self._allowed_major_types or
+            any(regex.search(mime_type) for regex in self._allowed_regex)
+        ):
+            return u'File MIME type {mime!s} is not allowed.'.format(
+                mime=mime_type
+            )
+        return None
+
+    def _compile_list(self, mime_types):
+        exact = frozenset(
+            mime_type for mime_type in mime_types
+            if not mime_type.endswith('/*')
+        )
+        major_types = frozenset(
+            mime_type[:-2] for mime_type in mime_types
+            if mime_type.endswith('/*') and mime_type != '*/*'
+        )
+        return exact, major_types, '*/*' in mime_types
+
+    def __repr__(self):
+        rules = ''.join(
+            ' {name!s}={value!r}'.format(name=name, value=value)
+            for name, value in [
+                ('allow', self.allow),
+                ('deny', self.deny),
+                ('allow_regex', self.allow_regex),
+                ('deny_regex', self.deny_regex),
+                ('sniff_size', self.sniff_size),
+                ('max_sniff_size', self.max_sniff_size),
+            ]
+            if value
+        )
+        fast_sniff = '' if self.fast_sniff else ' fast_sniff=False'
+        return '<{cls}{rules}{fast_sniff}>'.format(
+            cls=self.__class__.__name__,
+            rules=rules,
+            fast_sniff=fast_sniff
         )
 
 
@@ -180,6 +593,8 @@ class FileSize(BaseValidator):
         The maximum file size in bytes.
 
     """
+    cost = COST_METADATA
+
     def __init__(self, min=-1, max=-1):
         if not (min != -1 or max != -1):
             raise ValueError(
@@ -207,3 +622,196 @@ class FileSize(BaseValidator):
             min=self.min,
             max=self.max
         )
+
+
+class _ChecksumConsumer(object):
+    def __init__(self, validator, expected):
+        self.validator = validator
+        self.expected = expected
+        self.hash = hashlib.new(validator.algorithm)
+
+    def feed(self, chunk):
+        self.hash.update(chunk)
+
+    def finish(self):
+        self.validator._compare(self.hash.digest(), self.expected)
+
+
+class Checksum(StreamingValidator):
+    """Validator for file checksum.
+
+    The checksum is computed incrementally over the file body, so the file
+    is never held in memory as a whole. It can be compared against a digest
+    given by the client or, for MD5, against the ETag of a file uploaded in
+    a single part.
+
+    If `use_stored_checksum` is enabled and Amazon S3 already stores a
+    checksum of the file that can be compared against `expected` (the ETag
+    for MD5, or an additional checksum stored with the file for SHA-1 and
+    SHA-256), the file body is not read at all.
+
+    Example::
+
+        from pontus.validators import Checksum
+
+        Checksum('sha256', expected='9f86d081884c7d659a2feaa0c55ad015...')
+        # OR, verifying a single-part upload against its ETag
+        Checksum('md5', use_etag=True)
+        # OR, using a checksum stored by Amazon S3 if there is one
+        Checksum('sha256', expected='9f86d...', use_stored_checksum=True)
+
+
+    :param algorithm:
+        The hash algorithm, one of 'md5', 'sha1' and 'sha256'.
+
+    :param expected:
+        The expected digest as a hexadecimal or a base64 encoded string.
+
+    :param use_etag:
+        Whether to compare the MD5 checksum against the ETag of the file.
+        The ETag of a file uploaded in multiple parts or encrypted with
+        SSE-KMS or SSE-C is not an MD5 checksum of the file, so such a file
+        fails validation, unless `allow_unverifiable` is enabled.
+
+    :param allow_unverifiable:
+        Whether to accept files whose ETag is not an MD5 checksum without
+        verifying them when `use_etag` is enabled.
+
+    :param use_stored_checksum:
+        Whether to compare `expected` against a checksum stored by Amazon S3
+        instead of reading the file, when one is available. The ETag and
+        checksums already in the loaded file metadata are used as is. For
+        SHA-1 and SHA-256 the checksum is otherwise fetched with a HEAD
+        request, which is wasted if the file has no stored checksum, so
+        this is disabled by default.
+    """
+    algorithms = ('md5', 'sha1', 'sha256')
+
+    def __init__(
+        self,
+        algorithm='sha256',
+        expected=None,
+        use_etag=False,
+        use_stored_checksum=False,
+        allow_unverifiable=False,
+    ):
+        if algorithm not in self.algorithms:
+            raise ValueError(
+                u'Algorithm must be one of {algorithms!s}.'.format(
+                    algorithms=', '.join(self.algorithms)
+                )
+            )
+        if not (expected or use_etag):
+            raise ValueError(
+                u'At least one of `expected` or `use_etag` must be defined.'
+            )
+        if use_etag and algorithm != 'md5':
+            raise ValueError(u'Argument `use_etag` requires MD5 algorithm.')
+        self.algorithm = algorithm
+        self.expected = expected
+        self.use_etag = use_etag
+        self.use_stored_checksum = use_stored_checksum
+        self.allow_unverifiable = allow_unverifiable
+        if expected:
+            self._expected_digest = self._decode(expected)
+
+    def begin(self, obj):
+        """
+        Starts computing the checksum of the file, or compares a checksum
+        stored by Amazon S3 if possible.
+
+        :raises ValidationError:
+            if the stored checksum does not match, or if the checksum is
+            compared against an ETag that is not an MD5 checksum.
+        """
+        if self.expected:
+            expected = self._expected_digest
+            if self.use_stored_checksum:
+                stored = self._get_stored_digest(obj)
+                if stored is not None:
+                    self._compare(stored, expected)
+                    return None
+        else:
+            expected = self._get_etag_digest(obj)
+            if expected is None:
+                if self.allow_unverifiable:
+                    return None
+                raise ValidationError(
+                    u'File MD5 checksum cannot be verified, as its ETag is '
+                    u'not an MD5 checksum.'
+                )
+        return _ChecksumConsumer(self, expected)
+
+    def _compare(self, actual, expected):
+        if actual != expected:
+            raise ValidationError(
+                u'File {algorithm!s} checksum {actual!s} does not match '
+                u'{expected!s}.'.format(
+                    algorithm=self.algorithm.upper(),
+                    actual=force_text(binascii.hexlify(actual)),
+                    expected=force_text(binascii.hexlify(expected))
+                )
+            )
+
+    def _decode(self, digest):
+        digest_size = hashlib.new(self.algorithm).digest_size
+        try:
+            if len(digest) == digest_size * 2:
+                return binascii.unhexlify(digest)
+            decoded = base64.b64decode(digest)
+        except (TypeError, ValueError):
+            decoded = None
+        if decoded is None or len(decoded) != digest_size:
+            raise ValueError(
+                u'Argument `expected` is not a valid {algorithm!s} '
+                u'digest.'.format(algorithm=self.algorithm.upper())
+            )
+        return decoded
+
+    def _get_etag_digest(self, obj):
+        etag = obj.e_tag.strip('"')
+        if (
+            '-' in etag or
+            obj.server_side_encryption == 'aws:kms' or
+            obj.sse_customer_algorithm
+        ):
+            return None
+        return binascii.unhexlify(etag)
+
+    def _get_stored_digest(self, obj):
+        if self.algorithm == 'md5':
+            return self._get_etag_digest(obj)
+        field = 'Checksum' + self.algorithm.upper()
+        stored = (obj.meta.data or {}).get(field)
+        if stored is None:
+            response = obj.meta.client.head_object(
+                Bucket=obj.bucket_name,
+                Key=obj.key,
+                ChecksumMode='ENABLED'
+            )
+            stored = response.get(field)
+        if not stored or '-' in stored:
+            return None
+        return base64.b64decode(stored)
+
+    def __repr__(self):
+        return '<{cls} algorithm={algorithm!r}>'.format(
+            cls=self.__class__.__name__,
+            algorithm=self.algorithm
+        )
+
+    @property
+    def fingerprint(self):
+        return (
+            '{cls}:{algorithm}:{expected}:{use_etag!r}:'
+            '{allow_unverifiable!r}'
+        ).format(
+            cls=self.__class__.__name__,
+            algorithm=self.algorithm,
+            expected=(
+                force_text(binascii.hexlify(self._expected_digest))
+                if self.expected else ''
+            ),
+            use_etag=self.use_etag,
+            allow_unverifiable=self.allow_unverifiable
+        )
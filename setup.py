@@ -48,8 +48,16 @@ extras_require = {
         'freezegun>=0.1.18',
         'py>=1.4.20',
         'pytest>=2.5.2',
-        'moto[s3]>=4,<5',
-    ]
+        'moto[s3,server]>=4,<5',
+        'prometheus_client',
+        'aiobotocore',
+    ],
+    'async': [
+        'aiobotocore',
+    ],
+    'prometheus': [
+        'prometheus_client',
+    ],
 }
 
 
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+import time
+
+import boto3
+import botocore
+import pytest
+from flexmock import flexmock
+
+from pontus import (
+    AmazonS3BatchDeleter,
+    AmazonS3BulkFileValidator,
+    AmazonS3FileValidator
+)
+from pontus.amazon_s3_batch_deleter import DeleteFailure
+from pontus.exceptions import ValidationError
+
+
+def not_named_fail(obj):
+    if obj.key.endswith('fail.jpg'):
+        raise ValidationError('Invalid.')
+
+
+class TestAmazonS3BatchDeleter(object):
+    @pytest.fixture
+    def key_names(self, bucket):
+        key_names = ['images/%d.jpg' % i for i in range(5)]
+        for key_name in key_names:
+            boto3.resource('s3').Object(bucket.name, key_name).put(Body='test')
+        return key_names
+
+    def test_flush_deletes_added_keys(self, key_names, bucket):
+        deleter = AmazonS3BatchDeleter(bucket)
+        for key_name in key_names[:3]:
+            deleter.add(key_name)
+        assert len(deleter) == 3
+        assert deleter.flush() == []
+        assert len(deleter) == 0
+        assert sorted(obj.key for obj in bucket.objects.all()) == (
+            key_names[3:]
+        )
+
+    def test_sends_full_batches(self, key_names, bucket):
+        deleter = AmazonS3BatchDeleter(bucket, batch_size=2)
+        (
+            flexmock(bucket.meta.client)
+            .should_call('delete_objects')
+            .times(2)
+        )
+        for key_name in key_names:
+            deleter.add(key_name)
+        assert len(deleter) == 1
+        assert [obj.key for obj in bucket.objects.all()] == key_names[4:]
+
+    def test_flush_splits_keys_into_batches(self, key_names, bucket):
+        deleter = AmazonS3BatchDeleter(bucket, batch_size=2)
+        deleter._key_names = list(key_names)
+        (
+            flexmock(bucket.meta.client)
+            .should_call('delete_objects')
+            .times(3)
+        )
+        deleter.flush()
+        assert list(bucket.objects.all()) == []
+
+    def test_flushes_after_interval(self, key_names, bucket):
+        deleter = AmazonS3BatchDeleter(bucket, flush_interval=0.01)
+        deleter.add(key_names[0])
+        for _ in range(100):
+            if not len(deleter):
+                break
+            time.sleep(0.01)
+        assert len(deleter) == 0
+        assert [obj.key for obj in bucket.objects.all()] == key_names[1:]
+
+    def test_reports_failures(self, bucket):
+        deleter = AmazonS3BatchDeleter(bucket)
+        (
+            flexmock(bucket.meta.client)
+            .should_receive('delete_objects')
+            .and_return({'Errors': [{
+                'Key': 'images/0.jpg',
+                'Code': 'AccessDenied',
+                'Message': 'Access Denied',
+            }]})
+        )
+        deleter.add('images/0.jpg')
+        failures = [
+            DeleteFailure('images/0.jpg', 'AccessDenied', 'Access Denied')
+        ]
+        assert deleter.flush() == failures
+        assert deleter.failures == failures
+
+    def test_reports_failed_request_for_every_key(self, key_names, bucket):
+        deleter = AmazonS3BatchDeleter(bucket)
+        error = botocore.exceptions.ClientError(
+            {'Error': {'Code': 'SlowDown', 'Message': 'Please reduce.'}},
+            'DeleteObjects'
+        )
+        (
+            flexmock(bucket.meta.client)
+            .should_receive('delete_objects')
+            .and_raise(error)
+        )
+        for key_name in key_names[:2]:
+            deleter.add(key_name)
+        failures = [
+            DeleteFailure(key_name, 'SlowDown', str(error))
+            for key_name in key_names[:2]
+        ]
+        assert deleter.flush() == failures
+        assert deleter.failures == failures
+        assert len(deleter) == 0
+
+    def test_reports_failed_request_of_interval_flush(self, key_names, bucket):
+        deleter = AmazonS3BatchDeleter(bucket, flush_interval=0.01)
+        (
+            flexmock(bucket.meta.client)
+            .should_receive('delete_objects')
+            .and_raise(RuntimeError('Connection reset.'))
+        )
+        deleter.add(key_names[0])
+        for _ in range(100):
+            if deleter.failures:
+                break
+            time.sleep(0.01)
+        assert deleter.failures == [
+            DeleteFailure(key_names[0], 'RuntimeError', 'Connection reset.')
+        ]
+
+    def test_context_manager_flushes(self, key_names, bucket):
+        with AmazonS3BatchDeleter(bucket) as deleter:
+            deleter.add(key_names[0])
+        assert len(deleter) == 0
+
+    def test_raises_value_error_if_batch_size_is_too_large(self, bucket):
+        with pytest.raises(ValueError) as e:
+            AmazonS3BatchDeleter(bucket, batch_size=1001)
+        assert str(e.value) == (
+            'Argument `batch_size` must be between 1 and 1000.'
+        )
+
+    def test_validator_adds_moved_and_rejected_files(self, bucket):
+        key_names = [
+            'test-unvalidated-uploads/images/ok.jpg',
+            'test-unvalidated-uploads/images/fail.jpg',
+        ]
+        for key_name in key_names:
+            boto3.resource('s3').Object(bucket.name, key_name).put(Body='test')
+        with AmazonS3BatchDeleter(bucket) as deleter:
+            list(AmazonS3BulkFileValidator(
+                key_names=key_names,
+                bucket=bucket,
+                validators=[not_named_fail],
+                deleter=deleter,
+                delete_rejected_file=True
+            ).validate())
+            assert sorted(deleter._key_names) == sorted(key_names)
+        assert [obj.key for obj in bucket.objects.all()] == [
+            'images/ok.jpg'
+        ]
+
+    def test_validator_deletes_rejected_file_without_deleter(self, bucket):
+        key_name = 'test-unvalidated-uploads/images/fail.jpg'
+        boto3.resource('s3').Object(bucket.name, key_name).put(Body='test')
+        validator = AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[not_named_fail],
+            delete_rejected_file=True
+        )
+        assert not validator.validate()
+        assert list(bucket.objects.all()) == []
+
+    def test_validator_keeps_rejected_file_without_unvalidated_prefix(
+        self,
+        bucket
+    ):
+        key_name = 'images/fail.jpg'
+        boto3.resource('s3').Object(bucket.name, key_name).put(Body='test')
+        validator = AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[not_named_fail],
+            delete_rejected_file=True
+        )
+        assert not validator.validate()
+        assert [obj.key for obj in bucket.objects.all()] == [key_name]
+
+    def test_validator_keeps_positional_arguments(self, bucket):
+        key_name = 'test-unvalidated-uploads/images/fail.jpg'
+        boto3.resource('s3').Object(bucket.name, key_name).put(Body='test')
+        validator = AmazonS3FileValidator(
+            key_name,
+            bucket,
+            [not_named_fail],
+            True,
+            'validated/',
+            'private'
+        )
+        assert validator.new_file_prefix == 'validated/'
+        assert validator.new_file_acl == 'private'
+        assert not validator.delete_rejected_file
+        assert validator.deleter is None
+        assert not validator.validate()
+        assert [obj.key for obj in bucket.objects.all()] == [key_name]
+
+    def test_validator_raises_value_error_if_deleter_bucket_differs(
+        self,
+        bucket
+    ):
+        boto3.resource('s3').Object(bucket.name, 'a.jpg').put(Body='test')
+        other_bucket = boto3.resource('s3').Bucket('other-bucket')
+        other_bucket.create()
+        with pytest.raises(ValueError) as e:
+            AmazonS3FileValidator(
+                key_name='a.jpg',
+                bucket=bucket,
+                deleter=AmazonS3BatchDeleter(other_bucket)
+            )
+        assert str(e.value) == (
+            "Argument `deleter` must delete from the bucket 'test-bucket'."
+        )
+
+    def test_repr(self, bucket):
+        deleter = AmazonS3BatchDeleter(bucket)
+        deleter.add('a.jpg')
+        assert repr(deleter) == (
+            "<AmazonS3BatchDeleter bucket='test-bucket' pending=1>"
+        )
+        deleter._take()
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import boto3
+import botocore
+import pytest
+from flexmock import flexmock
+
+from pontus import AmazonS3BulkFileValidator
+from pontus.amazon_s3_file_validator import AmazonS3FileValidator
+from pontus.amazon_s3_bulk_file_validator import BulkValidationResult
+from pontus.exceptions import ValidationError
+
+
+def not_named_fail(obj):
+    if obj.key.endswith('fail.jpg'):
+        raise ValidationError('Invalid.')
+
+
+class TestAmazonS3BulkFileValidator(object):
+    @pytest.fixture
+    def key_names(self, bucket):
+        key_names = [
+            'test-unvalidated-uploads/images/%d.jpg' % i for i in range(5)
+        ] + ['test-unvalidated-uploads/images/fail.jpg']
+        for key_name in key_names:
+            boto3.resource('s3').Object(bucket.name, key_name).put(Body='test')
+        return key_names
+
+    def test_validate_returns_result_for_every_key(self, key_names, bucket):
+        validator = AmazonS3BulkFileValidator(
+            key_names=key_names,
+            bucket=bucket,
+            validators=[not_named_fail],
+            max_workers=3
+        )
+        results = sorted(validator.validate())
+        assert results == sorted(
+            [
+                BulkValidationResult(
+                    'test-unvalidated-uploads/images/%d.jpg' % i,
+                    True,
+                    [],
+                    'images/%d.jpg' % i
+                )
+                for i in range(5)
+            ] + [
+                BulkValidationResult(
+                    'test-unvalidated-uploads/images/fail.jpg',
+                    False,
+                    ['Invalid.'],
+                    None
+                )
+            ]
+        )
+
+    def test_validate_moves_valid_files(self, key_names, bucket):
+        validator = AmazonS3BulkFileValidator(
+            key_names=key_names,
+            bucket=bucket,
+            validators=[not_named_fail]
+        )
+        list(validator.validate())
+        assert sorted(obj.key for obj in bucket.objects.all()) == (
+            ['images/%d.jpg' % i for i in range(5)] +
+            ['test-unvalidated-uploads/images/fail.jpg']
+        )
+
+    def test_validate_reports_missing_files(self, bucket):
+        validator = AmazonS3BulkFileValidator(
+            key_names=['does_not_exist.jpg'],
+            bucket=bucket
+        )
+        assert list(validator.validate()) == [
+            BulkValidationResult(
+                'does_not_exist.jpg',
+                False,
+                ['File does_not_exist.jpg was not found.'],
+                None
+            )
+        ]
+
+    def test_validate_reports_exceptions_per_key(self, key_names, bucket):
+        error = RuntimeError('Validator crashed.')
+
+        def crash_on_fail(obj):
+            if obj.key.endswith('fail.jpg'):
+                raise error
+
+        validator = AmazonS3BulkFileValidator(
+            key_names=key_names,
+            bucket=bucket,
+            validators=[crash_on_fail]
+        )
+        results = dict(
+            (result.key_name, result) for result in validator.validate()
+        )
+        assert len(results) == len(key_names)
+        assert results['test-unvalidated-uploads/images/fail.jpg'] == (
+            BulkValidationResult(
+                'test-unvalidated-uploads/images/fail.jpg',
+                False,
+                ['Validator crashed.'],
+                None,
+                error
+            )
+        )
+        assert all(
+            results[key_name].is_valid for key_name in key_names[:5]
+        )
+
+    def test_validate_reports_client_errors_per_key(self, key_names, bucket):
+        error = botocore.exceptions.ClientError(
+            {'Error': {'Code': 'AccessDenied', 'Message': 'Access Denied'}},
+            'HeadObject'
+        )
+        validator = AmazonS3BulkFileValidator(
+            key_names=key_names[-1:],
+            bucket=bucket
+        )
+        flexmock(AmazonS3FileValidator).should_receive('_load').and_raise(
+            error
+        )
+        [result] = list(validator.validate())
+        assert result.is_valid is False
+        assert result.exception is error
+        assert result.new_key_name is None
+
+    def test_validate_runs_validators_in_worker_threads(
+        self,
+        key_names,
+        bucket
+    ):
+        thread_names = set()
+
+        def record_thread(obj):
+            thread_names.add(threading.current_thread().name)
+
+        validator = AmazonS3BulkFileValidator(
+            key_names=key_names,
+            bucket=bucket,
+            validators=[record_thread]
+        )
+        list(validator.validate())
+        assert threading.current_thread().name not in thread_names
+
+    def test_validate_uses_given_config(self, key_names, bucket):
+        validator = AmazonS3BulkFileValidator(
+            key_names=key_names[:1],
+            bucket=bucket,
+            config={'AWS_UNVALIDATED_PREFIX': 'test-unvalidated-uploads/images/'}
+        )
+        assert [result.new_key_name for result in validator.validate()] == [
+            '0.jpg'
+        ]
+
+    def test_repr(self, bucket):
+        assert repr(AmazonS3BulkFileValidator(['a.jpg'], bucket)) == (
+            "<AmazonS3BulkFileValidator key_names=['a.jpg']>"
+        )
@@ -6,7 +6,18 @@ from flexmock import flexmock
 
 from pontus import AmazonS3FileValidator
 from pontus.exceptions import FileNotFoundError, ValidationError
-from pontus.validators import BaseValidator
+from pontus.move_strategies import ServerSideCopy
+from pontus.validation_context import ValidationContext
+from pontus.validators import (
+    COST_FULL_READ,
+    COST_METADATA,
+    COST_RANGED_READ,
+    BaseValidator,
+    DenyMimeType,
+    FileSize,
+    MimeType,
+    StreamingValidator
+)
 
 HOUR_IN_SECONDS = 60 * 60
 
@@ -193,3 +204,364 @@ class TestAmazonS3FileValidator(object):
             "<AmazonS3FileValidator " +
             "key='test-unvalidated-uploads/images/hello.jpg'>"
         )
+
+    def test_validate_passes_context_to_validators_using_it(
+        self,
+        amazon_s3_file_validator
+    ):
+        def validator(obj, context):
+            assert isinstance(context, ValidationContext)
+            assert context.obj is obj
+
+        validator.uses_context = True
+        amazon_s3_file_validator.validators = [validator]
+        assert amazon_s3_file_validator.validate()
+
+    def test_validate_downloads_file_once_for_all_validators(
+        self,
+        amazon_s3_file_validator
+    ):
+        amazon_s3_file_validator.validators = [
+            MimeType('text/plain'),
+            DenyMimeType('image/jpeg'),
+        ]
+        flexmock(amazon_s3_file_validator.obj).should_call('get').once()
+        assert amazon_s3_file_validator.validate()
+
+    def test_lazy_load_does_not_load_file_on_init(self, bucket):
+        key_name = 'test-unvalidated-uploads/images/hello.jpg'
+        boto3.resource('s3').Object(bucket.name, key_name).put(Body='test')
+        validator = AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            lazy_load=True
+        )
+        assert validator.obj.meta.data is None
+
+    def test_lazy_load_uses_metadata_of_first_get(self, bucket):
+        key_name = 'test-unvalidated-uploads/images/hello.jpg'
+        boto3.resource('s3').Object(bucket.name, key_name).put(
+            Body='test',
+            ContentType='application/custom.test',
+        )
+        validator = AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[MimeType('text/plain', sniff_size=2)],
+            new_file_prefix='validated/',
+            lazy_load=True
+        )
+        flexmock(validator.obj).should_receive('load').never()
+        assert validator.validate()
+        assert validator.obj.key == 'validated/images/hello.jpg'
+        assert validator.obj.content_type == 'application/custom.test'
+
+    def test_lazy_load_fills_in_total_content_length(self, bucket):
+        key_name = 'images/hello.jpg'
+        boto3.resource('s3').Object(bucket.name, key_name).put(Body='test')
+        validator = AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[MimeType('text/plain', sniff_size=2)],
+            lazy_load=True
+        )
+        validator.validate()
+        assert validator.obj.content_length == 4
+
+    def test_lazy_load_loads_file_if_no_validator_did(self, bucket):
+        key_name = 'images/hello.jpg'
+        boto3.resource('s3').Object(bucket.name, key_name).put(Body='test')
+        validator = AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            lazy_load=True
+        )
+        flexmock(validator.obj).should_call('load').once()
+        assert validator.validate()
+
+    @pytest.mark.parametrize(('validators', 'fail_fast', 'requests'), [
+        (
+            [MimeType('text/plain', sniff_size=2), FileSize(max=10)],
+            False,
+            ['GetObject', 'CopyObject', 'DeleteObject'],
+        ),
+        (
+            [FileSize(max=10), MimeType('text/plain', sniff_size=2)],
+            False,
+            ['GetObject', 'CopyObject', 'DeleteObject'],
+        ),
+        (
+            [FileSize(max=10), MimeType('text/plain')],
+            False,
+            ['GetObject', 'CopyObject', 'DeleteObject'],
+        ),
+        (
+            [MimeType('text/plain', sniff_size=2), FileSize(max=10)],
+            True,
+            ['HeadObject', 'GetObject', 'CopyObject', 'DeleteObject'],
+        ),
+    ])
+    def test_lazy_load_counts_requests_of_mixed_validators(
+        self,
+        bucket,
+        validators,
+        fail_fast,
+        requests
+    ):
+        key_name = 'test-unvalidated-uploads/images/hello.jpg'
+        boto3.resource('s3').Object(bucket.name, key_name).put(Body='test')
+        validator = AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=validators,
+            move_strategy=ServerSideCopy(),
+            lazy_load=True,
+            fail_fast=fail_fast
+        )
+        made_requests = []
+        validator.obj.meta.client.meta.events.register(
+            'before-call.s3',
+            lambda model, **kwargs: made_requests.append(model.name)
+        )
+        assert validator.validate()
+        assert made_requests == requests
+
+    @pytest.mark.parametrize('validators', [
+        [],
+        [MimeType('image/jpeg')],
+        [lambda obj: obj.content_length],
+    ])
+    def test_lazy_load_throws_error_if_file_not_found(
+        self,
+        bucket,
+        validators
+    ):
+        validator = AmazonS3FileValidator(
+            key_name='does_not_exist.jpg',
+            bucket=bucket,
+            validators=validators,
+            lazy_load=True
+        )
+        with pytest.raises(FileNotFoundError):
+            validator.validate()
+
+
+class ChunkRecorder(StreamingValidator):
+    def __init__(self, fail_at=None, reject=None):
+        self.chunks = []
+        self.finished = False
+        self.fail_at = fail_at
+        self.reject = reject
+
+    def begin(self, obj):
+        if self.reject is not None:
+            raise ValidationError(self.reject)
+        return self
+
+    def feed(self, chunk):
+        self.chunks.append(chunk)
+        if self.fail_at is not None and len(self.chunks) == self.fail_at:
+            raise ValidationError('Failed at chunk %d.' % self.fail_at)
+
+    def finish(self):
+        self.finished = True
+
+
+class TestAmazonS3FileValidatorStreaming(object):
+    @pytest.fixture
+    def key_name(self, bucket):
+        key_name = 'images/hello.jpg'
+        boto3.resource('s3').Object(bucket.name, key_name).put(
+            Body=b'0123456789'
+        )
+        return key_name
+
+    def test_streams_body_once_to_all_streaming_validators(
+        self,
+        key_name,
+        bucket
+    ):
+        first = ChunkRecorder()
+        second = ChunkRecorder()
+        validator = AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[first, second],
+            streaming=True,
+            chunk_size=4
+        )
+        flexmock(validator.obj).should_call('get').once()
+        assert validator.validate()
+        assert first.chunks == [b'0123', b'4567', b'89']
+        assert second.chunks == [b'0123', b'4567', b'89']
+        assert first.finished and second.finished
+
+    def test_stops_reading_when_a_streaming_validator_fails(
+        self,
+        key_name,
+        bucket
+    ):
+        failing = ChunkRecorder(fail_at=1)
+        other = ChunkRecorder()
+        validator = AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[failing, other],
+            streaming=True,
+            chunk_size=4
+        )
+        assert not validator.validate()
+        assert validator.errors == ['Failed at chunk 1.']
+        assert other.chunks == []
+        assert not other.finished
+
+    def test_first_chunk_is_shared_with_other_validators(
+        self,
+        key_name,
+        bucket
+    ):
+        recorder = ChunkRecorder()
+        validator = AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[recorder, MimeType('text/plain')],
+            streaming=True,
+            chunk_size=4
+        )
+        obj = flexmock(validator.obj)
+        obj.should_call('get').with_args().once()
+        obj.should_call('get').with_args(Range='bytes=4-').once()
+        assert validator.validate()
+
+    def test_collects_errors_of_all_rejecting_validators(
+        self,
+        key_name,
+        bucket
+    ):
+        first = ChunkRecorder(reject='First rejected.')
+        second = ChunkRecorder(reject='Second rejected.')
+        recorder = ChunkRecorder()
+        validator = AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[first, recorder, second],
+            streaming=True,
+            chunk_size=4
+        )
+        assert not validator.validate()
+        assert validator.errors == ['First rejected.', 'Second rejected.']
+        assert recorder.chunks == [b'0123', b'4567', b'89']
+        assert recorder.finished
+
+    def test_body_fitting_in_one_chunk_is_shared(self, key_name, bucket):
+        recorder = ChunkRecorder()
+        validator = AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[recorder, MimeType('text/plain')],
+            streaming=True,
+            chunk_size=16
+        )
+        flexmock(validator.obj).should_call('get').once()
+        assert validator.validate()
+        assert recorder.chunks == [b'0123456789']
+
+    def test_stream_does_not_fetch_prefix_again(self, key_name, bucket):
+        recorder = ChunkRecorder()
+        validator = AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[recorder, MimeType('text/plain', sniff_size=2)],
+            streaming=True,
+            chunk_size=4
+        )
+        obj = flexmock(validator.obj)
+        obj.should_call('get').with_args(Range='bytes=0-1').once()
+        obj.should_call('get').with_args(Range='bytes=2-').once()
+        assert validator.validate()
+        assert b''.join(recorder.chunks) == b'0123456789'
+
+    def test_streaming_validator_reads_body_by_itself(self, key_name, bucket):
+        recorder = ChunkRecorder()
+        recorder.chunk_size = 6
+        recorder(bucket.Object(key_name))
+        assert recorder.chunks == [b'012345', b'6789']
+        assert recorder.finished
+
+
+class TestAmazonS3FileValidatorScheduling(object):
+    @pytest.fixture
+    def key_name(self, bucket):
+        key_name = 'images/hello.jpg'
+        boto3.resource('s3').Object(bucket.name, key_name).put(Body='test')
+        return key_name
+
+    def record(self, calls, name, cost, error=None):
+        def validator(obj):
+            calls.append(name)
+            if error:
+                raise ValidationError(error)
+
+        validator.cost = cost
+        return validator
+
+    def test_runs_cheap_validators_first(self, key_name, bucket):
+        calls = []
+        validator = AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[
+                self.record(calls, 'full', COST_FULL_READ),
+                self.record(calls, 'ranged', COST_RANGED_READ),
+                self.record(calls, 'metadata', COST_METADATA),
+                self.record(calls, 'other metadata', COST_METADATA),
+            ]
+        )
+        validator.validate()
+        assert calls == ['metadata', 'other metadata', 'ranged', 'full']
+
+    def test_collects_all_errors_in_validator_order(self, key_name, bucket):
+        calls = []
+        validator = AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[
+                self.record(calls, 'full', COST_FULL_READ, 'Full.'),
+                self.record(calls, 'metadata', COST_METADATA, 'Metadata.'),
+            ]
+        )
+        assert not validator.validate()
+        assert validator.errors == ['Full.', 'Metadata.']
+
+    def test_fail_fast_skips_validators_after_first_error(
+        self,
+        key_name,
+        bucket
+    ):
+        calls = []
+        validator = AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[
+                MimeType('text/plain'),
+                FileSize(max=1),
+                self.record(calls, 'metadata', COST_METADATA),
+            ],
+            fail_fast=True
+        )
+        flexmock(validator.obj).should_receive('get').never()
+        assert not validator.validate()
+        assert validator.errors == ['File is bigger than 1 bytes.']
+        assert calls == []
+
+    def test_fail_fast_skips_stream(self, key_name, bucket):
+        recorder = ChunkRecorder()
+        validator = AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[recorder, FileSize(max=1)],
+            streaming=True,
+            fail_fast=True
+        )
+        assert not validator.validate()
+        assert recorder.chunks == []
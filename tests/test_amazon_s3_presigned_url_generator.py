@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+from urllib.parse import parse_qs, urlsplit
+
+import boto3
+import freezegun
+import pytest
+from botocore.config import Config
+from flexmock import flexmock
+
+from pontus import AmazonS3PresignedUrlGenerator
+
+
+def parse_url(url):
+    parts = urlsplit(url)
+    return parts.scheme, parts.netloc, parts.path, parse_qs(parts.query)
+
+
+class TestAmazonS3PresignedUrlGenerator(object):
+    @pytest.fixture
+    def session(self):
+        return boto3.session.Session(
+            aws_access_key_id='test-key',
+            aws_secret_access_key='test-secret-key',
+            region_name='eu-west-1',
+        )
+
+    @pytest.fixture
+    def generator(self, bucket, session):
+        return AmazonS3PresignedUrlGenerator(
+            bucket=bucket,
+            session=session,
+            expires_in=300
+        )
+
+    def get_botocore_url(self, session, addressing_style, *args, **kwargs):
+        client = session.client('s3', config=Config(
+            signature_version='s3v4',
+            s3={'addressing_style': addressing_style}
+        ))
+        return client.generate_presigned_url(*args, **kwargs)
+
+    @pytest.mark.parametrize('region_name', ['us-east-1', 'eu-west-1'])
+    @pytest.mark.parametrize('addressing_style', ['virtual', 'path'])
+    @pytest.mark.parametrize('key_name', [
+        u'file_name.png',
+        u'a b/k\xe4\xe4nn\xf6s+~(1).txt',
+    ])
+    @freezegun.freeze_time('2013-05-24 10:20:30')
+    def test_get_url_matches_botocore(
+        self,
+        bucket,
+        region_name,
+        addressing_style,
+        key_name
+    ):
+        session = boto3.session.Session(
+            aws_access_key_id='test-key',
+            aws_secret_access_key='test-secret-key',
+            region_name=region_name,
+        )
+        generator = AmazonS3PresignedUrlGenerator(
+            bucket=bucket,
+            session=session,
+            expires_in=300,
+            addressing_style=addressing_style
+        )
+        assert parse_url(generator.generate_url(key_name)) == parse_url(
+            self.get_botocore_url(
+                session,
+                addressing_style,
+                'get_object',
+                Params={'Bucket': bucket.name, 'Key': key_name},
+                ExpiresIn=300
+            )
+        )
+
+    @freezegun.freeze_time('2013-05-24 10:20:30')
+    def test_put_url_with_signed_headers_matches_botocore(
+        self,
+        generator,
+        bucket,
+        session
+    ):
+        url = generator.generate_url(
+            u'file_name.png',
+            method='PUT',
+            expires_in=60,
+            headers={'Content-Type': 'image/png'}
+        )
+        assert parse_url(url) == parse_url(self.get_botocore_url(
+            session,
+            'virtual',
+            'put_object',
+            Params={
+                'Bucket': bucket.name,
+                'Key': u'file_name.png',
+                'ContentType': 'image/png',
+            },
+            ExpiresIn=60
+        ))
+
+    @freezegun.freeze_time('2013-05-24 10:20:30')
+    def test_url_with_params_and_session_token_matches_botocore(
+        self,
+        bucket
+    ):
+        session = boto3.session.Session(
+            aws_access_key_id='test-key',
+            aws_secret_access_key='test-secret-key',
+            aws_session_token='test/session+token=',
+            region_name='us-east-1',
+        )
+        generator = AmazonS3PresignedUrlGenerator(
+            bucket=bucket,
+            session=session
+        )
+        url = generator.generate_url(
+            u'file_name.png',
+            params={
+                'response-content-disposition': (
+                    'attachment; filename="file name.png"'
+                ),
+            }
+        )
+        assert parse_url(url) == parse_url(self.get_botocore_url(
+            session,
+            'virtual',
+            'get_object',
+            Params={
+                'Bucket': bucket.name,
+                'Key': u'file_name.png',
+                'ResponseContentDisposition': (
+                    'attachment; filename="file name.png"'
+                ),
+            },
+            ExpiresIn=3600
+        ))
+
+    @freezegun.freeze_time('2013-05-24 10:20:30')
+    def test_generate_urls(self, generator):
+        key_names = [u'file_name.png', u'file_name.pdf']
+        assert generator.generate_urls(key_names) == [
+            generator.generate_url(key_name) for key_name in key_names
+        ]
+
+    def test_generate_urls_gets_signing_key_once(self, generator):
+        flexmock(generator).should_call('_get_signing_key').once()
+        generator.generate_urls([u'file_name.png', u'file_name.pdf'])
+
+    def test_endpoint_url(self, bucket, session):
+        generator = AmazonS3PresignedUrlGenerator(
+            bucket=bucket,
+            session=session,
+            addressing_style='path',
+            endpoint_url='http://localhost:9000/'
+        )
+        scheme, host, path, _ = parse_url(
+            generator.generate_url(u'file_name.png')
+        )
+        assert (scheme, host, path) == (
+            'http',
+            'localhost:9000',
+            '/test-bucket/file_name.png'
+        )
+
+    def test_raises_value_error_for_unknown_addressing_style(
+        self,
+        bucket,
+        session
+    ):
+        with pytest.raises(ValueError) as e:
+            AmazonS3PresignedUrlGenerator(
+                bucket=bucket,
+                session=session,
+                addressing_style='auto'
+            )
+        assert str(e.value) == (
+            'Argument `addressing_style` must be one of virtual, path.'
+        )
+
+    def test_repr(self, generator):
+        assert repr(generator) == (
+            "<AmazonS3PresignedUrlGenerator bucket='test-bucket'>"
+        )
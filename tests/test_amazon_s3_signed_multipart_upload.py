@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+import uuid
+
+import boto3
+import pytest
+import requests
+from flexmock import flexmock
+
+from pontus import AmazonS3SignedMultipartUpload
+from pontus.amazon_s3_signed_multipart_upload import DEFAULT_PART_SIZE
+from pontus.move_strategies import MAX_PARTS, MIN_PART_SIZE
+
+COMPLETE_MULTIPART_UPLOAD = (
+    u'<CompleteMultipartUpload>{parts}</CompleteMultipartUpload>'
+)
+PART = u'<Part><PartNumber>{part_number}</PartNumber><ETag>{etag}</ETag></Part>'
+
+
+class TestAmazonS3SignedMultipartUpload(object):
+    @pytest.fixture
+    def body(self):
+        return b'0123456789' * (MIN_PART_SIZE // 5 + 1)
+
+    @pytest.fixture
+    def signed_upload(self, bucket, body):
+        return AmazonS3SignedMultipartUpload(
+            key_name=u'video.mp4',
+            mime_type=u'video/mp4',
+            content_length=len(body),
+            bucket=bucket,
+            acl='private',
+            part_size=MIN_PART_SIZE,
+            tags={'pontus-validated': 'false'}
+        )
+
+    def test_key(self, signed_upload):
+        assert signed_upload.key_name == (
+            'test-unvalidated-uploads/video.mp4'
+        )
+
+    def test_randomized_key(self, bucket):
+        flexmock(uuid).should_receive('uuid4').and_return(u'random-string')
+        signed_upload = AmazonS3SignedMultipartUpload(
+            key_name=u'video.mp4',
+            mime_type=u'video/mp4',
+            content_length=1,
+            bucket=bucket,
+            randomize=True
+        )
+        assert signed_upload.key_name == (
+            'test-unvalidated-uploads/random-string/video.mp4'
+        )
+
+    def test_create_signs_all_parts(self, signed_upload, body):
+        upload = signed_upload.create()
+        assert upload['key'] == signed_upload.key_name
+        assert upload['part_size'] == MIN_PART_SIZE
+        assert [
+            (part['part_number'], part['content_length'])
+            for part in upload['parts']
+        ] == [
+            (1, MIN_PART_SIZE),
+            (2, MIN_PART_SIZE),
+            (3, len(body) - 2 * MIN_PART_SIZE),
+        ]
+        assert 'partNumber=2' in upload['parts'][1]['url']
+        assert upload['upload_id'] in upload['complete_url']
+        assert upload['upload_id'] in upload['abort_url']
+
+    def test_client_can_upload_parts_and_complete(
+        self,
+        signed_upload,
+        body,
+        bucket
+    ):
+        upload = signed_upload.create()
+        parts = []
+        for part in reversed(upload['parts']):
+            start = (part['part_number'] - 1) * upload['part_size']
+            response = requests.put(
+                part['url'],
+                data=body[start:start + part['content_length']]
+            )
+            assert response.status_code == 200
+            parts.append(PART.format(
+                part_number=part['part_number'],
+                etag=response.headers['ETag']
+            ))
+        response = requests.post(
+            upload['complete_url'],
+            data=COMPLETE_MULTIPART_UPLOAD.format(
+                parts=u''.join(reversed(parts))
+            )
+        )
+        assert response.status_code == 200
+
+        obj = boto3.resource('s3').Object(bucket.name, upload['key'])
+        assert obj.get()['Body'].read() == body
+        assert obj.content_type == 'video/mp4'
+        assert bucket.meta.client.get_object_tagging(
+            Bucket=bucket.name,
+            Key=upload['key']
+        )['TagSet'] == [{'Key': 'pontus-validated', 'Value': 'false'}]
+
+    def test_client_can_abort(self, signed_upload, bucket):
+        upload = signed_upload.create()
+        response = requests.delete(upload['abort_url'])
+        assert response.status_code == 204
+        assert bucket.meta.client.list_multipart_uploads(
+            Bucket=bucket.name
+        ).get('Uploads', []) == []
+
+    def test_get_part_url_signs_single_part(self, signed_upload):
+        url = signed_upload.get_part_url('upload-id', 3)
+        assert 'partNumber=3' in url
+        assert 'uploadId=upload-id' in url
+
+    @pytest.mark.parametrize('part_number', [0, 4])
+    def test_get_part_url_raises_value_error_for_invalid_part(
+        self,
+        signed_upload,
+        part_number
+    ):
+        with pytest.raises(ValueError) as e:
+            signed_upload.get_part_url('upload-id', part_number)
+        assert str(e.value) == (
+            'Argument `part_number` must be between 1 and 3.'
+        )
+
+    def test_uses_default_part_size(self, bucket):
+        signed_upload = AmazonS3SignedMultipartUpload(
+            key_name=u'video.mp4',
+            mime_type=u'video/mp4',
+            content_length=DEFAULT_PART_SIZE * 3,
+            bucket=bucket
+        )
+        assert signed_upload.part_size == DEFAULT_PART_SIZE
+        assert signed_upload.part_count == 3
+
+    def test_increases_part_size_to_fit_max_parts(self, bucket):
+        signed_upload = AmazonS3SignedMultipartUpload(
+            key_name=u'video.mp4',
+            mime_type=u'video/mp4',
+            content_length=DEFAULT_PART_SIZE * MAX_PARTS + 1,
+            bucket=bucket
+        )
+        assert signed_upload.part_size == DEFAULT_PART_SIZE + 1024 ** 2
+        assert signed_upload.part_count <= MAX_PARTS
+
+    def test_raises_value_error_if_part_size_is_too_small(self, bucket):
+        with pytest.raises(ValueError) as e:
+            AmazonS3SignedMultipartUpload(
+                key_name=u'video.mp4',
+                mime_type=u'video/mp4',
+                content_length=1,
+                bucket=bucket,
+                part_size=MIN_PART_SIZE - 1
+            )
+        assert str(e.value) == 'Argument `part_size` must be at least 5242880.'
+
+    @pytest.mark.parametrize('content_length', [0, 1025])
+    def test_raises_value_error_if_content_length_is_out_of_range(
+        self,
+        bucket,
+        content_length
+    ):
+        with pytest.raises(ValueError) as e:
+            AmazonS3SignedMultipartUpload(
+                key_name=u'video.mp4',
+                mime_type=u'video/mp4',
+                content_length=content_length,
+                bucket=bucket,
+                max_content_length=1024
+            )
+        assert str(e.value) == (
+            'Argument `content_length` must be between 1 and 1024.'
+        )
+
+    def test_repr(self, signed_upload):
+        assert repr(signed_upload) == (
+            "<AmazonS3SignedMultipartUpload "
+            "key_name='test-unvalidated-uploads/video.mp4'>"
+        )
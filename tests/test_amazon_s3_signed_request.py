@@ -8,7 +8,8 @@ import pytest
 from flexmock import flexmock
 from datetime import date, datetime
 
-from pontus import AmazonS3SignedRequest
+from pontus import AmazonS3SignedRequest, extension
+from pontus.amazon_s3_signed_request import SigningKeyCache, signing_key_cache
 from pontus._compat import force_text
 
 HOUR_IN_SECONDS = 60 * 60
@@ -106,3 +107,205 @@ class TestAmazonS3SignedRequest(object):
         assert signed_request.key_name == (
             'test-unvalidated-uploads/random-string/file_name.png'
         )
+
+    def test_get_signing_key_is_cached(self, signed_request):
+        signing_key_cache.clear()
+        signing_key = signed_request._get_signing_key(date(2013, 1, 3))
+        (
+            flexmock(signed_request)
+            .should_receive('_derive_signing_key')
+            .never()
+        )
+        assert signed_request._get_signing_key(date(2013, 1, 3)) == signing_key
+
+    def test_get_signing_key_is_derived_again_for_new_credentials(
+        self,
+        signed_request,
+        bucket
+    ):
+        signing_key_cache.clear()
+        signing_key = signed_request._get_signing_key(date(2013, 1, 3))
+        signed_request.session = boto3.session.Session(
+            aws_access_key_id='test-key',
+            aws_secret_access_key='rotated-secret-key',
+            region_name='us-east-1',
+        )
+        assert signed_request._get_signing_key(date(2013, 1, 3)) != (
+            signing_key
+        )
+
+    @freezegun.freeze_time('2007-12-01 12:05:37.572123')
+    def test_form_fields_for_many(self, signed_request, bucket):
+        other_request = AmazonS3SignedRequest(
+            key_name='file_name.pdf',
+            mime_type='application/pdf',
+            bucket=bucket,
+            acl='public-read',
+            expires_in=HOUR_IN_SECONDS,
+            session=signed_request.session,
+        )
+        assert AmazonS3SignedRequest.form_fields_for_many(
+            [
+                ('file_name.png', 'image/png'),
+                ('file_name.pdf', 'application/pdf', {'acl': 'public-read'}),
+            ],
+            bucket=bucket,
+            session=signed_request.session,
+            acl='private',
+            expires_in=HOUR_IN_SECONDS,
+        ) == [signed_request.form_fields, other_request.form_fields]
+
+    def test_form_fields_for_many_derives_signing_key_once(
+        self,
+        signed_request,
+        bucket
+    ):
+        signing_key_cache.clear()
+        (
+            flexmock(AmazonS3SignedRequest)
+            .should_call('_derive_signing_key')
+            .once()
+        )
+        fields = AmazonS3SignedRequest.form_fields_for_many(
+            [('file_%d.png' % i, 'image/png') for i in range(10)],
+            bucket=bucket,
+            session=signed_request.session,
+        )
+        assert len(fields) == 10
+        assert len(set(field['x-amz-date'] for field in fields)) == 1
+
+    def test_form_fields_for_many_resolves_shared_options_once(
+        self,
+        signed_request,
+        bucket
+    ):
+        flexmock(extension).should_call('get_config').once()
+        flexmock(extension).should_call('get_state').once()
+        fields = AmazonS3SignedRequest.form_fields_for_many(
+            [('file_%d.png' % i, 'image/png') for i in range(10)],
+            bucket=bucket,
+            session=signed_request.session,
+        )
+        assert [field['key'] for field in fields] == [
+            'test-unvalidated-uploads/file_%d.png' % i for i in range(10)
+        ]
+
+    @pytest.mark.parametrize('name', ['bucket', 'session', 'config'])
+    def test_form_fields_for_many_raises_value_error_for_shared_option(
+        self,
+        signed_request,
+        bucket,
+        name
+    ):
+        with pytest.raises(ValueError) as e:
+            AmazonS3SignedRequest.form_fields_for_many(
+                [('file_name.png', 'image/png', {name: None})],
+                bucket=bucket,
+                session=signed_request.session,
+            )
+        assert str(e.value) == (
+            'Argument `%s` cannot be given per file in `uploads`.' % name
+        )
+
+    def test_form_fields_for_many_creates_subclass_instances(
+        self,
+        signed_request,
+        bucket
+    ):
+        class PrivateSignedRequest(AmazonS3SignedRequest):
+            def __init__(self, key_name, mime_type, **kwargs):
+                kwargs['acl'] = 'private'
+                super(PrivateSignedRequest, self).__init__(
+                    key_name,
+                    mime_type,
+                    **kwargs
+                )
+
+        fields = PrivateSignedRequest.form_fields_for_many(
+            [('file_name.png', 'image/png', {'acl': 'public-read'})],
+            bucket=bucket,
+            session=signed_request.session,
+        )
+        assert fields[0]['acl'] == 'private'
+
+    def test_form_fields_for_many_without_uploads(self, signed_request, bucket):
+        assert AmazonS3SignedRequest.form_fields_for_many(
+            [],
+            bucket=bucket,
+            session=signed_request.session,
+        ) == []
+
+
+class TestSigningKeyCache(object):
+    def test_returns_cached_key(self):
+        cache = SigningKeyCache()
+        assert cache.get('secret', '20130103', 'us-east-1', 's3', lambda: 'a') == 'a'
+        assert cache.get('secret', '20130103', 'us-east-1', 's3', lambda: 'b') == 'a'
+
+    def test_keys_on_secret_region_and_service(self):
+        cache = SigningKeyCache()
+        cache.get('secret', '20130103', 'us-east-1', 's3', lambda: 'a')
+        assert cache.get('other', '20130103', 'us-east-1', 's3', lambda: 'b') == 'b'
+        assert cache.get('secret', '20130103', 'eu-west-1', 's3', lambda: 'c') == 'c'
+        assert cache.get('secret', '20130103', 'us-east-1', 'sts', lambda: 'd') == 'd'
+        assert len(cache) == 4
+
+    def test_evicts_keys_of_earlier_dates(self):
+        cache = SigningKeyCache()
+        cache.get('secret', '20130103', 'us-east-1', 's3', lambda: 'a')
+        cache.get('other', '20130103', 'us-east-1', 's3', lambda: 'b')
+        cache.get('secret', '20130104', 'us-east-1', 's3', lambda: 'c')
+        assert len(cache) == 1
+        assert cache.get('secret', '20130103', 'us-east-1', 's3', lambda: 'd') == 'd'
+
+    def test_evicts_oldest_key_when_full(self):
+        cache = SigningKeyCache(max_size=2)
+        cache.get('a', '20130103', 'us-east-1', 's3', lambda: 'a')
+        cache.get('b', '20130103', 'us-east-1', 's3', lambda: 'b')
+        cache.get('c', '20130103', 'us-east-1', 's3', lambda: 'c')
+        assert len(cache) == 2
+        assert cache.get('a', '20130103', 'us-east-1', 's3', lambda: 'x') == 'x'
+
+
+class TestAmazonS3SignedRequestTags(object):
+    @pytest.fixture
+    def signed_request(self, bucket):
+        return AmazonS3SignedRequest(
+            key_name='file_name.png',
+            mime_type='image/png',
+            bucket=bucket,
+            session=boto3.session.Session(
+                aws_access_key_id='test-key',
+                aws_secret_access_key='test-secret-key',
+                region_name='us-east-1',
+            ),
+            tags={'pontus-validated': 'false', 'owner': 'a&b'}
+        )
+
+    def test_form_fields_contain_tagging(self, signed_request):
+        assert signed_request.form_fields['tagging'] == (
+            '<Tagging><TagSet>'
+            '<Tag><Key>owner</Key><Value>a&amp;b</Value></Tag>'
+            '<Tag><Key>pontus-validated</Key><Value>false</Value></Tag>'
+            '</TagSet></Tagging>'
+        )
+
+    def test_policy_document_contains_tagging(self, signed_request):
+        policy = signed_request._get_policy_document(datetime.utcnow())
+        data = json.loads(force_text(base64.b64decode(policy)))
+        assert data['conditions'][-1] == {
+            'tagging': signed_request.form_fields['tagging']
+        }
+
+    def test_no_tagging_without_tags(self, bucket):
+        signed_request = AmazonS3SignedRequest(
+            key_name='file_name.png',
+            mime_type='image/png',
+            bucket=bucket,
+            session=boto3.session.Session(
+                aws_access_key_id='test-key',
+                aws_secret_access_key='test-secret-key',
+                region_name='us-east-1',
+            )
+        )
+        assert 'tagging' not in signed_request.form_fields
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+import base64
+import json
+import uuid
+
+import boto3
+import freezegun
+import pytest
+from flexmock import flexmock
+
+from pontus import AmazonS3SignedRequest, AmazonS3SignedRequestFactory
+from pontus._compat import force_text
+
+HOUR_IN_SECONDS = 60 * 60
+
+
+class TestAmazonS3SignedRequestFactory(object):
+    @pytest.fixture
+    def session(self):
+        return boto3.session.Session(
+            aws_access_key_id='test-key',
+            aws_secret_access_key='test-secret-key',
+            region_name='us-east-1',
+        )
+
+    @pytest.fixture
+    def options(self):
+        return {
+            'acl': 'private',
+            'expires_in': HOUR_IN_SECONDS,
+            'max_content_length': 2097152,
+            'tags': {'pontus-validated': 'false', 'owner': 'a&b'},
+        }
+
+    @pytest.fixture
+    def factory(self, bucket, session, options):
+        return AmazonS3SignedRequestFactory(
+            bucket=bucket,
+            session=session,
+            **options
+        )
+
+    @pytest.mark.parametrize(('key_name', 'mime_type'), [
+        (u'file_name.png', u'image/png'),
+        (u'"quoted" \\ name.pdf', u'application/pdf'),
+        (u'k\xe4\xe4nn\xf6s/\U0001f600.jpg', u'image/jpeg'),
+    ])
+    @freezegun.freeze_time('2007-12-01 12:05:37.572123')
+    def test_form_fields_match_signed_request(
+        self,
+        factory,
+        bucket,
+        session,
+        options,
+        key_name,
+        mime_type
+    ):
+        signed_request = AmazonS3SignedRequest(
+            key_name=key_name,
+            mime_type=mime_type,
+            bucket=bucket,
+            session=session,
+            **options
+        )
+        assert factory.form_fields(key_name, mime_type) == (
+            signed_request.form_fields
+        )
+
+    @freezegun.freeze_time('2007-12-01 12:05:37')
+    def test_form_fields_match_signed_request_without_options(
+        self,
+        bucket,
+        session
+    ):
+        factory = AmazonS3SignedRequestFactory(bucket=bucket, session=session)
+        signed_request = AmazonS3SignedRequest(
+            key_name=u'file_name.png',
+            mime_type=u'image/png',
+            bucket=bucket,
+            session=session
+        )
+        assert factory.form_fields(u'file_name.png', u'image/png') == (
+            signed_request.form_fields
+        )
+
+    @freezegun.freeze_time('2007-12-01 12:05:37.572123')
+    def test_policy_document(self, factory):
+        form_fields = factory.form_fields(u'file_name.png', u'image/png')
+        data = json.loads(force_text(base64.b64decode(form_fields['policy'])))
+        assert data == {
+            'expiration': '2007-12-01T13:05:37.572123Z',
+            'conditions': [
+                {'x-amz-algorithm': 'AWS4-HMAC-SHA256'},
+                {'x-amz-credential': (
+                    'test-key/20071201/us-east-1/s3/aws4_request'
+                )},
+                {'x-amz-date': '20071201T120537Z'},
+                {'bucket': 'test-bucket'},
+                {'key': 'test-unvalidated-uploads/file_name.png'},
+                {'acl': 'private'},
+                {'Content-Type': 'image/png'},
+                ['content-length-range', 1, 2097152],
+                {'success_action_status': '201'},
+                {'tagging': form_fields['tagging']},
+            ]
+        }
+
+    def test_randomized_key(self, bucket, session):
+        flexmock(uuid).should_receive('uuid4').and_return(u'random-string')
+        factory = AmazonS3SignedRequestFactory(
+            bucket=bucket,
+            session=session,
+            randomize=True
+        )
+        form_fields = factory.form_fields(u'file_name.png', u'image/png')
+        assert form_fields['key'] == (
+            'test-unvalidated-uploads/random-string/file_name.png'
+        )
+        data = json.loads(force_text(base64.b64decode(form_fields['policy'])))
+        assert {'key': form_fields['key']} in data['conditions']
+
+    @freezegun.freeze_time('2007-12-01 12:05:37')
+    def test_form_fields_for_many(self, factory):
+        uploads = [
+            (u'file_name.png', u'image/png'),
+            (u'file_name.pdf', u'application/pdf'),
+        ]
+        assert factory.form_fields_for_many(uploads) == [
+            factory.form_fields(key_name, mime_type)
+            for key_name, mime_type in uploads
+        ]
+
+    def test_form_fields_for_many_derives_signing_key_once(self, factory):
+        (
+            flexmock(factory._signer)
+            .should_call('_get_signing_key')
+            .once()
+        )
+        factory.form_fields_for_many([
+            (u'file_name.png', u'image/png'),
+            (u'file_name.pdf', u'application/pdf'),
+        ])
+
+    def test_repr(self, factory):
+        assert repr(factory) == (
+            "<AmazonS3SignedRequestFactory bucket='test-bucket'>"
+        )
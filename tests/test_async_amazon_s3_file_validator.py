@@ -0,0 +1,424 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import socket
+
+import boto3
+import pytest
+from flexmock import flexmock
+
+from pontus import AsyncAmazonS3FileValidator, instrumentation
+from pontus.async_amazon_s3_file_validator import (
+    AioValidationContext,
+    AsyncValidationContext
+)
+from pontus.exceptions import FileNotFoundError, ValidationError
+from pontus.move_strategies import (
+    MIN_PART_SIZE,
+    ServerSideCopy,
+    TagInPlace
+)
+from pontus.validation_cache import LRUValidationCache
+from pontus.validation_context import ValidationContext
+from pontus.validators import FileSize, MimeType
+
+
+async def async_name_validator(obj):
+    if obj.key != 'test-unvalidated-uploads/images/hello.jpg':
+        raise ValidationError('Invalid name.')
+
+
+def sync_size_validator(obj):
+    if obj.content_length > 10:
+        raise ValidationError('Too big.')
+
+
+class TestAsyncAmazonS3FileValidator(object):
+    @pytest.fixture
+    def key_name(self, bucket):
+        key_name = 'test-unvalidated-uploads/images/hello.jpg'
+        with open(os.path.join(
+            os.path.dirname(__file__),
+            'data',
+            'example.jpg'
+        ), 'rb') as image:
+            boto3.resource('s3').Object(bucket.name, key_name).put(
+                Body=image
+            )
+        return key_name
+
+    def test_validate_returns_true_when_validation_passes(
+        self,
+        key_name,
+        bucket
+    ):
+        validator = AsyncAmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[async_name_validator, MimeType('image/jpeg')]
+        )
+        assert asyncio.run(validator.validate())
+        assert validator.errors == []
+        assert validator.obj.key == 'images/hello.jpg'
+
+    def test_validate_collects_errors_in_validator_order(
+        self,
+        key_name,
+        bucket
+    ):
+        validator = AsyncAmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[
+                sync_size_validator,
+                MimeType('image/png'),
+                async_name_validator,
+            ]
+        )
+        assert not asyncio.run(validator.validate())
+        assert validator.errors == [
+            'Too big.',
+            'File MIME type is image/jpeg, not in image/png.',
+        ]
+        assert validator.obj.key == key_name
+
+    def test_validate_runs_validators_concurrently(self, key_name, bucket):
+        events = []
+
+        async def first(obj):
+            events.append('first started')
+            await asyncio.sleep(0.01)
+            events.append('first finished')
+
+        async def second(obj):
+            events.append('second started')
+            await asyncio.sleep(0.01)
+            events.append('second finished')
+
+        validator = AsyncAmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[first, second]
+        )
+        asyncio.run(validator.validate())
+        assert events[:2] == ['first started', 'second started']
+
+    def test_validate_passes_async_context_to_coroutine_validators(
+        self,
+        key_name,
+        bucket
+    ):
+        async def jpeg_header(obj, context):
+            assert isinstance(context, AsyncValidationContext)
+            assert await context.mime_type(sniff_size=64) == 'image/jpeg'
+            assert (await context.read(3)) == b'\xff\xd8\xff'
+
+        jpeg_header.uses_context = True
+        validator = AsyncAmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[jpeg_header]
+        )
+        assert asyncio.run(validator.validate())
+
+    def test_validate_raises_unexpected_errors(self, key_name, bucket):
+        async def broken(obj):
+            raise RuntimeError('broken')
+
+        validator = AsyncAmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[broken]
+        )
+        with pytest.raises(RuntimeError):
+            asyncio.run(validator.validate())
+
+    def test_validate_throws_error_if_file_not_found(self, bucket):
+        validator = AsyncAmazonS3FileValidator(
+            key_name='does_not_exist.jpg',
+            bucket=bucket
+        )
+        with pytest.raises(FileNotFoundError):
+            asyncio.run(validator.validate())
+
+    def test_validate_throws_error_if_lazy_file_not_found(self, bucket):
+        validator = AsyncAmazonS3FileValidator(
+            key_name='does_not_exist.jpg',
+            bucket=bucket,
+            validators=[MimeType('image/jpeg')],
+            lazy_load=True
+        )
+        with pytest.raises(FileNotFoundError):
+            asyncio.run(validator.validate())
+
+    def test_validate_caches_results(self, key_name, bucket):
+        cache = LRUValidationCache()
+        validator = AsyncAmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[MimeType('image/png')],
+            cache=cache
+        )
+        assert not asyncio.run(validator.validate())
+        assert len(cache) == 1
+
+        validator = AsyncAmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[MimeType('image/png')],
+            cache=cache
+        )
+        flexmock(ValidationContext).should_receive('mime_type').never()
+        assert not asyncio.run(validator.validate())
+        assert validator.errors == [
+            'File MIME type is image/jpeg, not in image/png.'
+        ]
+
+    def test_repr(self, key_name, bucket):
+        assert repr(AsyncAmazonS3FileValidator(key_name, bucket)) == (
+            "<AsyncAmazonS3FileValidator " +
+            "key='test-unvalidated-uploads/images/hello.jpg'>"
+        )
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope='module')
+def moto_server():
+    pytest.importorskip('aiobotocore')
+    server_module = pytest.importorskip('moto.server')
+    server = server_module.ThreadedMotoServer(
+        ip_address='127.0.0.1',
+        port=get_free_port()
+    )
+    server.start()
+    yield 'http://127.0.0.1:{port}'.format(port=server._port)
+    server.stop()
+
+
+class TestAsyncAmazonS3FileValidatorWithClient(object):
+    """Runs against moto in server mode, as aiobotocore makes its requests
+    with aiohttp, which the in-process mock does not intercept.
+    """
+    @pytest.fixture
+    def mock_amazon_s3(self):
+        yield
+
+    @pytest.fixture
+    def s3(self, moto_server):
+        return boto3.resource(
+            's3',
+            endpoint_url=moto_server,
+            aws_access_key_id='test-key',
+            aws_secret_access_key='test-secret-key',
+            region_name='us-east-1'
+        )
+
+    @pytest.fixture
+    def bucket(self, s3):
+        bucket = s3.Bucket('test-bucket')
+        bucket.create()
+        yield bucket
+        bucket.objects.all().delete()
+        bucket.delete()
+
+    @pytest.fixture
+    def key_name(self, bucket):
+        key_name = 'test-unvalidated-uploads/images/hello.jpg'
+        with open(os.path.join(
+            os.path.dirname(__file__),
+            'data',
+            'example.jpg'
+        ), 'rb') as image:
+            bucket.Object(key_name).put(Body=image)
+        return key_name
+
+    @pytest.fixture
+    def validate(self, moto_server):
+        from aiobotocore.session import get_session
+
+        async def validate(client_requests=None, **kwargs):
+            async with get_session().create_client(
+                's3',
+                endpoint_url=moto_server,
+                aws_access_key_id='test-key',
+                aws_secret_access_key='test-secret-key',
+                region_name='us-east-1'
+            ) as client:
+                if client_requests is not None:
+                    client.meta.events.register(
+                        'before-call.s3',
+                        lambda model, **kw: client_requests.append(
+                            model.name
+                        )
+                    )
+                validator = AsyncAmazonS3FileValidator(client=client, **kwargs)
+                return validator, await validator.validate()
+
+        def run(**kwargs):
+            return asyncio.run(validate(**kwargs))
+
+        return run
+
+    def test_validate_moves_valid_file_with_client(
+        self,
+        validate,
+        key_name,
+        bucket
+    ):
+        client_requests = []
+        validator, is_valid = validate(
+            client_requests=client_requests,
+            key_name=key_name,
+            bucket=bucket,
+            validators=[
+                async_name_validator,
+                FileSize(max=100000),
+                MimeType('image/jpeg'),
+            ]
+        )
+        assert is_valid
+        assert validator.obj.key == 'images/hello.jpg'
+        assert client_requests == [
+            'HeadObject',
+            'GetObject',
+            'CopyObject',
+            'DeleteObject',
+        ]
+        assert [obj.key for obj in bucket.objects.all()] == [
+            'images/hello.jpg'
+        ]
+
+    def test_validate_rejects_file_with_client(
+        self,
+        validate,
+        key_name,
+        bucket
+    ):
+        validator, is_valid = validate(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[MimeType('image/png')],
+            delete_rejected_file=True
+        )
+        assert not is_valid
+        assert validator.errors == [
+            'File MIME type is image/jpeg, not in image/png.'
+        ]
+        assert list(bucket.objects.all()) == []
+
+    def test_validate_throws_error_if_file_not_found_with_client(
+        self,
+        validate,
+        bucket
+    ):
+        with pytest.raises(FileNotFoundError):
+            validate(key_name='does_not_exist.jpg', bucket=bucket)
+
+    def test_validate_passes_aio_context_to_coroutine_validators(
+        self,
+        validate,
+        key_name,
+        bucket
+    ):
+        async def jpeg_header(obj, context):
+            assert isinstance(context, AioValidationContext)
+            assert await context.mime_type(sniff_size=64) == 'image/jpeg'
+            assert (await context.read(3)) == b'\xff\xd8\xff'
+
+        jpeg_header.uses_context = True
+        validator, is_valid = validate(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[jpeg_header, sync_size_validator]
+        )
+        assert not is_valid
+        assert validator.errors == ['Too big.']
+
+    def test_validate_caches_results_with_client(
+        self,
+        validate,
+        key_name,
+        bucket
+    ):
+        cache = LRUValidationCache()
+        validate(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[MimeType('image/png')],
+            cache=cache
+        )
+        assert len(cache) == 1
+
+        client_requests = []
+        validator, is_valid = validate(
+            client_requests=client_requests,
+            key_name=key_name,
+            bucket=bucket,
+            validators=[MimeType('image/png')],
+            cache=cache
+        )
+        assert not is_valid
+        assert validator.errors == [
+            'File MIME type is image/jpeg, not in image/png.'
+        ]
+        assert client_requests == ['HeadObject']
+
+    @pytest.mark.parametrize(('move_strategy', 'new_key_name'), [
+        (ServerSideCopy(), 'images/hello.jpg'),
+        (
+            ServerSideCopy(multipart_threshold=1, part_size=MIN_PART_SIZE),
+            'images/hello.jpg'
+        ),
+        (TagInPlace(), 'test-unvalidated-uploads/images/hello.jpg'),
+    ])
+    def test_validate_moves_with_strategy(
+        self,
+        validate,
+        key_name,
+        bucket,
+        move_strategy,
+        new_key_name
+    ):
+        validator, is_valid = validate(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[MimeType('image/jpeg')],
+            move_strategy=move_strategy
+        )
+        assert is_valid
+        assert validator.obj.key == new_key_name
+        assert validator.obj.get()['Body'].read(3) == b'\xff\xd8\xff'
+
+    def test_measures_requests_of_client(
+        self,
+        validate,
+        key_name,
+        bucket
+    ):
+        measurements = []
+        observer = instrumentation.BaseObserver()
+        observer.on_measurement = measurements.append
+        instrumentation.add_observer(observer)
+        try:
+            validate(
+                key_name=key_name,
+                bucket=bucket,
+                validators=[MimeType('image/jpeg')]
+            )
+        finally:
+            instrumentation.remove_observer(observer)
+        assert [
+            (measurement.operation, measurement.requests)
+            for measurement in measurements
+        ] == [
+            (instrumentation.LOAD, 1),
+            (instrumentation.VALIDATOR, 1),
+            (instrumentation.MOVE, 1),
+            (instrumentation.DELETE, 1),
+            (instrumentation.VALIDATE, 4),
+        ]
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+import base64
+import hashlib
+import os
+
+import boto3
+import pytest
+from flexmock import flexmock
+
+from pontus.exceptions import ValidationError
+from pontus.validators import Checksum
+
+
+class TestChecksumValidator(object):
+    @pytest.fixture
+    def jpeg_data(self):
+        with open(os.path.join(
+            os.path.dirname(__file__),
+            'data',
+            'example.jpg'
+        ), 'rb') as image:
+            return image.read()
+
+    @pytest.fixture
+    def jpeg_key(self, bucket, jpeg_data):
+        obj = boto3.resource('s3').Object(bucket.name, 'example.jpg')
+        obj.put(Body=jpeg_data)
+        obj.load()
+        return obj
+
+    @pytest.mark.parametrize('algorithm', ['md5', 'sha1', 'sha256'])
+    def test_does_not_raise_validation_error_if_checksum_matches(
+        self,
+        jpeg_key,
+        jpeg_data,
+        algorithm
+    ):
+        validator = Checksum(
+            algorithm,
+            expected=hashlib.new(algorithm, jpeg_data).hexdigest(),
+            use_stored_checksum=False
+        )
+        validator(jpeg_key)
+
+    def test_accepts_base64_encoded_digest(self, jpeg_key, jpeg_data):
+        validator = Checksum(
+            expected=base64.b64encode(hashlib.sha256(jpeg_data).digest()),
+            use_stored_checksum=False
+        )
+        validator(jpeg_key)
+
+    def test_raises_validation_error_if_checksum_does_not_match(
+        self,
+        jpeg_key,
+        jpeg_data
+    ):
+        expected = hashlib.sha256(b'other').hexdigest()
+        validator = Checksum(expected=expected, use_stored_checksum=False)
+        with pytest.raises(ValidationError) as e:
+            validator(jpeg_key)
+        assert e.value.error == (
+            u'File SHA256 checksum {actual} does not match {expected}.'.format(
+                actual=hashlib.sha256(jpeg_data).hexdigest(),
+                expected=expected
+            )
+        )
+
+    def test_hashes_body_in_chunks(self, jpeg_key, jpeg_data):
+        validator = Checksum(
+            expected=hashlib.sha256(jpeg_data).hexdigest(),
+            use_stored_checksum=False
+        )
+        validator.chunk_size = 1024
+        consumer = validator.begin(jpeg_key)
+        flexmock(consumer).should_call('feed').times(28)
+        flexmock(validator).should_receive('begin').and_return(consumer)
+        validator(jpeg_key)
+
+    def test_compares_md5_against_etag(self, jpeg_key):
+        validator = Checksum('md5', use_etag=True)
+        flexmock(validator).should_call('_compare').once()
+        validator(jpeg_key)
+
+    def test_raises_validation_error_if_md5_does_not_match_etag(
+        self,
+        jpeg_key
+    ):
+        jpeg_key.meta.data['ETag'] = '"%s"' % hashlib.md5(b'x').hexdigest()
+        validator = Checksum('md5', use_etag=True)
+        with pytest.raises(ValidationError):
+            validator(jpeg_key)
+
+    @pytest.mark.parametrize('data', [
+        {'ETag': '"%s-2"' % hashlib.md5(b'x').hexdigest()},
+        {'ServerSideEncryption': 'aws:kms'},
+        {'SSECustomerAlgorithm': 'AES256'},
+    ])
+    def test_raises_validation_error_if_etag_is_not_md5(self, jpeg_key, data):
+        jpeg_key.meta.data.update(data)
+        flexmock(jpeg_key).should_receive('get').never()
+        with pytest.raises(ValidationError) as e:
+            Checksum('md5', use_etag=True)(jpeg_key)
+        assert str(e.value) == (
+            'Invalid file: File MD5 checksum cannot be verified, as its ETag '
+            'is not an MD5 checksum.'
+        )
+
+    def test_skips_multipart_etag_if_unverifiable_allowed(self, jpeg_key):
+        jpeg_key.meta.data['ETag'] = '"%s-2"' % hashlib.md5(b'x').hexdigest()
+        flexmock(jpeg_key).should_receive('get').never()
+        Checksum('md5', use_etag=True, allow_unverifiable=True)(jpeg_key)
+
+    def test_reads_body_if_etag_is_not_stored_md5(self, jpeg_key, jpeg_data):
+        jpeg_key.meta.data['SSECustomerAlgorithm'] = 'AES256'
+        flexmock(jpeg_key).should_call('get').once()
+        Checksum(
+            'md5',
+            expected=hashlib.md5(jpeg_data).hexdigest(),
+            use_stored_checksum=True
+        )(jpeg_key)
+
+    def test_uses_etag_as_stored_md5_checksum(self, jpeg_key, jpeg_data):
+        flexmock(jpeg_key).should_receive('get').never()
+        Checksum(
+            'md5',
+            expected=hashlib.md5(jpeg_data).hexdigest(),
+            use_stored_checksum=True
+        )(jpeg_key)
+
+    def test_uses_stored_sha256_checksum(self, jpeg_key, jpeg_data):
+        digest = hashlib.sha256(jpeg_data).digest()
+        (
+            flexmock(jpeg_key.meta.client)
+            .should_receive('head_object')
+            .with_args(
+                Bucket='test-bucket',
+                Key='example.jpg',
+                ChecksumMode='ENABLED'
+            )
+            .and_return({'ChecksumSHA256': base64.b64encode(digest).decode()})
+        )
+        flexmock(jpeg_key).should_receive('get').never()
+        Checksum(expected=digest.hex(), use_stored_checksum=True)(jpeg_key)
+
+    def test_uses_stored_checksum_of_loaded_metadata(
+        self,
+        jpeg_key,
+        jpeg_data
+    ):
+        digest = hashlib.sha256(jpeg_data).digest()
+        jpeg_key.meta.data['ChecksumSHA256'] = (
+            base64.b64encode(digest).decode()
+        )
+        flexmock(jpeg_key.meta.client).should_receive('head_object').never()
+        flexmock(jpeg_key).should_receive('get').never()
+        Checksum(expected=digest.hex(), use_stored_checksum=True)(jpeg_key)
+
+    def test_reads_body_if_no_stored_checksum(self, jpeg_key, jpeg_data):
+        flexmock(jpeg_key).should_call('get').once()
+        Checksum(
+            expected=hashlib.sha256(jpeg_data).hexdigest(),
+            use_stored_checksum=True
+        )(jpeg_key)
+
+    def test_does_not_request_stored_checksum_by_default(
+        self,
+        jpeg_key,
+        jpeg_data
+    ):
+        flexmock(jpeg_key.meta.client).should_receive('head_object').never()
+        flexmock(jpeg_key).should_call('get').once()
+        Checksum(expected=hashlib.sha256(jpeg_data).hexdigest())(jpeg_key)
+
+    def test_raises_value_error_if_invalid_algorithm(self):
+        with pytest.raises(ValueError) as e:
+            Checksum('crc32', expected='00')
+        assert str(e.value) == 'Algorithm must be one of md5, sha1, sha256.'
+
+    def test_raises_value_error_if_nothing_to_compare_against(self):
+        with pytest.raises(ValueError) as e:
+            Checksum('md5')
+        assert str(e.value) == (
+            'At least one of `expected` or `use_etag` must be defined.'
+        )
+
+    def test_raises_value_error_if_use_etag_without_md5(self):
+        with pytest.raises(ValueError) as e:
+            Checksum('sha256', use_etag=True)
+        assert str(e.value) == 'Argument `use_etag` requires MD5 algorithm.'
+
+    def test_raises_value_error_if_invalid_expected_digest(self):
+        with pytest.raises(ValueError) as e:
+            Checksum('sha256', expected='abc')
+        assert str(e.value) == (
+            'Argument `expected` is not a valid SHA256 digest.'
+        )
+
+    def test_repr(self):
+        assert repr(Checksum('md5', use_etag=True)) == (
+            "<Checksum algorithm='md5'>"
+        )
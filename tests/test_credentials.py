@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+import itertools
+import time
+from datetime import datetime, timedelta
+
+import boto3
+import pytest
+from botocore.credentials import RefreshableCredentials
+from dateutil.tz import tzutc
+from flexmock import flexmock
+
+from pontus import AmazonS3SignedRequest
+from pontus.credentials import CredentialProvider, get_provider
+
+
+class TestCredentialProvider(object):
+    @pytest.fixture
+    def session(self):
+        return boto3.session.Session(
+            aws_access_key_id='test-key',
+            aws_secret_access_key='test-secret-key',
+            region_name='us-east-1',
+        )
+
+    @pytest.fixture
+    def refreshable_session(self, session):
+        counter = itertools.count()
+
+        def get_metadata():
+            number = next(counter)
+            return {
+                'access_key': 'test-key-%d' % number,
+                'secret_key': 'test-secret-key-%d' % number,
+                'token': 'test-token-%d' % number,
+                'expiry_time': (
+                    datetime.now(tzutc()) + timedelta(minutes=30)
+                ).isoformat(),
+            }
+
+        credentials = RefreshableCredentials.create_from_metadata(
+            get_metadata(),
+            get_metadata,
+            'test'
+        )
+        flexmock(session).should_receive('get_credentials').and_return(
+            credentials
+        )
+        return session
+
+    def wait_for_refresh(self, provider):
+        with provider._lock:
+            pass
+
+    def expire_soon(self, session):
+        # Makes botocore refresh the credentials when they are next read.
+        session.get_credentials()._expiry_time = (
+            datetime.now(tzutc()) + timedelta(minutes=5)
+        )
+
+    def test_returns_snapshot_of_static_credentials(self, session):
+        provider = CredentialProvider(session)
+        snapshot = provider.get()
+        assert snapshot.access_key == 'test-key'
+        assert snapshot.secret_key == 'test-secret-key'
+        assert snapshot.token is None
+
+    def test_reads_static_credentials_once(self, session):
+        flexmock(session).should_call('get_credentials').once()
+        provider = CredentialProvider(session)
+        assert provider.get() is provider.get()
+
+    def test_reuses_snapshot_until_refresh_margin(self, refreshable_session):
+        provider = CredentialProvider(refreshable_session)
+        snapshot = provider.get()
+        assert snapshot.access_key == 'test-key-0'
+        assert snapshot.secret_key == 'test-secret-key-0'
+        assert snapshot.token == 'test-token-0'
+        assert provider.get() is snapshot
+
+    def test_refreshes_in_background_within_refresh_margin(
+        self,
+        refreshable_session
+    ):
+        provider = CredentialProvider(refreshable_session)
+        snapshot = provider.get()
+        self.expire_soon(refreshable_session)
+        provider._next_refresh_at = time.time()
+        # The old snapshot is returned while the refresh is in progress.
+        assert provider.get() is snapshot
+        self.wait_for_refresh(provider)
+        assert provider.get().access_key == 'test-key-1'
+
+    def test_refreshes_before_returning_within_expiry_margin(
+        self,
+        refreshable_session
+    ):
+        provider = CredentialProvider(refreshable_session)
+        provider.get()
+        self.expire_soon(refreshable_session)
+        provider._expires_at = time.time() + provider.expiry_margin
+        assert provider.get().access_key == 'test-key-1'
+
+    def test_clear_discards_snapshot(self, session):
+        provider = CredentialProvider(session)
+        snapshot = provider.get()
+        provider.clear()
+        assert provider.get() is not snapshot
+
+    def test_raises_value_error_if_expiry_margin_is_too_large(self, session):
+        with pytest.raises(ValueError) as e:
+            CredentialProvider(session, refresh_margin=60, expiry_margin=120)
+        assert str(e.value) == (
+            'Argument `expiry_margin` must not be greater than '
+            '`refresh_margin`.'
+        )
+
+    def test_get_provider_is_shared_per_session(self, session):
+        assert get_provider(session) is get_provider(session)
+        assert get_provider(session) is not get_provider(
+            boto3.session.Session()
+        )
+
+    def test_signing_reads_one_snapshot(self, session, bucket):
+        signed_request = AmazonS3SignedRequest(
+            key_name='file_name.png',
+            mime_type='image/png',
+            bucket=bucket,
+            session=session
+        )
+        flexmock(CredentialProvider).should_call('get').once()
+        signed_request.form_fields
+
+    def test_repr(self, session):
+        assert repr(CredentialProvider(session)) == (
+            '<CredentialProvider session={0!r}>'.format(session)
+        )
@@ -84,3 +84,15 @@ class TestDenyMimeTypeValidator(object):
     ):
         validator = DenyMimeType(regex=r'application\/.*')
         validator(jpeg_key)
+
+    def test_sniff_size_raises_validation_error_if_invalid_mime_type(
+        self,
+        jpeg_key
+    ):
+        validator = DenyMimeType(mime_type='image/jpeg', sniff_size=1024)
+        with pytest.raises(ValidationError) as e:
+            validator(jpeg_key)
+        assert str(e.value) == (
+            "Invalid file: File MIME type image/jpeg is in denied list "
+            "image/jpeg."
+        )
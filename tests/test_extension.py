@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+import boto3
+import pytest
+from flask import Flask
+from flexmock import flexmock
+
+from pontus import (
+    AmazonS3FileValidator,
+    AmazonS3PresignedUrlGenerator,
+    AmazonS3SignedRequest,
+    Pontus
+)
+from pontus import extension
+from pontus.extension import get_bucket, get_config, get_session, get_state
+
+
+class TestPontus(object):
+    @pytest.fixture
+    def session(self):
+        return boto3.session.Session(
+            aws_access_key_id='test-key',
+            aws_secret_access_key='test-secret-key',
+            region_name='us-east-1',
+        )
+
+    @pytest.fixture
+    def pontus_app(self, bucket, session):
+        app = Flask('pontus')
+        app.config.update(
+            AWS_UNVALIDATED_PREFIX='unvalidated/',
+            MAX_CONTENT_LENGTH=1024,
+            PONTUS_BUCKET=bucket.name,
+            PONTUS_MAX_POOL_CONNECTIONS=20,
+            PONTUS_TCP_KEEPALIVE=False,
+        )
+        Pontus(app, session=session)
+        with app.app_context():
+            yield app
+
+    def test_init_app(self, session):
+        app = Flask('pontus')
+        pontus = Pontus(session=session)
+        assert 'pontus' not in app.extensions
+        pontus.init_app(app)
+        assert app.extensions['pontus'].session is session
+
+    def test_creates_session_from_config(self):
+        app = Flask('pontus')
+        app.config.update(
+            AWS_ACCESS_KEY_ID='config-key',
+            AWS_SECRET_ACCESS_KEY='config-secret-key',
+            AWS_REGION='eu-west-1',
+        )
+        Pontus(app)
+        session = app.extensions['pontus'].session
+        assert session.get_credentials().access_key == 'config-key'
+        assert session.region_name == 'eu-west-1'
+
+    def test_shares_one_client(self, pontus_app):
+        state = get_state()
+        assert state.bucket is not state.bucket
+        assert state.bucket.meta.client is state.client
+        assert get_bucket().meta.client is state.client
+
+    def test_client_config(self, pontus_app):
+        config = get_state().client.meta.config
+        assert config.max_pool_connections == 20
+        assert config.tcp_keepalive is False
+
+    def test_default_client_config(self, session):
+        app = Flask('pontus')
+        Pontus(app, session=session)
+        config = app.extensions['pontus'].client.meta.config
+        assert config.max_pool_connections == 50
+        assert config.tcp_keepalive is True
+
+    def test_reads_config_once(self, pontus_app):
+        pontus_app.config['AWS_UNVALIDATED_PREFIX'] = 'changed/'
+        assert get_config() == {
+            'AWS_UNVALIDATED_PREFIX': 'unvalidated/',
+            'MAX_CONTENT_LENGTH': 1024,
+        }
+
+    def test_get_config_without_extension(self, app):
+        assert get_config() is app.config
+
+    def test_get_state_outside_app_context(self, pontus_app):
+        flexmock(extension).should_receive('has_app_context').and_return(
+            False
+        )
+        assert get_state() is None
+
+    def test_get_bucket_returns_given_bucket(self, bucket):
+        assert get_bucket(bucket) is bucket
+
+    def test_get_bucket_raises_value_error_without_extension(self):
+        with pytest.raises(ValueError) as e:
+            get_bucket()
+        assert str(e.value) == (
+            'Argument `bucket` must be given unless the Pontus extension is '
+            'initialized with a `PONTUS_BUCKET` config.'
+        )
+
+    def test_get_session_raises_value_error_without_extension(self):
+        with pytest.raises(ValueError) as e:
+            get_session()
+        assert str(e.value) == (
+            'Argument `session` must be given unless the Pontus extension is '
+            'initialized.'
+        )
+
+    def test_signed_request_uses_extension(self, pontus_app, session):
+        signed_request = AmazonS3SignedRequest(
+            key_name=u'file_name.png',
+            mime_type=u'image/png'
+        )
+        assert signed_request.key_name == u'unvalidated/file_name.png'
+        assert signed_request.max_content_length == 1024
+        assert signed_request.bucket.name == 'test-bucket'
+        assert signed_request.session is session
+        assert signed_request.form_fields['key'] == (
+            u'unvalidated/file_name.png'
+        )
+
+    def test_presigned_url_generator_uses_extension(self, pontus_app):
+        generator = AmazonS3PresignedUrlGenerator()
+        assert generator.generate_url(u'file_name.png').startswith(
+            'https://test-bucket.s3.amazonaws.com/file_name.png?'
+        )
+
+    def test_file_validator_uses_extension(self, pontus_app):
+        state = get_state()
+        state.client.put_object(
+            Bucket='test-bucket',
+            Key='unvalidated/file_name.png',
+            Body=b'test'
+        )
+        validator = AmazonS3FileValidator(key_name='unvalidated/file_name.png')
+        assert validator.obj.meta.client is state.client
+        assert validator.validate()
+        assert validator.obj.key == 'file_name.png'
+
+    def test_file_validator_reads_config_once(self, pontus_app):
+        get_state().client.put_object(
+            Bucket='test-bucket',
+            Key='unvalidated/file_name.png',
+            Body=b'test'
+        )
+        validator = AmazonS3FileValidator(key_name='unvalidated/file_name.png')
+        assert validator._get_unvalidated_prefix() == 'unvalidated/'
+        flexmock(extension).should_receive('get_config').never()
+        assert validator.validate()
+        assert validator.obj.key == 'file_name.png'
+
+    def test_repr(self, pontus_app):
+        assert repr(get_state()) == "<PontusState bucket='test-bucket'>"
@@ -5,7 +5,7 @@ import pytest
 import boto3
 
 from pontus.exceptions import ValidationError
-from pontus.validators import FileSize
+from pontus.validators import COST_METADATA, FileSize
 
 
 class TestFileSizeValidator(object):
@@ -70,3 +70,6 @@ class TestFileSizeValidator(object):
         assert repr(FileSize(min=27660, max=27662)) == (
             u"<FileSize min=27660, max=27662>"
         )
+
+    def test_cost(self):
+        assert FileSize(max=1).cost == COST_METADATA
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import subprocess
+import sys
+
+import pytest
+
+import pontus
+from pontus import magic_pool
+from pontus.amazon_s3_file_validator import AmazonS3FileValidator
+
+#: The most seconds importing pontus may take.
+IMPORT_TIME_BUDGET = 0.1
+
+
+def run_python(code):
+    return subprocess.check_output(
+        [sys.executable, '-c', code],
+        universal_newlines=True
+    ).strip()
+
+
+class TestLazyImports(object):
+    @pytest.fixture
+    def restore_magic_pool(self):
+        yield
+        magic_pool.configure()
+
+    def test_import_does_not_load_heavy_dependencies(self):
+        output = run_python(
+            'import sys\n'
+            'import pontus\n'
+            'print(sorted(set(sys.modules) & {"boto3", "botocore", "magic"}))'
+        )
+        assert output == '[]'
+
+    def test_import_time_budget(self):
+        seconds = float(run_python(
+            'import time\n'
+            'start = time.perf_counter()\n'
+            'import pontus\n'
+            'print(time.perf_counter() - start)'
+        ))
+        assert seconds < IMPORT_TIME_BUDGET
+
+    def test_signing_does_not_load_libmagic_or_botocore(self):
+        output = run_python(
+            'import sys\n'
+            'from pontus import AmazonS3SignedRequest\n'
+            'print(sorted(set(sys.modules) & {"botocore", "magic"}))'
+        )
+        assert output == '[]'
+
+    def test_attribute_imports_class(self):
+        assert pontus.AmazonS3FileValidator is AmazonS3FileValidator
+
+    def test_unknown_attribute_raises_attribute_error(self):
+        with pytest.raises(AttributeError) as e:
+            pontus.AmazonS3Validator
+        assert str(e.value) == (
+            "module 'pontus' has no attribute 'AmazonS3Validator'"
+        )
+
+    def test_dir_lists_exports(self):
+        assert set(pontus.__all__) <= set(dir(pontus))
+
+    def test_warm_up_loads_everything(self):
+        output = run_python(
+            'import sys\n'
+            'import pontus\n'
+            'pontus.warm_up()\n'
+            'print(sorted(set(sys.modules) & {"botocore", "magic"}))'
+        )
+        assert output == "['botocore', 'magic']"
+
+    def test_warm_up_fills_magic_pool(self, restore_magic_pool):
+        pontus.warm_up(magic_pool_size=2)
+        assert len(magic_pool.get_pool()) == 2
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+
+import boto3
+import pytest
+from flexmock import flexmock
+
+from pontus import (
+    AmazonS3BatchDeleter,
+    AmazonS3FileValidator,
+    AmazonS3SignedRequest,
+    AsyncAmazonS3FileValidator,
+    instrumentation
+)
+from pontus.move_strategies import MIN_PART_SIZE, ServerSideCopy
+from pontus.validators import FileSize, MimeType
+
+
+class RecordingObserver(instrumentation.BaseObserver):
+    def __init__(self):
+        self.measurements = []
+
+    def on_measurement(self, measurement):
+        self.measurements.append(measurement)
+
+    def find(self, operation):
+        return [
+            measurement for measurement in self.measurements
+            if measurement.operation == operation
+        ]
+
+
+@pytest.fixture
+def observer():
+    observer = RecordingObserver()
+    instrumentation.add_observer(observer)
+    yield observer
+    instrumentation.remove_observer(observer)
+
+
+@pytest.fixture
+def jpeg_data():
+    with open(os.path.join(
+        os.path.dirname(__file__),
+        'data',
+        'example.jpg'
+    ), 'rb') as image:
+        return image.read()
+
+
+@pytest.fixture
+def unvalidated_key(bucket, jpeg_data):
+    obj = boto3.resource('s3').Object(
+        bucket.name,
+        'test-unvalidated-uploads/example.jpg'
+    )
+    obj.put(Body=jpeg_data)
+    return obj
+
+
+class TestMeasure(object):
+    def test_does_not_measure_without_observers(self):
+        flexmock(instrumentation).should_receive('Measurement').never()
+        with instrumentation.measure(instrumentation.VALIDATOR, 'test'):
+            pass
+
+    def test_reports_duration(self, observer):
+        with instrumentation.measure(instrumentation.VALIDATOR, 'test'):
+            pass
+        measurement, = observer.measurements
+        assert measurement.operation == 'validator'
+        assert measurement.name == 'test'
+        assert measurement.duration >= 0
+        assert measurement.requests == 0
+        assert not measurement.failed
+
+    def test_marks_failed_operations(self, observer):
+        with pytest.raises(RuntimeError):
+            with instrumentation.measure(instrumentation.VALIDATOR, 'test'):
+                raise RuntimeError
+        measurement, = observer.measurements
+        assert measurement.failed
+
+    def test_counts_requests_for_nested_measurements(
+        self,
+        observer,
+        unvalidated_key,
+        jpeg_data
+    ):
+        client = unvalidated_key.meta.client
+        with instrumentation.measure('outer', 'test', client=client):
+            unvalidated_key.load()
+            with instrumentation.measure('inner', 'test', client=client):
+                unvalidated_key.get()['Body'].read()
+        inner, outer = observer.measurements
+        assert (inner.requests, inner.bytes_transferred) == (
+            1,
+            len(jpeg_data)
+        )
+        assert (outer.requests, outer.bytes_transferred) == (
+            2,
+            len(jpeg_data)
+        )
+
+    def test_does_not_count_requests_outside_measurements(
+        self,
+        observer,
+        unvalidated_key
+    ):
+        client = unvalidated_key.meta.client
+        with instrumentation.measure('outer', 'test', client=client):
+            pass
+        unvalidated_key.load()
+        measurement, = observer.measurements
+        assert measurement.requests == 0
+
+    def test_repr(self):
+        measurement = instrumentation.Measurement('validator', 'MimeType')
+        assert repr(measurement) == (
+            "<Measurement operation='validator' name='MimeType' "
+            "duration=None requests=0 bytes_transferred=0>"
+        )
+
+
+class TestInstrumentedOperations(object):
+    def test_measures_file_validation(
+        self,
+        observer,
+        bucket,
+        unvalidated_key,
+        jpeg_data
+    ):
+        validator = AmazonS3FileValidator(
+            key_name=unvalidated_key.key,
+            bucket=bucket,
+            validators=[FileSize(max=10 ** 6), MimeType('image/jpeg')],
+            move_strategy=ServerSideCopy()
+        )
+        assert validator.validate()
+
+        load, = observer.find('load')
+        assert (load.name, load.requests) == ('AmazonS3FileValidator', 1)
+
+        file_size, mime_type = observer.find('validator')
+        assert (file_size.name, file_size.requests) == ('FileSize', 0)
+        assert (mime_type.name, mime_type.requests) == ('MimeType', 1)
+        assert mime_type.bytes_transferred == len(jpeg_data)
+
+        move, = observer.find('move')
+        assert (move.name, move.requests) == ('ServerSideCopy', 1)
+
+        delete, = observer.find('delete')
+        assert delete.requests == 1
+
+        validate, = observer.find('validate')
+        assert validate.requests == (
+            mime_type.requests + move.requests + delete.requests
+        )
+
+    def test_measures_concurrent_coroutine_validators_apart(
+        self,
+        observer,
+        bucket,
+        unvalidated_key
+    ):
+        async def head_once(obj):
+            await asyncio.sleep(0.01)
+            obj.meta.client.head_object(Bucket=obj.bucket_name, Key=obj.key)
+
+        async def head_twice(obj):
+            obj.meta.client.head_object(Bucket=obj.bucket_name, Key=obj.key)
+            await asyncio.sleep(0.02)
+            obj.meta.client.head_object(Bucket=obj.bucket_name, Key=obj.key)
+
+        validator = AsyncAmazonS3FileValidator(
+            key_name=unvalidated_key.key,
+            bucket=bucket,
+            validators=[head_once, head_twice],
+            move_strategy=ServerSideCopy()
+        )
+        assert asyncio.run(validator.validate())
+
+        once, twice = sorted(
+            observer.find('validator'),
+            key=lambda measurement: measurement.name
+        )
+        assert (once.name, once.requests) == ('head_once', 1)
+        assert (twice.name, twice.requests) == ('head_twice', 2)
+
+        load, = observer.find('load')
+        move, = observer.find('move')
+        delete, = observer.find('delete')
+        validate, = observer.find('validate')
+        assert validate.name == 'AsyncAmazonS3FileValidator'
+        assert validate.requests == (
+            load.requests + once.requests + twice.requests +
+            move.requests + delete.requests
+        )
+
+    def test_counts_requests_of_multipart_copy_threads(self, observer, bucket):
+        obj = boto3.resource('s3').Object(
+            bucket.name,
+            'test-unvalidated-uploads/large.bin'
+        )
+        obj.put(Body=b'0' * (MIN_PART_SIZE + 1))
+        AmazonS3FileValidator(
+            key_name=obj.key,
+            bucket=bucket,
+            move_strategy=ServerSideCopy(
+                multipart_threshold=MIN_PART_SIZE,
+                part_size=MIN_PART_SIZE
+            )
+        ).validate()
+        move, = observer.find('move')
+        # CreateMultipartUpload, two UploadPartCopy and
+        # CompleteMultipartUpload requests.
+        assert move.requests == 4
+
+    def test_measures_function_validators_by_name(
+        self,
+        observer,
+        bucket,
+        unvalidated_key
+    ):
+        def always_valid(obj):
+            pass
+
+        AmazonS3FileValidator(
+            key_name=unvalidated_key.key,
+            bucket=bucket,
+            validators=[always_valid]
+        ).validate()
+        measurement, = observer.find('validator')
+        assert measurement.name == 'always_valid'
+
+    def test_marks_rejecting_validators_failed(
+        self,
+        observer,
+        bucket,
+        unvalidated_key
+    ):
+        AmazonS3FileValidator(
+            key_name=unvalidated_key.key,
+            bucket=bucket,
+            validators=[MimeType('image/png')]
+        ).validate()
+        measurement, = observer.find('validator')
+        assert measurement.failed
+        assert observer.find('move') == []
+
+    def test_measures_batch_deletes(self, observer, bucket, unvalidated_key):
+        with AmazonS3BatchDeleter(bucket) as deleter:
+            deleter.add(unvalidated_key.key)
+        measurement, = observer.find('delete')
+        assert measurement.name == 'AmazonS3BatchDeleter'
+        assert measurement.requests == 1
+
+    def test_measures_signing(self, observer, bucket):
+        AmazonS3SignedRequest(
+            key_name=u'my/file.jpg',
+            mime_type=u'image/jpeg',
+            bucket=bucket,
+            session=boto3.session.Session(region_name='eu-west-1')
+        ).form_fields
+        measurement, = observer.find('sign')
+        assert measurement.name == 'AmazonS3SignedRequest'
+
+
+class TestPrometheusObserver(object):
+    @pytest.fixture
+    def registry(self):
+        prometheus_client = pytest.importorskip('prometheus_client')
+        return prometheus_client.CollectorRegistry()
+
+    @pytest.fixture
+    def prometheus_observer(self, registry):
+        return instrumentation.PrometheusObserver(registry=registry)
+
+    def test_records_measurements(self, registry, prometheus_observer):
+        measurement = instrumentation.Measurement('validator', 'MimeType')
+        measurement.duration = 0.25
+        measurement.requests = 2
+        measurement.bytes_transferred = 1024
+        measurement.failed = True
+        prometheus_observer.on_measurement(measurement)
+
+        labels = {'operation': 'validator', 'name': 'MimeType'}
+        assert registry.get_sample_value(
+            'pontus_operation_duration_seconds_sum',
+            labels
+        ) == 0.25
+        assert registry.get_sample_value(
+            'pontus_operations_failed_total',
+            labels
+        ) == 1
+        assert registry.get_sample_value(
+            'pontus_s3_requests_total',
+            labels
+        ) == 2
+        assert registry.get_sample_value(
+            'pontus_s3_bytes_transferred_total',
+            labels
+        ) == 1024
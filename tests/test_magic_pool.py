@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+
+import pytest
+from flexmock import flexmock
+
+from pontus import magic_pool
+from pontus.magic_pool import MagicPool
+
+
+class TestMagicPool(object):
+    @pytest.fixture
+    def jpeg_data(self):
+        with open(os.path.join(
+            os.path.dirname(__file__),
+            'data',
+            'example.jpg'
+        ), 'rb') as image:
+            return image.read()
+
+    def test_from_buffer_returns_mime_type(self, jpeg_data):
+        assert MagicPool().from_buffer(jpeg_data) == 'image/jpeg'
+
+    def test_creates_handles_lazily(self, jpeg_data):
+        pool = MagicPool(size=2)
+        assert len(pool) == 0
+        pool.from_buffer(jpeg_data)
+        pool.from_buffer(jpeg_data)
+        assert len(pool) == 1
+
+    def test_warm_up_creates_all_handles(self):
+        pool = MagicPool(size=3)
+        pool.warm_up()
+        assert len(pool) == 3
+        pool.warm_up()
+        assert len(pool) == 3
+
+    def test_does_not_create_more_handles_than_size(self, jpeg_data):
+        pool = MagicPool(size=2)
+        results = []
+
+        def sniff():
+            for _ in range(20):
+                results.append(pool.from_buffer(jpeg_data))
+
+        threads = [threading.Thread(target=sniff) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(pool) <= 2
+        assert results == ['image/jpeg'] * 160
+
+    def test_raises_value_error_if_size_is_too_small(self):
+        with pytest.raises(ValueError) as e:
+            MagicPool(size=0)
+        assert str(e.value) == 'Argument `size` must be at least 1.'
+
+    def test_repr(self):
+        assert repr(MagicPool(size=2)) == '<MagicPool size=2>'
+
+
+class TestSharedPool(object):
+    @pytest.fixture(autouse=True)
+    def reset_pool(self):
+        pool = magic_pool._pool
+        yield
+        magic_pool._pool = pool
+
+    def test_get_pool_returns_same_pool(self):
+        assert magic_pool.get_pool() is magic_pool.get_pool()
+
+    def test_configure_replaces_pool(self):
+        pool = magic_pool.configure(size=2)
+        assert magic_pool.get_pool() is pool
+        assert pool.size == 2
+
+    def test_warm_up(self):
+        (
+            flexmock(MagicPool)
+            .should_call('warm_up')
+            .once()
+        )
+        pool = magic_pool.warm_up(size=2)
+        assert len(pool) == 2
+        assert magic_pool.get_pool() is pool
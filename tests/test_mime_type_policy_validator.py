@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+
+import boto3
+import pytest
+from flexmock import flexmock
+
+from pontus.exceptions import ValidationError
+from pontus.validators import COST_RANGED_READ, MimeTypePolicy
+
+
+class TestMimeTypePolicyValidator(object):
+    @pytest.fixture
+    def jpeg_key(self, bucket):
+        with open(os.path.join(
+            os.path.dirname(__file__),
+            'data',
+            'example.jpg'
+        ), 'rb') as image:
+            obj = boto3.resource('s3').Object(bucket.name, 'example.jpg')
+            obj.put(Body=image)
+            return obj
+
+    def test_does_not_raise_validation_error_if_allowed(self, jpeg_key):
+        MimeTypePolicy(allow=['image/*'], deny=['image/png'])(jpeg_key)
+
+    def test_raises_validation_error_if_denied(self, jpeg_key):
+        validator = MimeTypePolicy(allow=['image/*'], deny=['image/jpeg'])
+        with pytest.raises(ValidationError) as e:
+            validator(jpeg_key)
+        assert str(e.value) == (
+            'Invalid file: File MIME type image/jpeg is denied.'
+        )
+
+    def test_raises_validation_error_if_not_allowed(self, jpeg_key):
+        validator = MimeTypePolicy(allow=['application/pdf'])
+        with pytest.raises(ValidationError) as e:
+            validator(jpeg_key)
+        assert str(e.value) == (
+            'Invalid file: File MIME type image/jpeg is not allowed.'
+        )
+
+    @pytest.mark.parametrize(('policy', 'mime_type', 'error'), [
+        ({'allow': ['image/*']}, 'image/png', None),
+        ({'allow': ['image/*']}, 'text/plain', 'not allowed'),
+        ({'allow': ['*/*'], 'deny': ['text/html']}, 'text/plain', None),
+        ({'allow': ['*/*'], 'deny': ['text/html']}, 'text/html', 'denied'),
+        ({'deny': ['text/*']}, 'text/csv', 'denied'),
+        ({'deny': ['text/*']}, 'image/png', None),
+        ({'deny': ['*/*']}, 'image/png', 'denied'),
+        ({'allow_regex': r'^image/'}, 'image/png', None),
+        ({'allow_regex': [r'^video/', r'pdf$']}, 'application/pdf', None),
+        ({'allow_regex': [r'^video/', r'pdf$']}, 'image/png', 'not allowed'),
+        ({'allow': ['image/*'], 'deny_regex': 'svg'}, 'image/svg+xml', 'denied'),
+        ({'allow': 'image/jpeg'}, 'image/jpeg', None),
+        ({'allow': 'image/jpeg'}, 'image/png', 'not allowed'),
+        ({'deny': 'image/svg+xml'}, 'image/svg+xml', 'denied'),
+        ({'allow_regex': [r'^image/', r'(?i)PDF']}, 'application/pdf', None),
+        ({'allow_regex': [r'^image/', r'(?i)PDF']}, 'text/plain', 'not allowed'),
+        ({'deny_regex': [r'(?i)SVG', r'^text/']}, 'image/svg+xml', 'denied'),
+    ])
+    def test_evaluate(self, policy, mime_type, error):
+        result = MimeTypePolicy(**policy).evaluate(mime_type)
+        if error:
+            assert result == 'File MIME type {0} is {1}.'.format(
+                mime_type,
+                error
+            )
+        else:
+            assert result is None
+
+    def test_evaluate_memoizes_decisions(self):
+        validator = MimeTypePolicy(allow=['image/*'])
+        validator.evaluate('image/png')
+        flexmock(validator).should_receive('_decide').never()
+        assert validator.evaluate('image/png') is None
+
+    def test_evaluate_bounds_memoized_decisions(self):
+        validator = MimeTypePolicy(allow=['image/*'])
+        validator.max_decisions = 2
+        for mime_type in ['image/png', 'image/gif', 'image/jpeg']:
+            validator.evaluate(mime_type)
+        assert len(validator._decisions) <= 2
+
+    def test_cost(self):
+        assert MimeTypePolicy(deny=['text/*'], sniff_size=1).cost == (
+            COST_RANGED_READ
+        )
+
+    def test_raises_value_error_if_no_rules(self):
+        with pytest.raises(ValueError) as e:
+            MimeTypePolicy()
+        assert str(e.value) == 'No argument for validation provided.'
+
+    def test_raises_error_if_regex_is_invalid(self):
+        with pytest.raises(re.error):
+            MimeTypePolicy(allow_regex=[r'^image/', r'('])
+
+    def test_single_mime_types_are_not_split(self):
+        validator = MimeTypePolicy(allow='image/*', deny='image/svg+xml')
+        assert validator.allow == ['image/*']
+        assert validator.deny == ['image/svg+xml']
+
+    def test_repr(self):
+        assert repr(MimeTypePolicy(allow=['image/*'], deny_regex='svg')) == (
+            "<MimeTypePolicy allow=['image/*'] deny_regex='svg'>"
+        )
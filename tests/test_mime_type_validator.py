@@ -1,11 +1,21 @@
 # -*- coding: utf-8 -*-
+import io
 import os
+import tarfile
 
 import boto3
 import pytest
+from flexmock import flexmock
 
+from pontus import magic_pool, signatures
 from pontus.exceptions import ValidationError
-from pontus.validators import MimeType
+from pontus.validation_context import ValidationContext
+from pontus.validators import (
+    COST_FULL_READ,
+    COST_RANGED_READ,
+    MimeType,
+    sniff_mime_type
+)
 
 
 class TestMimeTypeValidator(object):
@@ -83,3 +93,104 @@ class TestMimeTypeValidator(object):
     ):
         validator = MimeType(regex=r'image\/.*')
         validator(jpeg_key)
+
+    def test_sniff_size_fetches_only_a_range_of_the_file(
+        self,
+        jpeg_key
+    ):
+        (
+            flexmock(jpeg_key)
+            .should_call('get')
+            .with_args(Range='bytes=0-1023')
+            .once()
+        )
+        validator = MimeType(mime_type='image/jpeg', sniff_size=1024)
+        validator(jpeg_key)
+
+    def test_sniff_size_raises_validation_error_if_invalid_mime_type(
+        self,
+        jpeg_key
+    ):
+        validator = MimeType(mime_type='image/png', sniff_size=1024)
+        with pytest.raises(ValidationError) as e:
+            validator(jpeg_key)
+        assert str(e.value) == (
+            "Invalid file: File MIME type is image/jpeg, not in image/png."
+        )
+
+    def test_repr_with_sniff_size(self):
+        assert repr(MimeType('image/png', sniff_size=1024)) == (
+            u"<MimeType mime_types='image/png' sniff_size=1024, "
+            u"max_sniff_size=None>"
+        )
+
+    def test_repr_without_fast_sniff(self):
+        assert repr(MimeType('image/png', fast_sniff=False)) == (
+            u"<MimeType mime_types='image/png' fast_sniff=False>"
+        )
+
+    def test_uses_libmagic_without_fast_sniff(self, jpeg_key):
+        flexmock(signatures).should_receive('sniff').never()
+        flexmock(magic_pool.get_pool()).should_call('from_buffer').once()
+        MimeType('image/jpeg', fast_sniff=False)(jpeg_key)
+
+    def test_uses_libmagic_without_fast_sniff_with_shared_context(
+        self,
+        jpeg_key
+    ):
+        context = ValidationContext(jpeg_key)
+        flexmock(signatures).should_receive('sniff').never()
+        flexmock(magic_pool.get_pool()).should_call('from_buffer').once()
+        MimeType('image/jpeg', fast_sniff=False)(jpeg_key, context=context)
+
+    def test_uses_libmagic_if_context_disables_fast_sniff(self, jpeg_key):
+        context = ValidationContext(jpeg_key, fast_sniff=False)
+        flexmock(signatures).should_receive('sniff').never()
+        MimeType('image/jpeg')(jpeg_key, context=context)
+
+    def test_cost(self):
+        assert MimeType('image/jpeg').cost == COST_FULL_READ
+        assert MimeType('image/jpeg', sniff_size=1024).cost == (
+            COST_RANGED_READ
+        )
+
+
+class TestSniffMimeType(object):
+    @pytest.fixture
+    def tar_key(self, bucket):
+        fileobj = io.BytesIO()
+        with tarfile.open(fileobj=fileobj, mode='w') as tar:
+            info = tarfile.TarInfo('hello.txt')
+            info.size = 5
+            tar.addfile(info, io.BytesIO(b'hello'))
+        obj = boto3.resource('s3').Object(bucket.name, 'hello.tar')
+        obj.put(Body=fileobj.getvalue())
+        return obj
+
+    def test_widens_range_on_generic_mime_type(self, tar_key):
+        obj = flexmock(tar_key)
+        obj.should_call('get').with_args(Range='bytes=0-127').once()
+        obj.should_call('get').with_args(Range='bytes=128-255').once()
+        obj.should_call('get').with_args(Range='bytes=256-511').once()
+        assert sniff_mime_type(tar_key, sniff_size=128) == 'application/x-tar'
+
+    def test_stops_widening_at_max_sniff_size(self, tar_key):
+        flexmock(tar_key).should_call('get').times(2)
+        assert sniff_mime_type(
+            tar_key,
+            sniff_size=128,
+            max_sniff_size=256
+        ) == 'application/octet-stream'
+
+    def test_stops_widening_at_end_of_file(self, bucket):
+        obj = boto3.resource('s3').Object(bucket.name, 'zeros.bin')
+        obj.put(Body=b'\x00' * 100)
+        flexmock(obj).should_call('get').times(4)
+        assert sniff_mime_type(obj, sniff_size=16) == (
+            'application/octet-stream'
+        )
+
+    def test_empty_file(self, bucket):
+        obj = boto3.resource('s3').Object(bucket.name, 'empty.bin')
+        obj.put(Body=b'')
+        assert sniff_mime_type(obj, sniff_size=16) == 'application/x-empty'
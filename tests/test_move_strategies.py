@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+import boto3
+import botocore
+import pytest
+from flexmock import flexmock
+
+from pontus import AmazonS3FileValidator
+from pontus.exceptions import ValidationError
+from pontus.move_strategies import (
+    MAX_COPY_OBJECT_SIZE,
+    MIN_PART_SIZE,
+    ManagedCopy,
+    ServerSideCopy,
+    TagInPlace
+)
+
+
+class TestServerSideCopy(object):
+    @pytest.fixture
+    def obj(self, bucket):
+        obj = boto3.resource('s3').Object(
+            bucket.name,
+            'test-unvalidated-uploads/hello.txt'
+        )
+        obj.put(
+            Body=b'hello',
+            ContentType='text/custom',
+            Metadata={'owner': 'test'}
+        )
+        obj.load()
+        return obj
+
+    @pytest.fixture
+    def large_obj(self, bucket):
+        obj = boto3.resource('s3').Object(
+            bucket.name,
+            'test-unvalidated-uploads/large.bin'
+        )
+        obj.put(
+            Body=b'0123456789' * (MIN_PART_SIZE // 5 + 1),
+            ContentType='application/custom',
+        )
+        obj.load()
+        return obj
+
+    def test_copies_with_single_conditional_request(self, obj):
+        client = flexmock(obj.meta.client)
+        (
+            client.should_call('copy_object')
+            .with_args(
+                Bucket='test-bucket',
+                Key='hello.txt',
+                CopySource={
+                    'Bucket': 'test-bucket',
+                    'Key': 'test-unvalidated-uploads/hello.txt'
+                },
+                CopySourceIfMatch=obj.e_tag,
+                ACL='private',
+            )
+            .once()
+        )
+        client.should_receive('head_object').never()
+        client.should_receive('create_multipart_upload').never()
+        new_obj = ServerSideCopy().move(obj, 'hello.txt', 'private')
+        assert new_obj.key == 'hello.txt'
+        assert new_obj.content_type == 'text/custom'
+        assert new_obj.content_length == 5
+
+    def test_copy_preserves_content_type_and_metadata(self, obj, bucket):
+        ServerSideCopy().move(obj, 'hello.txt', 'private')
+        new_obj = bucket.Object('hello.txt')
+        assert new_obj.get()['Body'].read() == b'hello'
+        assert new_obj.content_type == 'text/custom'
+        assert new_obj.metadata == {'owner': 'test'}
+
+    def test_copies_large_files_in_parts(self, large_obj, bucket):
+        client = flexmock(large_obj.meta.client)
+        client.should_call('upload_part_copy').times(3)
+        new_obj = ServerSideCopy(
+            multipart_threshold=MIN_PART_SIZE,
+            part_size=MIN_PART_SIZE
+        ).move(large_obj, 'large.bin', 'private')
+        assert new_obj.e_tag.endswith('-3"')
+
+        copied = bucket.Object('large.bin')
+        assert copied.get()['Body'].read() == (
+            large_obj.get()['Body'].read()
+        )
+        assert copied.content_type == 'application/custom'
+
+    def test_aborts_failed_multipart_copy(self, large_obj):
+        client = flexmock(large_obj.meta.client)
+        (
+            client.should_receive('upload_part_copy')
+            .and_raise(botocore.exceptions.ClientError(
+                {'Error': {'Code': 'PreconditionFailed'}},
+                'UploadPartCopy'
+            ))
+        )
+        client.should_call('abort_multipart_upload').once()
+        with pytest.raises(botocore.exceptions.ClientError):
+            ServerSideCopy(
+                multipart_threshold=MIN_PART_SIZE,
+                part_size=MIN_PART_SIZE
+            ).move(large_obj, 'large.bin', 'private')
+
+    def test_increases_part_size_to_fit_max_parts(self):
+        strategy = ServerSideCopy(part_size=MIN_PART_SIZE)
+        assert strategy._get_part_size(MIN_PART_SIZE * 10000) == (
+            MIN_PART_SIZE
+        )
+        assert strategy._get_part_size(MIN_PART_SIZE * 10001) == (
+            MIN_PART_SIZE * 2
+        )
+
+    def test_raises_value_error_if_threshold_is_too_large(self):
+        with pytest.raises(ValueError):
+            ServerSideCopy(multipart_threshold=MAX_COPY_OBJECT_SIZE + 1)
+
+    def test_raises_value_error_if_part_size_is_too_small(self):
+        with pytest.raises(ValueError):
+            ServerSideCopy(part_size=MIN_PART_SIZE - 1)
+
+    def test_validator_uses_move_strategy(self, obj, bucket):
+        validator = AmazonS3FileValidator(
+            key_name=obj.key,
+            bucket=bucket,
+            move_strategy=ServerSideCopy()
+        )
+        assert validator.validate()
+        assert validator.obj.key == 'hello.txt'
+        assert [o.key for o in bucket.objects.all()] == ['hello.txt']
+
+    def test_repr(self):
+        assert repr(ServerSideCopy(
+            multipart_threshold=MIN_PART_SIZE,
+            part_size=MIN_PART_SIZE,
+            max_concurrency=2
+        )) == (
+            '<ServerSideCopy multipart_threshold=5242880, '
+            'part_size=5242880, max_concurrency=2>'
+        )
+
+
+class TestManagedCopy(object):
+    def test_repr(self):
+        assert repr(ManagedCopy()) == '<ManagedCopy>'
+
+
+class TestTagInPlace(object):
+    @pytest.fixture
+    def obj(self, bucket):
+        obj = boto3.resource('s3').Object(bucket.name, 'uploads/hello.txt')
+        obj.put(Body=b'hello', Tagging='pontus-validated=false&owner=test')
+        return obj
+
+    def get_tags(self, obj):
+        return sorted(
+            (tag['Key'], tag['Value']) for tag in
+            obj.meta.client.get_object_tagging(
+                Bucket=obj.bucket_name,
+                Key=obj.key
+            )['TagSet']
+        )
+
+    def test_tags_file_in_place(self, obj):
+        assert TagInPlace().move(obj, 'hello.txt', 'private') is obj
+        assert self.get_tags(obj) == [
+            ('owner', 'test'),
+            ('pontus-validated', 'true'),
+        ]
+
+    def test_validator_tags_valid_file_without_moving_it(self, obj, bucket):
+        validator = AmazonS3FileValidator(
+            key_name=obj.key,
+            bucket=bucket,
+            move_strategy=TagInPlace('validated', 'yes')
+        )
+        assert validator.validate()
+        assert validator.obj.key == 'uploads/hello.txt'
+        assert [o.key for o in bucket.objects.all()] == ['uploads/hello.txt']
+        assert ('validated', 'yes') in self.get_tags(obj)
+
+    def test_validator_does_not_tag_invalid_file(self, obj, bucket):
+        def invalid(obj):
+            raise ValidationError('Invalid.')
+
+        validator = AmazonS3FileValidator(
+            key_name=obj.key,
+            bucket=bucket,
+            validators=[invalid],
+            move_strategy=TagInPlace()
+        )
+        assert not validator.validate()
+        assert ('pontus-validated', 'false') in self.get_tags(obj)
+
+    def test_repr(self):
+        assert repr(TagInPlace()) == (
+            "<TagInPlace tag_key='pontus-validated', tag_value='true'>"
+        )
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+import struct
+import zipfile
+
+import pytest
+
+from pontus.magic_pool import MagicPool
+from pontus.signatures import sniff
+
+
+def _office_document(directory):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as document:
+        document.writestr('[Content_Types].xml', '<Types/>')
+        document.writestr('_rels/.rels', '<Relationships/>')
+        document.writestr(directory + 'document.xml', '<document/>')
+    return buf.getvalue()
+
+
+def _zip_file():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as archive:
+        archive.writestr('readme.txt', 'Hello')
+    return buf.getvalue()
+
+
+def _ftyp(brand):
+    box = brand + b'\x00\x00\x00\x00' + brand + b'mp41'
+    return struct.pack('>I', len(box) + 8) + b'ftyp' + box + b'\x00' * 64
+
+
+def _jpeg():
+    with open(os.path.join(
+        os.path.dirname(__file__),
+        'data',
+        'example.jpg'
+    ), 'rb') as image:
+        return image.read()
+
+
+SAMPLES = {
+    'jpeg': _jpeg(),
+    'png': b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR' + b'\x00' * 64,
+    'gif87a': b'GIF87a\x01\x00\x01\x00' + b'\x00' * 64,
+    'gif89a': b'GIF89a\x01\x00\x01\x00' + b'\x00' * 64,
+    'pdf': b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n' + b'\x00' * 64,
+    'webp': b'RIFF\x24\x00\x00\x00WEBPVP8 ' + b'\x00' * 64,
+    'isom': _ftyp(b'isom'),
+    'iso2': _ftyp(b'iso2'),
+    'mp41': _ftyp(b'mp41'),
+    'mp42': _ftyp(b'mp42'),
+    'avc1': _ftyp(b'avc1'),
+    'dash': _ftyp(b'dash'),
+    'quicktime': _ftyp(b'qt  '),
+    'm4a': _ftyp(b'M4A '),
+    'm4v': _ftyp(b'M4V '),
+    'docx': _office_document('word/'),
+    'xlsx': _office_document('xl/'),
+    'pptx': _office_document('ppt/'),
+}
+
+
+class TestSniff(object):
+    @pytest.fixture(scope='class')
+    def pool(self):
+        return MagicPool(size=1)
+
+    @pytest.mark.parametrize('name', sorted(SAMPLES))
+    def test_agrees_with_libmagic(self, pool, name):
+        buf = SAMPLES[name]
+        assert sniff(buf) is not None
+        assert sniff(buf) == pool.from_buffer(buf)
+
+    @pytest.mark.parametrize('buf', [
+        b'',
+        b'Hello, world!',
+        _ftyp(b'heic'),
+        _zip_file(),
+        _office_document('word/')[:64],
+    ])
+    def test_returns_none_for_unrecognized_formats(self, buf):
+        assert sniff(buf) is None
+
+    def test_stops_at_zip_entries_with_a_data_descriptor(self):
+        buf = bytearray(_office_document('word/'))
+        # Flag the first entry as having its sizes in a data descriptor.
+        struct.pack_into('<H', buf, 6, 0x08)
+        assert sniff(bytes(buf)) is None
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+import time
+
+import boto3
+import pytest
+from flexmock import flexmock
+
+from pontus import AmazonS3FileValidator
+from pontus.exceptions import ValidationError
+from pontus.validation_cache import (
+    LRUValidationCache,
+    RedisValidationCache,
+    get_cache_key,
+    get_fingerprint
+)
+from pontus.validators import FileSize, MimeType
+
+
+class FakeRedis(object):
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key, (None, None))[1]
+
+    def setex(self, key, ttl, value):
+        self.values[key] = (ttl, value.encode('utf-8'))
+
+
+class Unrepresentable(object):
+    def __init__(self, value):
+        self.value = value
+
+    def __call__(self, obj):
+        pass
+
+
+class MaxSize(object):
+    def __init__(self, limit):
+        self.limit = limit
+
+    def __call__(self, obj):
+        if obj.content_length > self.limit:
+            raise ValidationError('File is too large.')
+
+    def __repr__(self):
+        return '<MaxSize>'
+
+
+def max_size(limit):
+    def validator(obj):
+        if obj.content_length > limit:
+            raise ValidationError('File is too large.')
+    return validator
+
+
+def name_validator(obj):
+    if not obj.key.startswith('images/'):
+        raise ValidationError('Invalid name.')
+
+
+class TestGetFingerprint(object):
+    def test_function_has_no_fingerprint(self):
+        assert get_fingerprint(name_validator) is None
+
+    def test_function_with_fingerprint_attribute(self):
+        def validator(obj):
+            pass
+        validator.fingerprint = 'custom'
+        assert get_fingerprint(validator) == 'custom'
+
+    def test_validator_with_repr(self):
+        assert get_fingerprint(MimeType('image/jpeg')) == (
+            "pontus.validators.MimeType:<MimeType mime_types='image/jpeg'>"
+        )
+
+    def test_validator_without_repr_has_no_fingerprint(self):
+        assert get_fingerprint(Unrepresentable(1)) is None
+
+    def test_class_validator_has_no_fingerprint(self):
+        assert get_fingerprint(MaxSize(1)) is None
+
+    def test_fingerprint_attribute(self):
+        validator = Unrepresentable(1)
+        validator.fingerprint = 'custom'
+        assert get_fingerprint(validator) == 'custom'
+
+
+class TestGetCacheKey(object):
+    @pytest.fixture
+    def obj(self, bucket):
+        obj = boto3.resource('s3').Object(bucket.name, 'images/hello.jpg')
+        obj.put(Body='test')
+        return obj
+
+    def test_is_stable(self, obj):
+        assert get_cache_key(obj, [FileSize(max=1)]) == (
+            get_cache_key(obj, [FileSize(max=1)])
+        )
+
+    def test_changes_with_validators(self, obj):
+        assert get_cache_key(obj, [FileSize(max=1)]) != (
+            get_cache_key(obj, [FileSize(max=2)])
+        )
+
+    def test_changes_with_options(self, obj):
+        assert get_cache_key(obj, [], fail_fast=True) != (
+            get_cache_key(obj, [], fail_fast=False)
+        )
+
+    def test_is_none_with_unfingerprinted_function(self, obj):
+        assert get_cache_key(obj, [FileSize(max=1), name_validator]) is None
+
+    def test_changes_with_content(self, obj, bucket):
+        key = get_cache_key(obj, [])
+        obj.put(Body='other')
+        obj.reload()
+        assert get_cache_key(obj, []) != key
+
+
+class TestLRUValidationCache(object):
+    def test_returns_cached_errors(self):
+        cache = LRUValidationCache()
+        cache.set('key', ['Invalid.'])
+        assert cache.get('key') == ['Invalid.']
+        assert cache.get('other') is None
+
+    def test_expires_results(self):
+        cache = LRUValidationCache(ttl=10)
+        cache.set('key', [])
+        now = time.monotonic()
+        flexmock(time).should_receive('monotonic').and_return(now + 11)
+        assert cache.get('key') is None
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used_result(self):
+        cache = LRUValidationCache(max_size=2)
+        cache.set('a', [])
+        cache.set('b', [])
+        cache.get('a')
+        cache.set('c', [])
+        assert cache.get('a') == []
+        assert cache.get('b') is None
+        assert cache.get('c') == []
+
+
+class TestRedisValidationCache(object):
+    def test_returns_cached_errors(self):
+        redis = FakeRedis()
+        cache = RedisValidationCache(redis, ttl=60)
+        cache.set('key', ['Invalid.'])
+        assert redis.values['pontus:validation:key'][0] == 60
+        assert cache.get('key') == ['Invalid.']
+        assert cache.get('other') is None
+
+
+class TestAmazonS3FileValidatorCache(object):
+    @pytest.fixture
+    def key_name(self, bucket):
+        key_name = 'images/hello.jpg'
+        boto3.resource('s3').Object(bucket.name, key_name).put(Body='test')
+        return key_name
+
+    @pytest.mark.parametrize('cache', [
+        LRUValidationCache(),
+        RedisValidationCache(FakeRedis()),
+    ])
+    def test_repeat_validation_uses_cached_result(
+        self,
+        key_name,
+        bucket,
+        cache
+    ):
+        validators = [MimeType('image/jpeg')]
+        validator = AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=validators,
+            cache=cache
+        )
+        assert not validator.validate()
+
+        validator = AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=validators,
+            cache=cache
+        )
+        flexmock(validator.obj).should_receive('get').never()
+        assert not validator.validate()
+        assert validator.errors == [
+            'File MIME type is text/plain, not in image/jpeg.'
+        ]
+
+    def test_changed_file_is_validated_again(self, key_name, bucket):
+        cache = LRUValidationCache()
+        AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[FileSize(max=4)],
+            cache=cache
+        ).validate()
+        bucket.Object(key_name).put(Body='too long')
+        validator = AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[FileSize(max=4)],
+            cache=cache
+        )
+        assert not validator.validate()
+
+    def test_class_validators_without_fingerprint_are_not_cached(
+        self,
+        key_name,
+        bucket
+    ):
+        cache = LRUValidationCache()
+        assert AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[MaxSize(100)],
+            cache=cache
+        ).validate()
+        assert not AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[MaxSize(2)],
+            cache=cache
+        ).validate()
+        assert len(cache) == 0
+
+    def test_closures_of_one_factory_are_not_cached(self, key_name, bucket):
+        cache = LRUValidationCache()
+        assert AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[max_size(100)],
+            cache=cache
+        ).validate()
+        validator = AmazonS3FileValidator(
+            key_name=key_name,
+            bucket=bucket,
+            validators=[max_size(2)],
+            cache=cache
+        )
+        assert not validator.validate()
+        assert validator.errors == ['File is too large.']
+        assert len(cache) == 0
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import os
+
+import boto3
+import pytest
+from flexmock import flexmock
+
+from pontus import magic_pool
+from pontus.validation_context import ValidationContext
+
+
+class TestValidationContext(object):
+    @pytest.fixture
+    def jpeg_key(self, bucket):
+        with open(os.path.join(
+            os.path.dirname(__file__),
+            'data',
+            'example.jpg'
+        ), 'rb') as image:
+            obj = boto3.resource('s3').Object(bucket.name, 'example.jpg')
+            obj.put(Body=image)
+            return obj
+
+    @pytest.fixture
+    def jpeg_data(self):
+        with open(os.path.join(
+            os.path.dirname(__file__),
+            'data',
+            'example.jpg'
+        ), 'rb') as image:
+            return image.read()
+
+    def test_read_fetches_body_once(self, jpeg_key, jpeg_data):
+        flexmock(jpeg_key).should_call('get').once()
+        context = ValidationContext(jpeg_key)
+        assert context.read() == jpeg_data
+        assert context.read() == jpeg_data
+
+    def test_read_with_size_fetches_only_missing_bytes(
+        self,
+        jpeg_key,
+        jpeg_data
+    ):
+        obj = flexmock(jpeg_key)
+        obj.should_call('get').with_args(Range='bytes=0-99').once()
+        obj.should_call('get').with_args(Range='bytes=100-199').once()
+        context = ValidationContext(jpeg_key)
+        assert context.read(100) == jpeg_data[:100]
+        assert context.read(50) == jpeg_data[:50]
+        assert context.read(200) == jpeg_data[:200]
+
+    def test_read_completes_prefix(self, jpeg_key, jpeg_data):
+        obj = flexmock(jpeg_key)
+        obj.should_call('get').with_args(Range='bytes=0-99').once()
+        obj.should_call('get').with_args(Range='bytes=100-').once()
+        context = ValidationContext(jpeg_key)
+        context.read(100)
+        assert context.read() == jpeg_data
+
+    def test_read_past_end_of_file_does_not_fetch_again(
+        self,
+        jpeg_key,
+        jpeg_data
+    ):
+        flexmock(jpeg_key).should_call('get').once()
+        context = ValidationContext(jpeg_key)
+        assert context.read(10 ** 6) == jpeg_data
+        assert context.read() == jpeg_data
+
+    def test_mime_type_is_memoized(self, jpeg_key):
+        flexmock(magic_pool.get_pool()).should_call('from_buffer').once()
+        context = ValidationContext(jpeg_key, fast_sniff=False)
+        assert context.mime_type() == 'image/jpeg'
+        assert context.mime_type() == 'image/jpeg'
+
+    def test_mime_type_uses_signature_fast_path(self, jpeg_key):
+        flexmock(magic_pool.get_pool()).should_call('from_buffer').never()
+        context = ValidationContext(jpeg_key)
+        assert context.mime_type() == 'image/jpeg'
+
+    def test_repr(self, jpeg_key):
+        assert repr(ValidationContext(jpeg_key)) == (
+            "<ValidationContext key='example.jpg'>"
+        )